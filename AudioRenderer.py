@@ -0,0 +1,217 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# AudioRenderer.py
+# Renders a solo and its comping to a WAV file, far faster than real time, instead of
+# waiting for Play.midi() to play the Score through:
+#   solo, comping = SoloGenerator(9).generate()
+#   render_wav('solo.wav', solo.tied(), comping, bpm=286.0)
+#   for samples in render_chunks(solo, comping, 286.0):  # int16 arrays, e.g. to hash for a snapshot
+#       ...
+#
+# Each instrument is a small built-in synth: one period of a waveform made of a few
+# harmonics (a wavetable), read at each note's frequency and shaped by an envelope.
+# The audio is made a chunk at a time. Every note sounding in a chunk is rendered in one
+# batch of array operations, with no loop over notes or samples, and summed into the
+# chunk with bincount. The parts of a chunk are rendered at the same time on a thread
+# pool, and each chunk is written out as soon as it is mixed, so memory stays at a chunk
+# plus the note list however long the solo is.
+# Needs NumPy
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import wave
+from multiprocessing.pool import ThreadPool
+try:
+    from music import BRIGHT_ACOUSTIC, TENOR_SAX
+except ImportError: # Plain Python, no JythonMusic (see MusicConstants.py)
+    from MusicConstants import BRIGHT_ACOUSTIC, TENOR_SAX
+from NoteSequence import *
+
+numpy = import_numpy()
+
+DEFAULT_SAMPLE_RATE = 22050
+CHUNK_SECONDS = 2.0  # Audio rendered and written at a time
+TABLE_SIZE = 4096    # Samples in one period of a waveform, a power of 2
+PHASE_BITS = 20      # Fractional bits of the position in the wavetable
+MASTER_GAIN = 0.8    # Applied to the mix before it is clipped to 16 bits
+A4 = 69
+A4_FREQUENCY = 440.0
+
+def frequency(pitch):
+    return A4_FREQUENCY * 2.0 ** ((pitch - A4) / 12.0)
+
+#================================================================================
+# SYNTHS
+#================================================================================
+# One period of a waveform with the given harmonic amplitudes (fundamental first), peak 1
+def wavetable(harmonics, size=TABLE_SIZE):
+    phase = numpy.arange(size) * (2 * numpy.pi / size)
+    table = numpy.zeros(size)
+    for harmonic, amplitude in enumerate(harmonics):
+        table += amplitude * numpy.sin((harmonic + 1) * phase)
+    return table / numpy.abs(table).max()
+
+'''
+A wavetable instrument. attack and release are seconds of linear fade in and out (the
+release is played after the note ends), decay is the time constant in seconds of an
+exponential fade while the note is held, None to hold at full level. gain is the level
+of one note
+'''
+class Synth(object):
+    def __init__(self, harmonics, attack=0.01, decay=None, release=0.05, gain=0.3):
+        self.table = wavetable(harmonics) * gain
+        self.attack = attack
+        self.decay = decay
+        self.release = release
+        self.gain = gain
+
+    def release_samples(self, sample_rate):
+        return int(self.release * sample_rate)
+
+    # Level of a held note at each of the first size samples after it starts
+    def held_envelope(self, size, sample_rate):
+        time = numpy.arange(size)
+        envelope = numpy.minimum(1.0, (time + 1) / max(self.attack * sample_rate, 1.0))
+        if self.decay is not None:
+            envelope *= numpy.exp(time / (-self.decay * sample_rate))
+        return envelope
+
+    # Level while the note is held (index 0), then for each sample of the release
+    def release_envelope(self, sample_rate):
+        release = self.release_samples(sample_rate)
+        return numpy.concatenate(([1.0], 1.0 - numpy.arange(release) / float(max(release, 1))))
+
+# Synths for the instruments onGenerate() uses, by General MIDI program
+SYNTHS = {
+    TENOR_SAX: Synth([1.0, 0.6, 0.5, 0.35, 0.25, 0.15, 0.1, 0.05], attack=0.02, release=0.04, gain=0.3),
+    BRIGHT_ACOUSTIC: Synth([1.0, 0.45, 0.25, 0.12, 0.08, 0.04], attack=0.004, decay=0.6, release=0.15, gain=0.1),
+}
+
+#================================================================================
+# NOTES
+# (start ticks, length ticks, pitch) arrays for every note a part plays, RESTs left out
+#================================================================================
+def solo_notes(solo):
+    ticks = numpy.frombuffer(solo.ticks(), dtype=numpy.int32).astype(numpy.int64)
+    pitches = numpy.frombuffer(solo.pitches, dtype=numpy.int8).astype(numpy.int64)
+    starts = numpy.cumsum(ticks) - ticks
+    playing = pitches >= 0
+    return starts[playing], ticks[playing], pitches[playing]
+
+def comping_notes(comping):
+    durations = numpy.frombuffer(comping.durations, dtype=numpy.int32).astype(numpy.int64)
+    ends = numpy.frombuffer(comping.chord_ends, dtype=numpy.int32)
+    sizes = numpy.diff(numpy.concatenate(([0], ends)))
+    pitches = numpy.frombuffer(comping.pitches, dtype=numpy.int8).astype(numpy.int64)
+    starts = numpy.repeat(numpy.cumsum(durations) - durations, sizes)
+    lengths = numpy.repeat(durations, sizes)
+    playing = pitches >= 0
+    return starts[playing], lengths[playing], pitches[playing]
+
+'''
+A part ready to render: its synth, and its notes in samples sorted by start. Ends are
+rounded from tick positions rather than added up from lengths, so nothing drifts.
+The envelopes are worked out once as tables, and each note's place in the wavetable is
+kept in fixed point (PHASE_BITS fractional bits) so it is integer arithmetic per sample
+'''
+class AudioPart(object):
+    def __init__(self, synth, notes, bpm, sample_rate):
+        start_ticks, length_ticks, pitches = notes
+        order = numpy.argsort(start_ticks, kind='mergesort')
+        start_ticks, length_ticks, pitches = start_ticks[order], length_ticks[order], pitches[order]
+        samples_per_tick = sample_rate * 60.0 / (bpm * TICKS_PER_BEAT)
+        self.table = synth.table
+        self.starts = numpy.rint(start_ticks * samples_per_tick).astype(numpy.int64)
+        self.lengths = numpy.rint((start_ticks + length_ticks) * samples_per_tick).astype(numpy.int64) - self.starts
+        self.steps = numpy.rint(frequency(pitches) * (TABLE_SIZE * float(1 << PHASE_BITS) / sample_rate)).astype(numpy.int64)
+        self.release = synth.release_samples(sample_rate)
+        self.longest = int((self.lengths.max() if len(self.lengths) else 0) + self.release)
+        self.held_envelope = synth.held_envelope(self.longest, sample_rate)
+        self.release_envelope = synth.release_envelope(sample_rate)
+
+    # Samples until the last note has faded out
+    def num_samples(self):
+        if len(self.starts) == 0:
+            return 0
+        return int((self.starts + self.lengths).max() + self.release)
+
+    '''
+    The notes with sound in [chunk_start, chunk_start + chunk_size) added up into one
+    float array, all in one batch
+    '''
+    def render(self, chunk_start, chunk_size):
+        # Notes are sorted by start, so only the ones that start in a window can sound
+        low = numpy.searchsorted(self.starts, chunk_start - self.longest, 'right')
+        high = numpy.searchsorted(self.starts, chunk_start + chunk_size, 'left')
+        starts = self.starts[low:high]
+        lengths = self.lengths[low:high]
+        first = numpy.maximum(starts, chunk_start)
+        counts = numpy.maximum(0, numpy.minimum(starts + lengths + self.release, chunk_start + chunk_size) - first)
+        total = int(counts.sum())
+        if total == 0:
+            return numpy.zeros(chunk_size)
+
+        # One entry per sample of every note: which note, and how far into it
+        note = numpy.repeat(numpy.arange(len(counts)), counts)
+        offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        position = numpy.repeat(first - chunk_start, counts) + offsets # In the chunk
+        time = numpy.repeat(first - starts, counts) + offsets          # Since the note started
+
+        phase = (time * self.steps[low:high][note]) >> PHASE_BITS
+        values = self.table[phase & (TABLE_SIZE - 1)]
+        values *= self.held_envelope[time]
+        values *= self.release_envelope[numpy.maximum(0, time - lengths[note] + 1)]
+        return numpy.bincount(position, weights=values, minlength=chunk_size)
+
+#================================================================================
+# RENDERING
+#================================================================================
+def _parts(solo, comping, bpm, sample_rate, solo_instrument, comping_instrument):
+    if numpy is None:
+        raise ImportError('rendering audio needs NumPy')
+    parts = [AudioPart(SYNTHS[solo_instrument], solo_notes(solo), bpm, sample_rate)]
+    if comping is not None:
+        parts.append(AudioPart(SYNTHS[comping_instrument], comping_notes(comping), bpm, sample_rate))
+    return parts
+
+'''
+Yield the mixed audio as int16 arrays of chunk_seconds each (the last one shorter).
+comping can be None for the solo alone. workers is how many threads render parts, None
+for one per part and 1 to render in this thread
+'''
+def render_chunks(solo, comping=None, bpm=120.0, sample_rate=DEFAULT_SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS,
+                  workers=None, solo_instrument=TENOR_SAX, comping_instrument=BRIGHT_ACOUSTIC):
+    parts = _parts(solo, comping, bpm, sample_rate, solo_instrument, comping_instrument)
+    num_samples = max(part.num_samples() for part in parts)
+    chunk_size = max(1, int(chunk_seconds * sample_rate))
+    pool = None
+    if workers != 1 and len(parts) > 1:
+        pool = ThreadPool(workers or len(parts))
+    try:
+        for chunk_start in range(0, num_samples, chunk_size):
+            size = min(chunk_size, num_samples - chunk_start)
+            render = lambda part: part.render(chunk_start, size)
+            rendered = pool.map(render, parts) if pool is not None else [render(part) for part in parts]
+            mix = numpy.sum(rendered, axis=0) * MASTER_GAIN
+            yield (numpy.clip(mix, -1.0, 1.0) * 32767).astype(numpy.int16)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+'''
+Render to a mono 16-bit WAV file at path, a chunk at a time. Same options as
+render_chunks(). Returns the number of samples written
+'''
+def render_wav(path, solo, comping=None, bpm=120.0, sample_rate=DEFAULT_SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS,
+               workers=None, solo_instrument=TENOR_SAX, comping_instrument=BRIGHT_ACOUSTIC):
+    out = wave.open(path, 'wb')
+    try:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        count = 0
+        for samples in render_chunks(solo, comping, bpm, sample_rate, chunk_seconds, workers,
+                                     solo_instrument, comping_instrument):
+            out.writeframes(samples.astype('<i2').tobytes())
+            count += len(samples)
+    finally:
+        out.close()
+    return count
@@ -0,0 +1,135 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Batch.py
+# Generates many solos in parallel on a process pool and exports them as MIDI files.
+#   jobs = make_jobs(1000, base_seed=42)
+#   for job, data in run_batch(jobs, workers=8):
+#       ...
+#   export_batch(jobs, 'out/', workers=8)
+#   export_corpus(jobs, 'out/solos', workers=8)  # every solo in one corpus (see Corpus.py)
+#
+# Every job carries its own seed, derived from the batch seed and the job's index, and
+# results always come back in job order. So the files are bit-identical whatever the
+# number of workers or the order the pool happens to run things in.
+# Jython has no multiprocessing, so there everything runs in the calling process
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import hashlib
+import os
+import random
+from collections import namedtuple
+from SoloEngine import *
+from MidiWriter import midi_bytes
+from Corpus import CorpusWriter
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+MIN_CHORUSES = 1
+MAX_CHORUSES = 9 # Same range as the GUI slider
+BATCH_BPMS = (160.0, 200.0, 240.0, 286.0)
+
+BatchJob = namedtuple('BatchJob', 'index num_choruses bpm use_rests accompaniment seed')
+
+'''
+Seed for job index of a batch. Hashing (instead of base_seed + index) keeps the seeds of
+neighbouring jobs and batches unrelated, and gives the same value in every process
+'''
+def derive_seed(base_seed, index):
+    digest = hashlib.sha256('{}:{}'.format(base_seed, index).encode('ascii')).hexdigest()
+    return int(digest[:16], 16)
+
+'''
+Make count jobs with options spread over the GUI's ranges. The options are picked by
+a generator seeded with base_seed, so the same call always makes the same jobs
+'''
+def make_jobs(count, base_seed=0, choruses=None, bpms=BATCH_BPMS):
+    if choruses is None:
+        choruses = range(MIN_CHORUSES, MAX_CHORUSES + 1)
+    choruses = list(choruses)
+    options = random.Random(derive_seed(base_seed, 'options'))
+    jobs = []
+    for index in range(count):
+        jobs.append(BatchJob(index, options.choice(choruses), options.choice(bpms),
+                             options.random() < 0.5, options.random() < 0.5,
+                             derive_seed(base_seed, index)))
+    return jobs
+
+# Runs in the worker process. Returns (index, MIDI file bytes)
+def generate_job(job):
+    generator = SoloGenerator(job.num_choruses, job.use_rests, seed=job.seed)
+    solo = generator.solo()
+    comping = None
+    if job.accompaniment:
+        comping = generator.comping()
+    return job.index, midi_bytes(solo, comping, job.bpm)
+
+# Same as generate_job() but returns (index, (pitches, ticks)) of the solo, for a corpus
+def generate_job_notes(job):
+    solo = SoloGenerator(job.num_choruses, job.use_rests, seed=job.seed).solo()
+    return job.index, (solo.pitches, solo.ticks())
+
+'''
+Yield (job, MIDI bytes) in job order. jobs can be any iterable. workers=None uses every core, workers=1 (or no
+multiprocessing) runs in this process. chunksize is how many jobs a worker takes at a time.
+work runs each job and returns (index, data), data is what's yielded. Closing the
+generator before the end stops the pool straight away
+'''
+def run_batch(jobs, workers=None, chunksize=16, work=generate_job):
+    if multiprocessing is None or workers == 1:
+        for job in jobs:
+            yield job, work(job)[1]
+        return
+
+    jobs = list(jobs) # Gone through twice below, which an iterator of jobs can't be
+    pool = multiprocessing.Pool(workers)
+    finished = False
+    try:
+        # imap hands results back in order as soon as the next one is ready
+        for job, (index, data) in zip(jobs, pool.imap(work, jobs, chunksize)):
+            assert job.index == index
+            yield job, data
+        finished = True
+    finally:
+        # Stopped early (closed, or an error): drop the jobs still queued instead of waiting for them
+        if finished:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+
+def job_filename(job):
+    return 'solo_{:06d}.mid'.format(job.index)
+
+'''
+Generate every job and write one MIDI file per job into directory. Returns the number
+of files written
+'''
+def export_batch(jobs, directory, workers=None, chunksize=16):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    count = 0
+    for job, data in run_batch(jobs, workers, chunksize):
+        f = open(os.path.join(directory, job_filename(job)), 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+        count += 1
+    return count
+
+'''
+Generate every job into the corpus at path (appending if it already exists). Returns the
+number of solos added
+'''
+def export_corpus(jobs, path, workers=None, chunksize=16):
+    writer = CorpusWriter(path)
+    try:
+        count = 0
+        for job, (pitches, ticks) in run_batch(jobs, workers, chunksize, generate_job_notes):
+            writer.append(pitches, ticks, seed=job.seed, num_choruses=job.num_choruses, bpm=job.bpm,
+                          use_rests=job.use_rests, accompaniment=job.accompaniment)
+            count += 1
+    finally:
+        writer.close()
+    return count
@@ -0,0 +1,191 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Comping.py
+# Voice-led piano comping. Instead of every chord in root position, each chord gets the
+# inversion and octave that moves the hands least from the chord before, chosen for the
+# whole form at once by dynamic programming:
+#   voicings = voice_lead(generate_chorus_changes())   # one tuple of pitches per chord
+#   SoloGenerator(9, voice_leading=True).comping()
+#
+# Every inversion of a chord, in every octave that fits COMPING_RANGE, is a voicing.
+# The cost of going from one voicing to the next (how far the voices move, plus a little
+# for straying from the middle of the range) is worked out once per pair of voicings and
+# kept in a matrix, so the search is O(chords x voicings^2) table lookups.
+#
+# A form that repeats (SoloGenerator's choruses) is voiced as a cycle: the last chord
+# leads back into the first, so the same voicings can be played every chorus and are
+# only worked out once per form.
+#
+# The tables are shared by every SoloGenerator, which can run on different threads (the
+# GUI's scheduler thread and onGenerate() both ask for voicings), so adding to them is
+# done under a lock. Readers don't take it: a chord's ids are only published once its
+# voicings and costs are all in place
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import threading
+from SoloEngine import *
+
+COMPING_RANGE = (F3, G5) # Lowest and highest note a voicing can use
+REGISTER_WEIGHT = 0.25   # Cost per semitone the middle of a voicing is from the middle of the range
+
+#================================================================================
+# VOICINGS
+#================================================================================
+def chord_key(chord):
+    return (chord.root % OCTAVE, tuple(chord.quality))
+
+# Every inversion of chord in every octave between low and high, lowest first
+def chord_voicings(chord, pitch_range=COMPING_RANGE):
+    low, high = pitch_range
+    below = chord.root - OCTAVE * ((chord.root - low) // OCTAVE + 1) # The root moved under low
+    root_position = form_chord(below, chord.quality)
+    voicings = []
+    for inversion in range(len(chord.quality)):
+        pitches = root_position.invert(inversion).pitches
+        while pitches[0] < low:
+            pitches = tuple(pitch + OCTAVE for pitch in pitches)
+        while pitches[-1] <= high:
+            voicings.append(pitches)
+            pitches = tuple(pitch + OCTAVE for pitch in pitches)
+    return sorted(voicings)
+
+# How far the hands move: each voice to the one in the same place in the next voicing
+def voicing_distance(a, b):
+    if len(a) == len(b):
+        return sum(abs(x - y) for x, y in zip(a, b))
+    return sum(min(abs(x - y) for y in a) for x in b) # Different sizes, each new note from the nearest
+
+'''
+All the voicings seen so far for one range, and the cost of moving between every pair
+of them. Chords are added the first time they are asked for, like the line table, one
+thread at a time
+'''
+class VoicingTable(object):
+    def __init__(self, pitch_range=COMPING_RANGE):
+        self.pitch_range = pitch_range
+        self.center = (pitch_range[0] + pitch_range[1]) / 2.0
+        self.voicings = [] # Voicing id -> tuple of pitches
+        self.ids = {}      # chord_key() -> voicing ids of that chord
+        self.cost = []     # cost[i][j] of playing voicing j after voicing i
+        self.lock = threading.Lock() # Held while a chord is added
+
+    def register_cost(self, voicing):
+        return REGISTER_WEIGHT * abs(float(sum(voicing)) / len(voicing) - self.center)
+
+    def chord_ids(self, chord):
+        key = chord_key(chord)
+        ids = self.ids.get(key)
+        if ids is None:
+            with self.lock:
+                ids = self.ids.get(key) # Another thread may have added it while this one waited
+                if ids is None:
+                    ids = self._add(key, chord)
+        return ids
+
+    # Add chord's voicings and their costs, then publish its ids. Called with the lock held
+    def _add(self, key, chord):
+        voicings = chord_voicings(chord, self.pitch_range)
+        if not voicings:
+            raise ValueError('no voicing of {} fits between {} and {}'.format(chord, *self.pitch_range))
+        ids = list(range(len(self.voicings), len(self.voicings) + len(voicings)))
+        self.voicings.extend(voicings)
+        for i, row in enumerate(self.cost):
+            row.extend([voicing_distance(self.voicings[i], voicing) + self.register_cost(voicing)
+                        for voicing in voicings])
+        for voicing in voicings:
+            self.cost.append([voicing_distance(voicing, other) + self.register_cost(other)
+                              for other in self.voicings])
+        self.ids[key] = ids
+        return ids
+
+voicingTables = {}
+
+def voicing_table(pitch_range=COMPING_RANGE):
+    table = voicingTables.get(pitch_range)
+    if table is None:
+        table = voicingTables.setdefault(pitch_range, VoicingTable(pitch_range))
+    return table
+
+#================================================================================
+# SEARCH
+#================================================================================
+'''
+Cheapest voicing ids for a run of chords. first fixes the voicing of the first chord,
+otherwise it only pays its register cost. Returns (cost of the path ending on each
+voicing of the last chord, those voicings, the path back from each of them)
+'''
+def _search(table, chord_ids, first=None):
+    cost = table.cost
+    previous = [first] if first is not None else chord_ids[0]
+    totals = [0.0 if first is not None else table.register_cost(table.voicings[i]) for i in previous]
+    back = []
+    for ids in chord_ids[1:]:
+        new_totals = []
+        pointers = []
+        for j in ids:
+            best = None
+            best_index = 0
+            for index, i in enumerate(previous):
+                total = totals[index] + cost[i][j]
+                if best is None or total < best:
+                    best = total
+                    best_index = index
+            new_totals.append(best)
+            pointers.append(best_index)
+        back.append(pointers)
+        totals = new_totals
+        previous = ids
+    return totals, previous, back
+
+def _path(chord_ids, back, last_index, first_ids):
+    path = []
+    index = last_index
+    for step in range(len(back) - 1, -1, -1):
+        path.append(chord_ids[step + 1][index])
+        index = back[step][index]
+    path.append(first_ids[index])
+    path.reverse()
+    return path
+
+'''
+Voicings (tuples of pitches, low to high) for chords that move the voices least over
+the whole run
+'''
+def voice_lead(chords, pitch_range=COMPING_RANGE):
+    if not chords:
+        return []
+    table = voicing_table(pitch_range)
+    chord_ids = [table.chord_ids(chord) for chord in chords]
+    totals, last_ids, back = _search(table, chord_ids)
+    best = min(range(len(totals)), key=lambda index: totals[index])
+    return [table.voicings[i] for i in _path(chord_ids, back, best, chord_ids[0])]
+
+cycleCache = {}
+cycleLock = threading.Lock() # Held while a form is worked out, so it is only done once
+
+'''
+Same as voice_lead() but the chords repeat: the move from the last chord back to the
+first counts too. Worked out once per form and range
+'''
+def voice_lead_cycle(chords, pitch_range=COMPING_RANGE):
+    key = (pitch_range, tuple(chords))
+    voicings = cycleCache.get(key)
+    if voicings is not None:
+        return voicings
+    with cycleLock:
+        voicings = cycleCache.get(key)
+        if voicings is None:
+            voicings = _voice_lead_cycle(chords, pitch_range)
+            cycleCache[key] = voicings
+    return voicings
+
+def _voice_lead_cycle(chords, pitch_range):
+    table = voicing_table(pitch_range)
+    chord_ids = [table.chord_ids(chord) for chord in chords]
+    best = None
+    for first in chord_ids[0]:
+        totals, last_ids, back = _search(table, chord_ids, first)
+        for index, last in enumerate(last_ids):
+            total = totals[index] + table.cost[last][first]
+            if best is None or total < best[0]:
+                best = (total, first, index, back)
+    total, first, index, back = best
+    return [table.voicings[i] for i in _path(chord_ids, back, index, [first])]
@@ -0,0 +1,216 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Corpus.py
+# Stores any number of solos in two files instead of one MIDI file per solo:
+#   <path>.gsc  the notes of every solo, one after the other (data file)
+#   <path>.gsi  one fixed size record per solo: where its notes are, plus its seed, tune,
+#               number of choruses, BPM and rest mode (index file)
+# Both are only ever appended to. Solo k's record is at a fixed place in the index, so
+# reading it never touches the other solos, and with NumPy its pitches and durations
+# are views straight into the memory mapped data file:
+#   writer = CorpusWriter('solos')
+#   writer.append_notes(SoloGenerator(3, seed=7).solo(), seed=7, num_choruses=3, bpm=286.0)
+#   writer.close()
+#   corpus = Corpus('solos')
+#   pitches, ticks = corpus.arrays(k)  # REST is REST_PITCH, durations in ticks
+#   corpus.entry(k).seed
+#
+# Notes are written before their index record, so a writer that dies part way through
+# leaves at most a tail that the next CorpusWriter cuts off
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import os
+import struct
+from array import array
+from collections import namedtuple
+from NoteSequence import *
+
+try:
+    import mmap
+except ImportError: # Jython, the files are read into memory instead
+    mmap = None
+
+DATA_EXTENSION = '.gsc'
+INDEX_EXTENSION = '.gsi'
+DATA_MAGIC = b'GSCD'
+INDEX_MAGIC = b'GSCI'
+FORMAT_VERSION = 1
+DEFAULT_TUNE = 'Giant Steps'
+
+FILE_HEADER = struct.Struct('<4sH10x') # magic, version. 16 bytes so the notes start aligned
+# offset of the notes in the data file, seed, number of notes, BPM, choruses, rest mode,
+# accompaniment, tune (UTF-8, padded with zeros)
+RECORD = struct.Struct('<QQIfHBB32s4x')
+TUNE_BYTES = 32
+ALIGNMENT = 8 # Each solo's notes start on a multiple of this
+
+CorpusEntry = namedtuple('CorpusEntry', 'index offset num_notes seed tune num_choruses bpm use_rests accompaniment')
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+# Bytes taken in the data file by a solo of num_notes: int32 ticks, then int8 pitches
+def _solo_size(num_notes):
+    size = num_notes * 5
+    return size + _padding(size)
+
+def _check_header(data, magic, path):
+    found, version = FILE_HEADER.unpack_from(data, 0)
+    if found != magic or version != FORMAT_VERSION:
+        raise ValueError('{} is not a corpus file (version {})'.format(path, FORMAT_VERSION))
+
+def _read_file(path):
+    f = open(path, 'rb')
+    try:
+        if mmap is not None:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+    finally:
+        f.close()
+
+def _unpack_entry(index, data, position):
+    offset, seed, num_notes, bpm, num_choruses, use_rests, accompaniment, tune = RECORD.unpack_from(data, position)
+    # 'ignore' drops a character cut in half by an older writer rather than failing the whole entry
+    return CorpusEntry(index, offset, num_notes, seed, tune.rstrip(b'\0').decode('utf-8', 'ignore'), num_choruses, bpm,
+                       bool(use_rests), bool(accompaniment))
+
+#================================================================================
+# WRITING
+#================================================================================
+class CorpusWriter(object):
+    def __init__(self, path):
+        self.data_path = path + DATA_EXTENSION
+        self.index_path = path + INDEX_EXTENSION
+        if not os.path.exists(self.index_path):
+            for file_path, magic in ((self.data_path, DATA_MAGIC), (self.index_path, INDEX_MAGIC)):
+                f = open(file_path, 'wb')
+                try:
+                    f.write(FILE_HEADER.pack(magic, FORMAT_VERSION))
+                finally:
+                    f.close()
+        self._recover()
+        self.data = open(self.data_path, 'ab')
+        self.index = open(self.index_path, 'ab')
+
+    '''
+    Cut off anything left behind by a writer that stopped part way: a partial index
+    record, records whose notes never made it to disk, and notes without a record
+    '''
+    def _recover(self):
+        f = open(self.index_path, 'rb')
+        try:
+            index = f.read()
+        finally:
+            f.close()
+        _check_header(index, INDEX_MAGIC, self.index_path)
+        data_size = os.path.getsize(self.data_path)
+
+        count = (len(index) - FILE_HEADER.size) // RECORD.size
+        data_end = FILE_HEADER.size
+        while count > 0:
+            entry = _unpack_entry(count - 1, index, FILE_HEADER.size + (count - 1) * RECORD.size)
+            data_end = entry.offset + _solo_size(entry.num_notes)
+            if data_end <= data_size:
+                break
+            count -= 1
+            data_end = FILE_HEADER.size
+
+        self.count = count
+        self.data_size = data_end
+        for file_path, size in ((self.index_path, FILE_HEADER.size + count * RECORD.size),
+                                (self.data_path, data_end)):
+            if os.path.getsize(file_path) != size:
+                f = open(file_path, 'r+b')
+                try:
+                    f.truncate(size)
+                finally:
+                    f.close()
+
+    def __len__(self):
+        return self.count
+
+    '''
+    Add a solo from its stored pitches (REST as REST_PITCH) and durations in ticks, one of
+    each per note. Returns the solo's index in the corpus
+    '''
+    def append(self, pitches, ticks, seed=None, tune=DEFAULT_TUNE, num_choruses=0, bpm=0.0,
+               use_rests=True, accompaniment=False):
+        pitches = array('b', pitches)
+        ticks = array('i', ticks)
+        if len(pitches) != len(ticks):
+            raise ValueError('{} pitches but {} durations'.format(len(pitches), len(ticks)))
+        # Cut to TUNE_BYTES on a character boundary, so the name still decodes
+        tune = tune.encode('utf-8')[:TUNE_BYTES].decode('utf-8', 'ignore').encode('utf-8')
+
+        offset = self.data_size
+        self.data.write(little_endian_bytes(ticks))
+        self.data.write(little_endian_bytes(pitches))
+        self.data.write(b'\0' * _padding(len(pitches) * 5))
+        self.data_size += _solo_size(len(pitches))
+        self.index.write(RECORD.pack(offset, seed or 0, len(pitches), bpm, num_choruses, use_rests,
+                                     accompaniment, tune))
+        self.count += 1
+        return self.count - 1
+
+    def append_notes(self, notes, **metadata):
+        return self.append(notes.pitches, notes.ticks(), **metadata)
+
+    def flush(self):
+        self.data.flush() # Notes first, so a record never points past the end of the data
+        self.index.flush()
+
+    def close(self):
+        self.flush()
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+#================================================================================
+# READING
+#================================================================================
+class Corpus(object):
+    def __init__(self, path):
+        self.path = path
+        self.refresh()
+
+    # Map the files again to see solos appended since the corpus was opened
+    def refresh(self):
+        self.data = _read_file(self.path + DATA_EXTENSION)
+        self.index = _read_file(self.path + INDEX_EXTENSION)
+        _check_header(self.data, DATA_MAGIC, self.path + DATA_EXTENSION)
+        _check_header(self.index, INDEX_MAGIC, self.path + INDEX_EXTENSION)
+        self.count = (len(self.index) - FILE_HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, k):
+        if k < 0:
+            k += self.count
+        if k < 0 or k >= self.count:
+            raise IndexError('solo index out of range')
+        return _unpack_entry(k, self.index, FILE_HEADER.size + k * RECORD.size)
+
+    '''
+    (pitches, ticks) of solo k. With NumPy these are read only views into the data file,
+    so nothing is copied; otherwise they are arrays
+    '''
+    def arrays(self, k):
+        entry = self.entry(k)
+        ticks = read_array(self.data, entry.offset, 'i', entry.num_notes)
+        pitches = read_array(self.data, entry.offset + 4 * entry.num_notes, 'b', entry.num_notes)
+        return pitches, ticks
+
+    def notes(self, k):
+        return NoteSequence.from_ticks(*self.arrays(k))
+
+    def __getitem__(self, k):
+        return self.notes(k)
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield self.entry(k)
@@ -0,0 +1,166 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# DownbeatModel.py
+# A Markov model that picks the downbeat scale degree and line direction of each chord,
+# instead of repeating DEFAULT_DOWN_BEAT_SCALE_DEGREES / DEFAULT_LINE_DIRECTIONS every chorus.
+#
+# The state is (chord quality, previous degree, previous direction) and the outcome is
+# (degree, direction). The model is fitted by counting transitions in transcriptions, and
+# every state's distribution is turned into an alias table (Walker/Vose), so drawing the
+# next outcome costs the same however many outcomes a state has:
+#   model = coltrane_model()
+#   degrees, directions = model.sample(generate_chorus_changes(), random.Random(1))
+# States that never occur in the data back off to the chord quality alone, then to
+# everything that was seen
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import json
+from SoloEngine import *
+
+START = (None, None) # "Previous" degree and direction of the first chord
+
+QUALITY_NAMES = {
+    tuple(MAJOR_SEVENTH): 'maj7',
+    tuple(MINOR_SEVENTH): 'm7',
+    tuple(DOMINANT_SEVENTH): '7',
+}
+
+def quality_name(chord):
+    return QUALITY_NAMES.get(tuple(chord.quality), str(tuple(chord.quality)))
+
+#================================================================================
+# AliasTable draws one of its outcomes with the given weights in constant time
+#   table = AliasTable([(1, 0), (5, 1)], [3, 1])
+#   table.sample(rng)      # (1, 0) three times out of four
+#================================================================================
+class AliasTable(object):
+    __slots__ = ('outcomes', 'probability', 'alias')
+
+    def __init__(self, outcomes, weights):
+        n = len(outcomes)
+        total = float(sum(weights))
+        scaled = [weight * n / total for weight in weights]
+        self.outcomes = list(outcomes)
+        self.probability = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # Whatever is left is 1.0 up to rounding error
+
+    def sample(self, rng):
+        # One draw picks the column and, from its fractional part, the coin flip
+        position = rng.random() * len(self.outcomes)
+        column = int(position)
+        if position - column < self.probability[column]:
+            return self.outcomes[column]
+        return self.outcomes[self.alias[column]]
+
+    def weights(self):
+        n = float(len(self.outcomes))
+        result = dict((outcome, 0.0) for outcome in self.outcomes)
+        for column, outcome in enumerate(self.outcomes):
+            result[outcome] += self.probability[column] / n
+            result[self.outcomes[self.alias[column]]] += (1.0 - self.probability[column]) / n
+        return result
+
+#================================================================================
+# DownbeatModel
+#================================================================================
+class DownbeatModel(object):
+    def __init__(self, counts):
+        # counts: {(quality, previous degree, previous direction): {(degree, direction): count}}
+        self.counts = counts
+        self.tables = {}
+        quality_counts = {}
+        all_counts = {}
+        for state, outcomes in counts.items():
+            for outcome, count in outcomes.items():
+                by_quality = quality_counts.setdefault(state[0], {})
+                by_quality[outcome] = by_quality.get(outcome, 0) + count
+                all_counts[outcome] = all_counts.get(outcome, 0) + count
+            self.tables[state] = self._table(outcomes)
+        self.quality_tables = dict((quality, self._table(outcomes)) for quality, outcomes in quality_counts.items())
+        self.fallback_table = self._table(all_counts)
+
+    def _table(self, outcomes):
+        ordered = sorted(outcomes.items()) # Sorted so a given model always samples the same way
+        return AliasTable([outcome for outcome, count in ordered], [count for outcome, count in ordered])
+
+    '''
+    Fit from transcriptions. Each example is (chords, degrees, directions) for one chorus
+    (or any run of chords), as in generate_chorus_changes() and the DEFAULT_ tables.
+    Consecutive examples are treated as one continuous solo when continuous is True
+    '''
+    @classmethod
+    def fit(cls, examples, continuous=True):
+        counts = {}
+        previous = START
+        for chords, degrees, directions in examples:
+            if not continuous:
+                previous = START
+            for chord, degree, direction in zip(chords, degrees, directions):
+                state = (quality_name(chord),) + previous
+                outcomes = counts.setdefault(state, {})
+                outcomes[(degree, direction)] = outcomes.get((degree, direction), 0) + 1
+                previous = (degree, direction)
+        return cls(counts)
+
+    def table_for(self, quality, previous):
+        table = self.tables.get((quality,) + tuple(previous))
+        if table is None:
+            table = self.quality_tables.get(quality, self.fallback_table)
+        return table
+
+    def next(self, chord, previous, rng):
+        return self.table_for(quality_name(chord), previous).sample(rng)
+
+    '''
+    Degrees and directions for a run of chords. Pass the last (degree, direction) of the
+    previous chorus as previous to carry on from it. Returns (degrees, directions)
+    '''
+    def sample(self, chords, rng, previous=START):
+        degrees = []
+        directions = []
+        for chord in chords:
+            previous = self.next(chord, previous, rng)
+            degrees.append(previous[0])
+            directions.append(previous[1])
+        return degrees, directions
+
+    def save(self, path):
+        data = [[list(state), [[list(outcome), count] for outcome, count in sorted(outcomes.items())]]
+                for state, outcomes in sorted(self.counts.items(), key=lambda item: repr(item[0]))]
+        f = open(path, 'w')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+
+    @classmethod
+    def load(cls, path):
+        f = open(path)
+        try:
+            data = json.load(f)
+        finally:
+            f.close()
+        counts = {}
+        for state, outcomes in data:
+            counts[tuple(state)] = dict((tuple(outcome), count) for outcome, count in outcomes)
+        return cls(counts)
+
+'''
+The model fitted on the transcription we have: Coltrane's first chorus over the
+Giant Steps changes, played twice so the turnaround back to the top is counted too
+'''
+def coltrane_model():
+    chorus = (generate_chorus_changes(), DEFAULT_DOWN_BEAT_SCALE_DEGREES, DEFAULT_LINE_DIRECTIONS)
+    return DownbeatModel.fit([chorus, chorus])
@@ -0,0 +1,87 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# GenerationCache.py
+# Keeps recently generated solos so that clicking Generate again with only display or
+# playback options changed (piano roll, score, accompaniment, BPM) doesn't generate the
+# same notes again:
+#   cache = GenerationCache(max_bytes=8 * 1024 * 1024)
+#   solo, comping = cache.generate(SoloGenerator(9, use_rests=True))  # solo already tied
+#
+# Results are keyed by SoloGenerator.cache_key(), which holds only what decides the
+# notes: the tune, number of choruses, rest mode, downbeat model and seed, voice leading,
+# target lines, rhythm and repeat avoidance. The least recently used results are dropped
+# once there are more than max_entries of them or they take more than max_bytes (their
+# arrays' nbytes()).
+# Solos from a model with no seed are different every time, so they are never cached.
+# Cached NoteSequences are shared, treat them as read only
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from collections import OrderedDict
+from SoloEngine import *
+
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+class GenerationCache(object):
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (value, nbytes), least recently used first
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    # Cached value for key, or None. Counts as a use
+    def get(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries[key] = entry # Back in as the most recently used
+        self.hits += 1
+        return entry[0]
+
+    '''
+    Keep value under key, taking nbytes. Something bigger than max_bytes on its own is
+    not kept at all
+    '''
+    def put(self, key, value, nbytes):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        if nbytes > self.max_bytes:
+            return
+        self.entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while len(self.entries) > self.max_entries or self.nbytes > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self.nbytes -= self.entries.pop(oldest)[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    '''
+    (solo, comping) of generator like generator.generate(), with the solo tied as
+    onGenerate() plays it. Generated only if this cache doesn't have it already
+    '''
+    def generate(self, generator):
+        key = generator.cache_key()
+        if key is not None:
+            cached = self.get(key)
+            if cached is not None:
+                if generator.profiler is not None:
+                    generator.profiler.count('generation_cache_hits')
+                return cached
+
+        solo, comping = generator.generate()
+        with profile_stage(generator.profiler, 'tie_pitches', len(solo)):
+            solo = solo.tied()
+        result = (solo, comping)
+        if key is not None:
+            self.put(key, result, solo.nbytes() + comping.nbytes())
+        return result
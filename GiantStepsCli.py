@@ -0,0 +1,122 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# GiantStepsCli.py
+# Command line entry point. Generates a solo with the same options as the GUI and writes
+# it as a MIDI file, or renders it to a WAV file, without opening a window:
+#   python GiantStepsCli.py --choruses 9 --bpm 286 --output solo.mid
+#   python GiantStepsCli.py --choruses 9 --output solo.wav                        # audio (AudioRenderer.py)
+#   python GiantStepsCli.py --no-rests --no-accompaniment --model --seed 7 -o -   # MIDI to stdout
+#   python GiantStepsCli.py --tune blues.txt --choruses 3                         # a lead sheet (LeadSheet.py)
+#   python GiantStepsCli.py --gui
+#
+# Only the generator and the MIDI writer are imported up front. The GUI (GiantStepsv1.py,
+# which builds the Display, the sax picture and every widget as it is imported), the
+# Markov model, the lead sheet reader and the audio renderer are imported only when an
+# option needs them.
+# NumPy isn't imported for a solo this short either (see import_numpy() in NoteSequence.py).
+# --timing prints how long it took from importing this module to the output being
+# written; benchmarks/run_benchmarks.py keeps that under its threshold (cli/first_output)
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from timeit import default_timer as timer
+startTime = timer()
+
+import argparse
+import sys
+from SoloEngine import *
+from MidiWriter import midi_bytes, MIN_BPM, MAX_BPM
+
+DEFAULT_BPM = 286.0 # Same defaults as the GUI
+DEFAULT_CHORUSES = 3
+DEFAULT_OUTPUT = 'giant_steps.mid'
+WAV_EXTENSION = '.wav'
+DEFAULT_SAMPLE_RATE = 22050 # Same as AudioRenderer's, which is only imported for WAV output
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError('must be at least 1: {}'.format(text))
+    return value
+
+# A tempo a MIDI file can hold
+def tempo(text):
+    value = float(text)
+    if not MIN_BPM <= value <= MAX_BPM:
+        raise argparse.ArgumentTypeError('must be from {:.2f} to {:.0f}: {}'.format(MIN_BPM, MAX_BPM, text))
+    return value
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Generate a Giant Steps solo as a MIDI file')
+    parser.add_argument('-c', '--choruses', type=positive_int, default=DEFAULT_CHORUSES,
+                        help='number of choruses (default {})'.format(DEFAULT_CHORUSES))
+    parser.add_argument('-b', '--bpm', type=tempo, default=DEFAULT_BPM,
+                        help='tempo (default {})'.format(DEFAULT_BPM))
+    parser.add_argument('--no-rests', dest='use_rests', action='store_false', help="don't use rests")
+    parser.add_argument('--no-accompaniment', dest='accompaniment', action='store_false',
+                        help='leave the piano track empty')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help='MIDI file to write, - for stdout, or a .wav file to render audio to '
+                             '(default {})'.format(DEFAULT_OUTPUT))
+    parser.add_argument('--sample-rate', type=positive_int, default=DEFAULT_SAMPLE_RATE,
+                        help='sample rate of WAV output (default {})'.format(DEFAULT_SAMPLE_RATE))
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help='seed for --model, the same seed gives the same solo')
+    parser.add_argument('--model', action='store_true',
+                        help="pick downbeats with the Markov model fitted on Coltrane's chorus")
+    parser.add_argument('--tune', help='lead sheet file to play over instead of Giant Steps (see LeadSheet.py)')
+    parser.add_argument('--voice-leading', action='store_true', help='voice-lead the piano')
+    parser.add_argument('--target-lines', action='store_true', help='lead lines into the next chord')
+    parser.add_argument('--avoid-repeats', action='store_true', help='swap lines that would repeat a recent lick')
+    parser.add_argument('--rhythm', choices=sorted(RHYTHM_TEMPLATES),
+                        help='rhythm template for the lines (see Rhythm.py), default eighth notes')
+    parser.add_argument('--timing', action='store_true', help='print the time from import to output on stderr')
+    parser.add_argument('--gui', action='store_true', help='open the GUI instead')
+    return parser
+
+# The SoloGenerator for parsed arguments
+def make_generator(args):
+    options = {'seed': args.seed, 'voice_leading': args.voice_leading, 'target_lines': args.target_lines,
+               'rhythm': args.rhythm, 'avoid_repeats': args.avoid_repeats}
+    if args.model:
+        from DownbeatModel import coltrane_model
+        options['model'] = coltrane_model()
+    if args.tune:
+        from LeadSheet import read_lead_sheet
+        return read_lead_sheet(args.tune).generator(args.choruses, use_rests=args.use_rests, **options)
+    return SoloGenerator(args.choruses, args.use_rests, **options)
+
+# (solo, comping) for parsed arguments, tied like onGenerate does. comping is None without accompaniment
+def generate(args):
+    generator = make_generator(args)
+    solo = generator.solo().tied()
+    comping = generator.comping() if args.accompaniment else None
+    return solo, comping
+
+def write_output(data, path):
+    if path == '-':
+        stream = getattr(sys.stdout, 'buffer', sys.stdout) # Python 3 needs the binary stream
+        stream.write(data)
+        stream.flush()
+        return
+    f = open(path, 'wb')
+    try:
+        f.write(data)
+    finally:
+        f.close()
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.gui:
+        import GiantStepsv1 # Builds and shows the window
+        return 0
+
+    solo, comping = generate(args)
+    if args.output.lower().endswith(WAV_EXTENSION):
+        from AudioRenderer import render_wav
+        render_wav(args.output, solo, comping, args.bpm, args.sample_rate)
+    else:
+        write_output(midi_bytes(solo, comping, args.bpm), args.output)
+    if args.timing:
+        sys.stderr.write('first output after {:.1f} ms\n'.format((timer() - startTime) * 1000))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
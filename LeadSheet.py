@@ -0,0 +1,324 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# LeadSheet.py
+# Tunes other than Giant Steps, written as text lead sheets and compiled into the arrays
+# the engine needs (chords, rhythms, scales and the downbeat tables).
+#
+# A lead sheet is bars of chord symbols between "|", with optional "name: value" headers
+# and comment lines starting with "#". Every chord in a bar gets an equal share of it,
+# unless it is given a length in beats after a ":"
+#   title: Giant Steps
+#   meter: 4
+#   | Bmaj7 D7 | Gmaj7 Bb7 | Ebmaj7 | Am7 D7 |
+#   | Ebmaj7:3 F#7:1 | ...
+# degrees and directions headers (one number per chord) pick the line for each chord
+# like DEFAULT_DOWN_BEAT_SCALE_DEGREES and DEFAULT_LINE_DIRECTIONS. Without them every
+# line starts on the root going up; pass a DownbeatModel to the generator for variety.
+#
+# Compiled tunes are cached on disk under the hash of the lead sheet text, in a small
+# binary file that is memory mapped when it is loaded again, so switching between
+# hundreds of tunes in a batch costs a file open each:
+#   tune = load_lead_sheet(GIANT_STEPS)
+#   generator = tune.generator(num_choruses=3, use_rests=True)
+#   solo, comping = generator.generate()
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import hashlib
+import os
+import re
+import struct
+from array import array
+from SoloEngine import *
+
+try:
+    import mmap
+except ImportError: # Jython, the cached file is read into memory instead
+    mmap = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'giantsteps', 'leadsheets')
+LEAD_SHEET_EXTENSION = '.txt'
+COMPILED_EXTENSION = '.gsl'
+DEFAULT_BEATS_PER_BAR = 4
+
+# Roots are placed between C4 and B4, where the Giant Steps changes (and the line table) live
+PITCH_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+ACCIDENTALS = {'': 0, '#': 1, 'b': -1}
+ROOT_OCTAVE = C4
+
+# Chord symbols for the qualities the engine has a scale for (see CHORD_SCALES)
+CHORD_SYMBOLS = {
+    'maj7': MAJOR_SEVENTH, 'M7': MAJOR_SEVENTH, '^7': MAJOR_SEVENTH,
+    'm7': MINOR_SEVENTH, 'min7': MINOR_SEVENTH, '-7': MINOR_SEVENTH,
+    '7': DOMINANT_SEVENTH,
+}
+
+CHORD_PATTERN = re.compile(r'^([A-G])(#|b)?(maj7|M7|\^7|min7|m7|-7|7)(?::(\d+(?:\.\d+)?))?$')
+
+GIANT_STEPS = '''
+title: Giant Steps
+# Coltrane's first chorus
+degrees: 1 1 1 2 1 5 3 3 3 1 7 7 4 5 5 5 4 5 2 1 1 1 6 1 6 3
+directions: 1 1 0 0 1 0 1 1 1 1 1 0 0 0 1 0 1 0 0 1 1 0 0 1 1 0
+| Bmaj7 D7   | Gmaj7 Bb7  | Ebmaj7 | Am7 D7   |
+| Gmaj7 Bb7  | Ebmaj7 F#7 | Bmaj7  | Fm7 Bb7  |
+| Ebmaj7     | Am7 D7     | Gmaj7  | C#m7 F#7 |
+| Bmaj7      | Fm7 Bb7    | Ebmaj7 | C#m7 F#7 |
+'''
+
+#================================================================================
+# PARSING
+#================================================================================
+class LeadSheetError(ValueError):
+    pass
+
+def _parse_numbers(value, line_number):
+    try:
+        return [int(number) for number in value.split()]
+    except ValueError:
+        raise LeadSheetError('line {}: expected whole numbers, got {!r}'.format(line_number, value))
+
+def _parse_chord(token, line_number):
+    match = CHORD_PATTERN.match(token)
+    if match is None:
+        raise LeadSheetError('line {}: unknown chord symbol {!r}'.format(line_number, token))
+    letter, accidental, symbol, beats = match.groups()
+    root = ROOT_OCTAVE + (PITCH_CLASSES[letter] + ACCIDENTALS[accidental or '']) % OCTAVE
+    if beats is not None:
+        beats = float(beats)
+    return root, CHORD_SYMBOLS[symbol], beats
+
+'''
+Split a bar of chords into ticks. Chords without a length share what the others leave,
+and every chord must come out a whole number of eighth notes
+'''
+def _bar_ticks(bar, beats_per_bar, line_number):
+    bar_ticks = beats_to_ticks(beats_per_bar)
+    given = sum(beats_to_ticks(beats) for root, quality, beats in bar if beats is not None)
+    unsized = len([beats for root, quality, beats in bar if beats is None])
+    if unsized == 0:
+        if given != bar_ticks:
+            raise LeadSheetError('line {}: chords add up to {} beats in a bar of {}'.format(
+                line_number, ticks_to_beats(given), beats_per_bar))
+        share = 0
+    else:
+        share, left_over = divmod(bar_ticks - given, unsized)
+        if share <= 0 or left_over != 0:
+            raise LeadSheetError('line {}: cannot share {} beats between {} chords'.format(
+                line_number, ticks_to_beats(bar_ticks - given), unsized))
+    chords = [(root, quality, beats_to_ticks(beats) if beats is not None else share)
+              for root, quality, beats in bar]
+    # The solo plays a line of eighth notes over every chord
+    for root, quality, chord_ticks in chords:
+        if chord_ticks <= 0 or chord_ticks % EIGHTH_TICKS != 0:
+            raise LeadSheetError('line {}: a chord of {} beats is not a whole number of eighth notes'.format(
+                line_number, ticks_to_beats(chord_ticks)))
+    return chords
+
+'''
+Parse lead sheet text. Returns a dict with title, chords ([(root, quality, ticks)]),
+degrees and directions
+'''
+def parse_lead_sheet(text):
+    title = ''
+    beats_per_bar = DEFAULT_BEATS_PER_BAR
+    degrees = None
+    directions = None
+    chords = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if line.startswith('#') or not line: # Whole line comments only, # is also a sharp
+            continue
+
+        header = re.match(r'^([a-z]+)\s*:\s*(.*)$', line)
+        if header is not None:
+            name, value = header.groups()
+            if name == 'title':
+                title = value.strip()
+            elif name == 'meter':
+                numbers = _parse_numbers(value, line_number)
+                if len(numbers) != 1 or numbers[0] <= 0:
+                    raise LeadSheetError('line {}: meter needs one number of beats per bar, got {!r}'.format(
+                        line_number, value))
+                beats_per_bar = numbers[0]
+            elif name == 'degrees':
+                degrees = _parse_numbers(value, line_number)
+            elif name == 'directions':
+                directions = _parse_numbers(value, line_number)
+            else:
+                raise LeadSheetError('line {}: unknown header {!r}'.format(line_number, name))
+            continue
+
+        for bar in line.split('|'):
+            tokens = bar.split()
+            if tokens:
+                bar_chords = [_parse_chord(token, line_number) for token in tokens]
+                chords.extend(_bar_ticks(bar_chords, beats_per_bar, line_number))
+
+    if not chords:
+        raise LeadSheetError('lead sheet has no chords')
+    if degrees is None:
+        degrees = [1] * len(chords)
+    if directions is None:
+        directions = [1] * len(chords)
+    for name, table in (('degrees', degrees), ('directions', directions)):
+        if len(table) != len(chords):
+            raise LeadSheetError('{} has {} entries for {} chords'.format(name, len(table), len(chords)))
+    if any(degree < 0 or degree > 7 for degree in degrees):
+        raise LeadSheetError('degrees must be between 0 (rest) and 7')
+    if any(direction not in (0, 1) for direction in directions):
+        raise LeadSheetError('directions must be 0 (down) or 1 (up)')
+    return {'title': title, 'chords': chords, 'degrees': degrees, 'directions': directions}
+
+#================================================================================
+# COMPILED FORM
+# Little endian, laid out so every array can be viewed straight out of the mapped file:
+#   header      magic, version, number of chords, title length (16 bytes)
+#   ticks       int32 per chord
+#   roots       int8 per chord
+#   qualities   int8 x QUALITY_WIDTH per chord, padded with -1
+#   scales      int8 x SCALE_WIDTH per chord, padded with -1 (all -1 for no scale)
+#   degrees     int8 per chord
+#   directions  int8 per chord
+#   title       UTF-8
+#================================================================================
+MAGIC = b'GSLS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHxxII')
+QUALITY_WIDTH = 4
+SCALE_WIDTH = 7
+PAD = -1
+
+def _padded(values, width):
+    values = list(values or ())
+    return values + [PAD] * (width - len(values))
+
+def compile_lead_sheet(text):
+    sheet = parse_lead_sheet(text)
+    chords = sheet['chords']
+    ticks = array('i', [chord_ticks for root, quality, chord_ticks in chords])
+    roots = array('b', [root for root, quality, chord_ticks in chords])
+    qualities = array('b')
+    scales = array('b')
+    for root, quality, chord_ticks in chords:
+        qualities.extend(_padded(quality, QUALITY_WIDTH))
+        scales.extend(_padded(CHORD_SCALES.get(tuple(quality)), SCALE_WIDTH))
+    title = sheet['title'].encode('utf-8')
+    return b''.join([HEADER.pack(MAGIC, FORMAT_VERSION, len(chords), len(title)),
+                     little_endian_bytes(ticks), little_endian_bytes(roots),
+                     little_endian_bytes(qualities), little_endian_bytes(scales),
+                     little_endian_bytes(array('b', sheet['degrees'])),
+                     little_endian_bytes(array('b', sheet['directions'])), title])
+
+#================================================================================
+# CompiledTune reads a compiled lead sheet from a buffer (bytes or a mapped file).
+# The arrays are views into the buffer when NumPy is there
+#================================================================================
+class CompiledTune(object):
+    def __init__(self, buffer):
+        magic, version, count, title_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise LeadSheetError('not a compiled lead sheet (version {})'.format(FORMAT_VERSION))
+        self.buffer = buffer
+        offset = HEADER.size
+        self.ticks = read_array(buffer, offset, 'i', count)
+        offset += 4 * count
+        self.roots = read_array(buffer, offset, 'b', count)
+        offset += count
+        self.qualities = read_array(buffer, offset, 'b', count * QUALITY_WIDTH)
+        offset += count * QUALITY_WIDTH
+        self.scale_table = read_array(buffer, offset, 'b', count * SCALE_WIDTH)
+        offset += count * SCALE_WIDTH
+        self.degrees = read_array(buffer, offset, 'b', count)
+        offset += count
+        self.directions = read_array(buffer, offset, 'b', count)
+        offset += count
+        self.title = bytes(buffer[offset:offset + title_length]).decode('utf-8')
+
+    def __len__(self):
+        return len(self.roots)
+
+    def _row(self, values, width, i):
+        return [int(value) for value in values[i * width:(i + 1) * width] if value != PAD]
+
+    def chords(self):
+        return [form_chord(int(self.roots[i]), self._row(self.qualities, QUALITY_WIDTH, i))
+                for i in range(len(self))]
+
+    # Chord lengths in beats, like generate_chorus_chord_rhythms()
+    def rhythms(self):
+        return [ticks_to_beats(int(ticks)) for ticks in self.ticks]
+
+    def scales(self):
+        return [self._row(self.scale_table, SCALE_WIDTH, i) or None for i in range(len(self))]
+
+    '''
+    Same as generate_form() for this tune: (chords, rhythms, degrees, directions) as
+    fresh lists for num_choruses choruses
+    '''
+    def form(self, num_choruses=1):
+        return (self.chords() * num_choruses, self.rhythms() * num_choruses,
+                [int(degree) for degree in self.degrees] * num_choruses,
+                [int(direction) for direction in self.directions] * num_choruses)
+
+    # A SoloGenerator over this tune. options are passed on (use_rests, seed, model, ...)
+    def generator(self, num_choruses=1, **options):
+        chords, rhythms, degrees, directions = self.form()
+        return SoloGenerator(num_choruses, chords=chords, rhythms=rhythms, degrees=degrees,
+                             directions=directions, **options)
+
+#================================================================================
+# CACHE
+#================================================================================
+def lead_sheet_hash(text):
+    digest = hashlib.sha256('{}:'.format(FORMAT_VERSION).encode('ascii'))
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+def _map_file(path):
+    f = open(path, 'rb')
+    try:
+        if mmap is not None and os.path.getsize(path) > 0:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+    finally:
+        f.close()
+
+'''
+Compile lead sheet text, or load it from cache_dir if it has been compiled before.
+cache_dir=None compiles in memory without touching the disk
+'''
+def load_lead_sheet(text, cache_dir=DEFAULT_CACHE_DIR):
+    if cache_dir is None:
+        return CompiledTune(compile_lead_sheet(text))
+
+    path = os.path.join(cache_dir, lead_sheet_hash(text) + COMPILED_EXTENSION)
+    if not os.path.exists(path):
+        data = compile_lead_sheet(text)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Written to a temporary name first so a half written file is never loaded
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        f = open(temporary, 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+        os.rename(temporary, path)
+    return CompiledTune(_map_file(path))
+
+def read_lead_sheet(path, cache_dir=DEFAULT_CACHE_DIR):
+    f = open(path, 'rb')
+    try:
+        text = f.read().decode('utf-8')
+    finally:
+        f.close()
+    return load_lead_sheet(text, cache_dir)
+
+'''
+Every lead sheet in directory, as {file name without extension: CompiledTune}
+'''
+def load_tune_library(directory, cache_dir=DEFAULT_CACHE_DIR):
+    tunes = {}
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        if extension == LEAD_SHEET_EXTENSION:
+            tunes[stem] = read_lead_sheet(os.path.join(directory, name), cache_dir)
+    return tunes
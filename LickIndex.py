@@ -0,0 +1,128 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# LickIndex.py
+# Remembers the licks a solo has played, so a line that would play one again can be
+# swapped for another. A lick is LICK_LENGTH intervals in a row between played notes
+# (a rest ends it), so the same shape counts as a repeat in any key:
+#   licks = LickIndex()
+#   licks.extend(line)             # play a line, returns how many of its licks were repeats
+#   licks.count_repeats(candidate) # same, without playing it
+#   licks.stats()                  # {'licks': ..., 'repeats': ..., 'repeat_ratio': ...}
+#   SoloGenerator(9, avoid_repeats=True).solo()
+#
+# Each lick is kept as a rolling hash of its intervals: moving on by one note takes the
+# oldest interval out of the hash and puts the new one in, so playing or checking a note
+# costs the same however long the lick is. The index maps hashes to where they were last
+# played, and only licks from the last `recent` notes count (older ones are forgotten as
+# the solo goes on), so memory and time per note stay the same for any number of
+# choruses. Hashes are taken modulo a 61-bit prime; two different licks sharing one is
+# rare enough to ignore
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from collections import deque
+
+LICK_LENGTH = 4    # Intervals in a lick, so 5 notes
+RECENT_NOTES = 128 # How far back a lick counts as played. A chorus of Giant Steps in eighth notes
+HASH_BASE = 1000003
+HASH_MODULUS = (1 << 61) - 1
+INTERVAL_OFFSET = 256 # Keeps every interval positive in the hash
+
+class LickIndex(object):
+    def __init__(self, length=LICK_LENGTH, recent=RECENT_NOTES):
+        if length < 1:
+            raise ValueError('a lick needs at least 1 interval, not {}'.format(length))
+        self.length = length
+        self.recent = recent
+        self.power = pow(HASH_BASE, length - 1, HASH_MODULUS) # What the oldest interval adds to the hash
+        self.seen = {}           # Hash -> position of the last note of its latest lick
+        self.played = deque()    # (position, hash) of every lick in seen, oldest first
+        self.intervals = deque() # Intervals in the current hash, oldest first
+        self.hash = 0
+        self.last = None         # Last pitch played, None after a rest
+        self.position = 0        # Notes played
+        self.licks = 0
+        self.repeats = 0
+
+    def __len__(self):
+        return len(self.seen)
+
+    '''
+    The current lick moved on to pitch: returns (hash, last pitch) afterwards and changes
+    intervals in place. A rest starts again from nothing
+    '''
+    def _roll(self, hash_value, last, intervals, pitch):
+        if pitch < 0:
+            intervals.clear()
+            return 0, None
+        if last is None:
+            return hash_value, pitch
+        interval = pitch - last + INTERVAL_OFFSET
+        if len(intervals) == self.length:
+            hash_value -= intervals.popleft() * self.power
+        intervals.append(interval)
+        return (hash_value * HASH_BASE + interval) % HASH_MODULUS, pitch
+
+    # Whether the lick hashed to hash_value was played in the last recent notes before position
+    def _is_recent(self, hash_value, position):
+        played_at = self.seen.get(hash_value)
+        return played_at is not None and position - played_at <= self.recent
+
+    '''
+    Play pitch (negative for a rest). Returns True if the lick it ends was played within
+    the last recent notes
+    '''
+    def push(self, pitch):
+        self.hash, self.last = self._roll(self.hash, self.last, self.intervals, pitch)
+        self.position += 1
+        if len(self.intervals) < self.length:
+            return False
+
+        # Forget licks that are no longer recent, unless they were played again since
+        played = self.played
+        while played and self.position - played[0][0] > self.recent:
+            position, old_hash = played.popleft()
+            if self.seen.get(old_hash) == position:
+                del self.seen[old_hash]
+
+        repeat = self._is_recent(self.hash, self.position)
+        self.seen[self.hash] = self.position
+        played.append((self.position, self.hash))
+        self.licks += 1
+        if repeat:
+            self.repeats += 1
+        return repeat
+
+    # Play every note of line. Returns how many of the licks they end were repeats
+    def extend(self, line):
+        repeats = 0
+        for pitch in line:
+            if self.push(pitch):
+                repeats += 1
+        return repeats
+
+    '''
+    How many licks playing line next would repeat, without playing it. Licks the line
+    repeats from itself don't count
+    '''
+    def count_repeats(self, line):
+        hash_value, last, intervals = self.hash, self.last, deque(self.intervals)
+        position = self.position
+        repeats = 0
+        for pitch in line:
+            hash_value, last = self._roll(hash_value, last, intervals, pitch)
+            position += 1
+            if len(intervals) == self.length and self._is_recent(hash_value, position):
+                repeats += 1
+        return repeats
+
+    def stats(self):
+        return {'licks': self.licks, 'repeats': self.repeats,
+                'repeat_ratio': self.repeats / float(self.licks) if self.licks else 0.0,
+                'recent_licks': len(self.seen)}
+
+'''
+Repetition stats (see LickIndex.stats()) of a finished solo: any sequence of pitches,
+such as NoteSequence.pitches
+'''
+def repetition_stats(pitches, length=LICK_LENGTH, recent=RECENT_NOTES):
+    licks = LickIndex(length, recent)
+    licks.extend(pitches)
+    return licks.stats()
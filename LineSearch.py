@@ -0,0 +1,189 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# LineSearch.py
+# Lines that lead somewhere. create_line() plays a fixed arpeggio or lick for each
+# starting degree and never looks at where the next chord's downbeat is. search_line()
+# finds the best line of num_notes from the downbeat of this chord that ends a half or
+# whole step from the downbeat of the next one, so the line resolves into it:
+#   line = search_line(start=B4, end=FS5, chord=form_chord(B4, MAJOR_SEVENTH), num_notes=4)
+#   SoloGenerator(3, target_lines=True).solo()
+#
+# The search is a dynamic program over the pitches in range, note by note. What a note
+# costs depends on what it is over the chord (chord tone, scale tone or chromatic) and
+# whether it falls on the beat; what a move costs depends on the interval, the direction
+# of the line, whether it turns the line around, and whether it resolves a chromatic
+# note by half step. Both are worked out
+# once per chord type and kept in tables, and every line found is kept too, so a form
+# that repeats only searches each line once
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from SoloEngine import *
+
+# Pitches a line can use. A little wider than create_line()'s range, so a line can end a
+# step outside it on its way to a target at the edge
+SEARCH_LOW = LOWEST_NOTE - 2
+SEARCH_HIGH = HIGHEST_NOTE + 2
+
+#---COSTS-----------------------------
+CHORD_TONE = 0
+SCALE_TONE = 1
+CHROMATIC = 2
+
+# [on the beat, off the beat] cost of each kind of note
+TONE_COSTS = {
+    CHORD_TONE: (0, 0),
+    SCALE_TONE: (2, 0),
+    CHROMATIC: (5, 2),
+}
+
+# Cost of a move by 0 (repeated note) up to 12 semitones. Further is not allowed
+INTERVAL_COSTS = [6, 0, 0, 1, 1, 2, 4, 3, 4, 4, 5, 5, 6]
+MAX_INTERVAL = len(INTERVAL_COSTS) - 1
+WRONG_DIRECTION_COST = 1 # A move against the direction of the line
+REVERSAL_COST = 2        # A move that turns the line around
+UNRESOLVED_COST = 4      # A chromatic note not followed by a half step
+MISSED_TARGET_COST = 100 # The last note isn't a step from the target (only when nothing else is possible)
+
+def note_kind(pitch_class, quality, scale):
+    if pitch_class in quality:
+        return CHORD_TONE
+    if scale is not None and pitch_class in scale:
+        return SCALE_TONE
+    return CHROMATIC
+
+#================================================================================
+# COST TABLES
+# Keyed by chord type (quality and scale) and direction, never by root: pitches are
+# looked up by pitch class relative to the root
+#================================================================================
+toneCostTables = {}
+moveCostTables = {}
+
+# [on the beat][pitch class above the root] cost of playing that note
+def tone_costs(quality, scale):
+    key = (tuple(quality), tuple(scale or ()))
+    table = toneCostTables.get(key)
+    if table is None:
+        kinds = [note_kind(pitch_class, quality, scale) for pitch_class in range(OCTAVE)]
+        table = ([TONE_COSTS[kind][0] for kind in kinds], [TONE_COSTS[kind][1] for kind in kinds])
+        toneCostTables[key] = table
+    return table
+
+# [pitch class above the root][interval + MAX_INTERVAL] cost of moving from that note by interval
+def move_costs(quality, scale, direction):
+    key = (tuple(quality), tuple(scale or ()), direction)
+    table = moveCostTables.get(key)
+    if table is None:
+        table = []
+        for pitch_class in range(OCTAVE):
+            chromatic = note_kind(pitch_class, quality, scale) == CHROMATIC
+            row = []
+            for interval in range(-MAX_INTERVAL, MAX_INTERVAL + 1):
+                cost = INTERVAL_COSTS[abs(interval)]
+                if (interval > 0 and direction == 0) or (interval < 0 and direction == 1):
+                    cost += WRONG_DIRECTION_COST
+                if chromatic and abs(interval) != 1:
+                    cost += UNRESOLVED_COST
+                row.append(cost)
+            table.append(row)
+        moveCostTables[key] = table
+    return table
+
+# Cost of the last note of a line, which should be a half or whole step from end
+def _target_cost(last, end):
+    if end is None:
+        return 0
+    distance = abs(end - last)
+    if distance == 1 or distance == 2:
+        return INTERVAL_COSTS[distance]
+    return MISSED_TARGET_COST
+
+#================================================================================
+# SEARCH
+#================================================================================
+'''
+Best line of num_notes starting on start and ending a step from end (None for no
+target). The first note is start; even notes are on the beat.
+A state is a pitch and whether the line got there going up, so turning around can cost
+more than carrying on (otherwise trilling between two notes is nearly free)
+'''
+def search_line(start, end, chord, num_notes=4, direction=1, low=SEARCH_LOW, high=SEARCH_HIGH):
+    if num_notes <= 1:
+        return [start][:num_notes]
+    root = chord.root
+    tones = tone_costs(chord.quality, chord.scale)
+    moves = move_costs(chord.quality, chord.scale, direction)
+    pitches = list(range(low, high + 1))
+
+    # State index is 2 * pitch index + rising. The line starts as if heading its own way
+    states = {2 * (start - low) + (1 if direction == 1 else 0): 0}
+    back = []
+    for position in range(1, num_notes):
+        on_beat = tones[0 if position % 2 == 0 else 1]
+        new_states = {}
+        pointers = {}
+        for state in sorted(states):
+            total = states[state]
+            before = pitches[state // 2]
+            rising = state % 2
+            move_row = moves[(before - root) % OCTAVE]
+            for pitch in range(max(low, before - MAX_INTERVAL), min(high, before + MAX_INTERVAL) + 1):
+                interval = pitch - before
+                now_rising = rising if interval == 0 else (1 if interval > 0 else 0)
+                cost = total + move_row[interval + MAX_INTERVAL] + on_beat[(pitch - root) % OCTAVE]
+                if now_rising != rising:
+                    cost += REVERSAL_COST
+                next_state = 2 * (pitch - low) + now_rising
+                if next_state not in new_states or cost < new_states[next_state]:
+                    new_states[next_state] = cost
+                    pointers[next_state] = state
+        back.append(pointers)
+        states = new_states
+
+    best = None
+    for state in sorted(states):
+        total = states[state] + _target_cost(pitches[state // 2], end)
+        if best is None or total < best:
+            best = total
+            best_state = state
+
+    line = []
+    state = best_state
+    for pointers in reversed(back):
+        line.append(pitches[state // 2])
+        state = pointers[state]
+    line.append(start)
+    line.reverse()
+    return line
+
+# A pitch moved by octaves into the search range
+def _in_range(pitch, low=LOWEST_NOTE, high=HIGHEST_NOTE):
+    while pitch < low:
+        pitch += OCTAVE
+    while pitch > high:
+        pitch -= OCTAVE
+    return pitch
+
+'''
+Downbeat pitch of chord for scale degree sp, in create_line()'s range. None for a rest
+'''
+def downbeat_pitch(chord, sp):
+    if sp <= 0 or chord is None:
+        return None
+    return _in_range(chord.root + chord.scale[sp - 1])
+
+targetLineTable = {}
+
+'''
+Line for chord from its downbeat (degree sp) towards the downbeat of next_chord (degree
+next_sp). Same arguments as lookup_line() plus the next chord, None at the end of a solo
+'''
+def lookup_target_line(chord, sp, direction=1, num_notes=4, next_chord=None, next_sp=0):
+    start = downbeat_pitch(chord, sp)
+    if start is None:
+        return (REST,) * num_notes
+    end = downbeat_pitch(next_chord, next_sp)
+    key = (chord.root, tuple(chord.quality), start, end, num_notes, direction)
+    line = targetLineTable.get(key)
+    if line is None:
+        line = tuple(search_line(start, end, chord, num_notes, direction))
+        targetLineTable[key] = line
+    return line
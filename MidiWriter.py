@@ -0,0 +1,260 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# MidiWriter.py
+# Writes a Type-1 Standard MIDI File straight from a solo NoteSequence and a comping
+# ChordSequence, without building Score/Part/Phrase objects. For batch exports:
+#   solo, comping = SoloGenerator(3).generate()
+#   write_midi('solo.mid', solo, comping, 286.0)
+#
+# Track 1 is the piano on channel 0 (with the tempo), track 2 the sax on channel 1.
+# Each track is written into one preallocated bytearray, note offs are sent as note
+# ons with velocity 0 so the whole track uses running status, and delta times come
+# from a table of precomputed variable-length numbers.
+#
+# read_midi() is a small reference parser used to check the files that come out
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import struct
+try:
+    from music import BRIGHT_ACOUSTIC, TENOR_SAX
+except ImportError: # Plain Python, no JythonMusic (see MusicConstants.py)
+    from MusicConstants import BRIGHT_ACOUSTIC, TENOR_SAX
+from NoteSequence import TICKS_PER_BEAT
+
+PIANO_CHANNEL = 0
+SAX_CHANNEL = 1
+DEFAULT_VELOCITY = 85 # Same as jMusic's default dynamic
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+PROGRAM_CHANGE = 0xC0
+META = 0xFF
+META_TEMPO = 0x51
+META_END_OF_TRACK = 0x2F
+
+MAX_EVENT_BYTES = 4 + 3 # Longest delta time plus a full note event
+MAX_TEMPO = 0xFFFFFF    # Microseconds per beat, the most a tempo event's 3 bytes hold
+MIN_BPM = 60000000.0 / MAX_TEMPO # About 3.58
+MAX_BPM = 60000000.0    # One microsecond per beat
+
+def encode_varint(value):
+    encoded = [value & 0x7F]
+    value >>= 7
+    while value:
+        encoded.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytearray(encoded)
+
+# Every delta up to two whole notes is looked up instead of encoded
+VARINTS = [encode_varint(value) for value in range(8 * TICKS_PER_BEAT + 1)]
+
+def varint(value):
+    if value < len(VARINTS):
+        return VARINTS[value]
+    return encode_varint(value)
+
+#================================================================================
+# TrackBuffer writes the events of one track into a bytearray that is allocated
+# once, sized for the worst case, and trimmed when the track is finished
+#================================================================================
+class TrackBuffer(object):
+    def __init__(self, max_events):
+        self.data = bytearray(max_events * MAX_EVENT_BYTES + 32)
+        self.size = 0
+        self.status = None
+        self.pending_ticks = 0 # Time since the last event
+
+    def _write(self, chunk):
+        end = self.size + len(chunk)
+        self.data[self.size:end] = chunk
+        self.size = end
+
+    def wait(self, ticks):
+        self.pending_ticks += ticks
+
+    def event(self, status, data1, data2=None):
+        self._write(varint(self.pending_ticks))
+        self.pending_ticks = 0
+        if status != self.status: # Running status: only send the status byte when it changes
+            self._write(bytearray((status,)))
+            self.status = status
+        if data2 is None:
+            self._write(bytearray((data1,)))
+        else:
+            self._write(bytearray((data1, data2)))
+
+    # Note event with its two data bytes already packed (see note_bytes())
+    def note(self, status, data):
+        delta = varint(self.pending_ticks)
+        self.pending_ticks = 0
+        pos = self.size
+        buf = self.data
+        buf[pos:pos + len(delta)] = delta
+        pos += len(delta)
+        if status != self.status:
+            buf[pos] = status
+            pos += 1
+            self.status = status
+        buf[pos:pos + 2] = data
+        self.size = pos + 2
+
+    def meta(self, meta_type, payload):
+        self._write(varint(self.pending_ticks))
+        self.pending_ticks = 0
+        self._write(bytearray((META, meta_type)))
+        self._write(varint(len(payload)))
+        self._write(payload)
+        self.status = None # Meta events cancel running status
+
+    def chunk(self):
+        self.meta(META_END_OF_TRACK, bytearray())
+        return b'MTrk' + struct.pack('>I', self.size) + bytes(self.data[:self.size])
+
+def tempo_payload(bpm):
+    if not MIN_BPM <= bpm <= MAX_BPM: # Also false for NaN
+        raise ValueError('a MIDI file can only hold tempos of {:.2f} to {:.0f} BPM, not {}'.format(MIN_BPM, MAX_BPM, bpm))
+    microseconds = min(int(round(60000000.0 / bpm)), MAX_TEMPO)
+    return bytearray(struct.pack('>I', microseconds)[1:])
+
+# The (pitch, velocity) data bytes for every MIDI pitch
+def note_bytes(velocity):
+    return [bytearray((pitch, velocity)) for pitch in range(128)]
+
+NOTE_OFF_BYTES = note_bytes(0)
+DEFAULT_NOTE_ON_BYTES = note_bytes(DEFAULT_VELOCITY)
+
+def solo_track(solo, channel=SAX_CHANNEL, instrument=TENOR_SAX, velocity=DEFAULT_VELOCITY):
+    track = TrackBuffer(2 * len(solo) + 1)
+    track.event(PROGRAM_CHANGE | channel, instrument)
+    note_on = NOTE_ON | channel
+    on_bytes = DEFAULT_NOTE_ON_BYTES if velocity == DEFAULT_VELOCITY else note_bytes(velocity)
+    pitches = solo.pitches
+    start = 0
+    for ticks, end in zip(solo.run_ticks, solo.run_ends):
+        for i in range(start, end):
+            pitch = pitches[i]
+            if pitch < 0: # REST
+                track.pending_ticks += ticks
+                continue
+            track.note(note_on, on_bytes[pitch])
+            track.pending_ticks = ticks
+            track.note(note_on, NOTE_OFF_BYTES[pitch])
+        start = end
+    return track
+
+def comping_track(comping, bpm, channel=PIANO_CHANNEL, instrument=BRIGHT_ACOUSTIC, velocity=DEFAULT_VELOCITY):
+    track = TrackBuffer(2 * len(comping.pitches) + 2)
+    track.meta(META_TEMPO, tempo_payload(bpm))
+    track.event(PROGRAM_CHANGE | channel, instrument)
+    note_on = NOTE_ON | channel
+    on_bytes = DEFAULT_NOTE_ON_BYTES if velocity == DEFAULT_VELOCITY else note_bytes(velocity)
+    pitches = comping.pitches
+    start = 0
+    for end, ticks in zip(comping.chord_ends, comping.durations):
+        chord = [pitch for pitch in pitches[start:end] if pitch >= 0]
+        for pitch in chord:
+            track.note(note_on, on_bytes[pitch])
+        track.wait(ticks)
+        for pitch in chord:
+            track.note(note_on, NOTE_OFF_BYTES[pitch])
+        start = end
+    return track
+
+'''
+Build the bytes of a Type-1 MIDI file. comping can be None to leave the piano track
+empty (it still carries the tempo)
+'''
+def midi_bytes(solo, comping=None, bpm=120.0):
+    if comping is None:
+        piano = TrackBuffer(0)
+        piano.meta(META_TEMPO, tempo_payload(bpm))
+    else:
+        piano = comping_track(comping, bpm)
+    sax = solo_track(solo)
+
+    header = b'MThd' + struct.pack('>IHHH', 6, 1, 2, TICKS_PER_BEAT)
+    return header + piano.chunk() + sax.chunk()
+
+def write_midi(path, solo, comping=None, bpm=120.0):
+    data = midi_bytes(solo, comping, bpm)
+    f = open(path, 'wb')
+    try:
+        f.write(data)
+    finally:
+        f.close()
+    return len(data)
+
+#================================================================================
+# REFERENCE PARSER
+# read_midi() returns (format, division, tracks) where each track is a list of
+# events (tick, status, data) with absolute ticks. note_events() pulls out the
+# notes as (start_tick, duration_ticks, channel, pitch), sorted by start
+#================================================================================
+def _read_varint(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+def read_midi(data):
+    data = bytearray(data)
+    if data[0:4] != b'MThd':
+        raise ValueError('Not a MIDI file')
+    header_length, midi_format, num_tracks, division = struct.unpack('>IHHH', bytes(data[4:14]))
+    pos = 8 + header_length
+    tracks = []
+    for t in range(num_tracks):
+        if data[pos:pos + 4] != b'MTrk':
+            raise ValueError('Expected track {} at byte {}'.format(t, pos))
+        track_length = struct.unpack('>I', bytes(data[pos + 4:pos + 8]))[0]
+        pos += 8
+        end = pos + track_length
+        events = []
+        tick = 0
+        status = None
+        while pos < end:
+            delta, pos = _read_varint(data, pos)
+            tick += delta
+            if data[pos] & 0x80:
+                status = data[pos]
+                pos += 1
+            elif status is None:
+                raise ValueError('Running status without a status byte at byte {}'.format(pos))
+            if status == META:
+                meta_type = data[pos]
+                length, pos = _read_varint(data, pos + 1)
+                events.append((tick, status, (meta_type, bytes(data[pos:pos + length]))))
+                pos += length
+                status = None
+            elif status in (0xF0, 0xF7): # SysEx
+                length, pos = _read_varint(data, pos)
+                events.append((tick, status, bytes(data[pos:pos + length])))
+                pos += length
+                status = None
+            elif (status & 0xF0) in (PROGRAM_CHANGE, 0xD0): # One data byte
+                events.append((tick, status, (data[pos],)))
+                pos += 1
+            else:
+                events.append((tick, status, (data[pos], data[pos + 1])))
+                pos += 2
+        tracks.append(events)
+        pos = end
+    return midi_format, division, tracks
+
+def note_events(tracks):
+    notes = []
+    for events in tracks:
+        sounding = {}
+        for tick, status, data in events:
+            kind = status & 0xF0
+            if kind not in (NOTE_ON, NOTE_OFF):
+                continue
+            key = (status & 0x0F, data[0])
+            if kind == NOTE_ON and data[1] > 0:
+                sounding.setdefault(key, []).append(tick)
+            elif sounding.get(key):
+                start = sounding[key].pop(0)
+                notes.append((start, tick - start, key[0], key[1]))
+    notes.sort()
+    return notes
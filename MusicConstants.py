@@ -0,0 +1,56 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# MusicConstants.py
+# The constants the headless modules use from JythonMusic's music module (pitches, REST,
+# durations, scales and instruments), for running on plain Python where JythonMusic
+# isn't installed: GiantStepsCli.py, SoloServer.py, batch jobs. Modules import music
+# first and fall back to this:
+#   try:
+#       from music import *
+#   except ImportError: # Plain Python, no JythonMusic
+#       from MusicConstants import *
+# Values are the same as JythonMusic's (C4 is 60, REST is Integer.MIN_VALUE, QN is 1.0)
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+#---PITCHES-----------------------------
+_PITCH_NAMES = [('C', 'BS'), ('CS', 'DF'), ('D',), ('DS', 'EF'), ('E', 'FF'), ('F', 'ES'),
+                ('FS', 'GF'), ('G',), ('GS', 'AF'), ('A',), ('AS', 'BF'), ('B', 'CF')]
+
+for _pitch in range(128):
+    _octave = _pitch // 12 - 1
+    for _name in _PITCH_NAMES[_pitch % 12]:
+        if _octave < 0:
+            globals()['{}N1'.format(_name)] = _pitch # CN1, CSN1, ... like JythonMusic
+        else:
+            globals()['{}{}'.format(_name, _octave)] = _pitch
+
+MIDI_PITCHES = ['{}{}'.format(_PITCH_NAMES[_pitch % 12][0], _pitch // 12 - 1) for _pitch in range(128)]
+REST = -2147483648
+
+#---DURATIONS---------------------------
+WN = 4.0
+DHN = 3.0
+HN = 2.0
+DQN = 1.5
+QN = 1.0
+DEN = 0.75
+EN = 0.5
+ENT = 1.0 / 3
+DSN = 0.375
+SN = 0.25
+SNT = 1.0 / 6
+TN = 0.125
+
+#---SCALES------------------------------
+MAJOR_SCALE = [0, 2, 4, 5, 7, 9, 11]
+MINOR_SCALE = [0, 2, 3, 5, 7, 8, 10]
+AEOLIAN_SCALE = [0, 2, 3, 5, 7, 8, 10]
+DORIAN_SCALE = [0, 2, 3, 5, 7, 9, 10]
+MIXOLYDIAN_SCALE = [0, 2, 4, 5, 7, 9, 10]
+LYDIAN_SCALE = [0, 2, 4, 6, 7, 9, 11]
+CHROMATIC_SCALE = list(range(12))
+PENTATONIC_SCALE = [0, 2, 4, 7, 9]
+
+#---INSTRUMENTS--------------------------
+PIANO = 0
+BRIGHT_ACOUSTIC = 1
+TENOR_SAX = 66
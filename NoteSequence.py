@@ -0,0 +1,324 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# NoteSequence.py
+# Compact note storage for long solos and comping.
+# Pitches are kept one byte each in an array('b') with REST stored as -1, and durations
+# are integer ticks. Solo durations are run-length encoded since nearly every note is
+# an eighth note. Lists for Phrase.addNoteList are only built at the edge, with to_note_list()
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import sys
+from array import array
+from bisect import bisect_right
+try:
+    from music import REST
+except ImportError: # Plain Python, no JythonMusic (see MusicConstants.py)
+    from MusicConstants import REST
+
+TICKS_PER_BEAT = 480 # PPQ. Divisible by 2, 3, 4, 5, 6 and 8 so common subdivisions are exact
+REST_PITCH = -1      # How REST is stored in a pitch array
+TIE_VECTORIZE_MIN_NOTES = 256 # Below this NoteSequence.tied() loops over the notes instead of using NumPy
+NUMPY_IMPORT_MIN_NOTES = 32768 # Below this importing NumPy (~100 ms) costs more than looping saves
+
+def beats_to_ticks(duration):
+    return int(round(duration * TICKS_PER_BEAT))
+
+def ticks_to_beats(ticks):
+    return float(ticks) / TICKS_PER_BEAT
+
+#---NUMPY-----------------------------
+# NumPy is imported the first time something is big enough to be worth vectorizing,
+# not when this module is, so short solos and scripts (GiantStepsCli.py) start without
+# paying for the import. None when it isn't installed (Jython)
+numpyModule = None
+numpyTried = False
+
+def import_numpy():
+    global numpyModule, numpyTried
+    if not numpyTried:
+        try:
+            import numpy
+            numpyModule = numpy
+        except ImportError:
+            pass
+        numpyTried = True
+    return numpyModule
+
+'''
+NumPy if it is worth using on count notes, otherwise None: count is at least min_notes
+and NumPy is loaded already, or count is big enough to be worth loading it for
+'''
+def numpy_for(count, min_notes):
+    if count < min_notes:
+        return None
+    if numpyTried or count >= NUMPY_IMPORT_MIN_NOTES or 'numpy' in sys.modules:
+        return import_numpy()
+    return None
+
+# True for a NumPy array. Doesn't import NumPy: if nothing has, value can't be one
+def is_array(value):
+    numpy = sys.modules.get('numpy')
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+#---FILES-----------------------------
+# Arrays are written little endian, whatever the machine, by the binary formats
+# (LeadSheet.py, Corpus.py)
+def little_endian_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    if hasattr(values, 'tobytes'):
+        return values.tobytes()
+    return values.tostring() # Python 2 / Jython
+
+# count values of typecode starting at offset in buffer (bytes or a mapped file). A view
+# into the buffer with NumPy, otherwise a copy in an array
+def read_array(buffer, offset, typecode, count):
+    numpy = import_numpy()
+    if numpy is not None:
+        return numpy.frombuffer(buffer, dtype=numpy.dtype(typecode).newbyteorder('<'), count=count, offset=offset)
+    values = array(typecode)
+    data = bytes(buffer[offset:offset + count * values.itemsize])
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def _store_pitch(pitch):
+    if pitch < 0:
+        return REST_PITCH
+    return pitch
+
+def _load_pitch(pitch):
+    if pitch < 0:
+        return REST
+    return pitch
+
+#================================================================================
+# NoteSequence is a single line of notes, for example the solo:
+#   notes = NoteSequence()
+#   notes.append(C4, EN)
+#   notes.extend_line([D4, E4, REST], EN)  # Three more eighth notes, stored as one run
+#   notes[1]                               # (D4, 0.5)
+#   notes[1:3]                             # new NoteSequence with D4, E4
+#   pitches, durations = notes.to_note_list()
+#================================================================================
+class NoteSequence(object):
+    __slots__ = ('pitches', 'run_ticks', 'run_ends')
+
+    def __init__(self, pitches=(), durations=()):
+        self.pitches = array('b')
+        self.run_ticks = array('i') # Duration of every note in a run
+        self.run_ends = array('i')  # Index one past the last note of each run
+        self.extend(pitches, durations)
+
+    def __len__(self):
+        return len(self.pitches)
+
+    def _add_run(self, ticks, count):
+        if len(self.run_ticks) > 0 and self.run_ticks[-1] == ticks:
+            self.run_ends[-1] += count
+        else:
+            self.run_ticks.append(ticks)
+            self.run_ends.append(len(self.pitches) + count)
+
+    def append_ticks(self, pitch, ticks):
+        self._add_run(ticks, 1)
+        self.pitches.append(_store_pitch(pitch))
+
+    def append(self, pitch, duration):
+        self.append_ticks(pitch, beats_to_ticks(duration))
+
+    def extend(self, pitches, durations):
+        for pitch, duration in zip(pitches, durations):
+            self.append(pitch, duration)
+
+    '''
+    NoteSequence from stored pitches (REST as REST_PITCH) and a duration in ticks for
+    every note, for example arrays read from a file. Runs are found in one pass
+    '''
+    @classmethod
+    def from_ticks(cls, pitches, ticks):
+        notes = cls()
+        if is_array(ticks):
+            numpy = import_numpy()
+            notes.pitches = array('b', numpy.asarray(pitches, dtype=numpy.int8).tobytes())
+            if len(ticks) > 0:
+                first = numpy.flatnonzero(numpy.concatenate(([True], ticks[1:] != ticks[:-1])))
+                notes.run_ticks = array('i', ticks[first].astype(numpy.int32).tobytes())
+                notes.run_ends = array('i', numpy.append(first[1:], len(ticks)).astype(numpy.int32).tobytes())
+            return notes
+
+        notes.pitches = array('b', pitches)
+        run_ticks = notes.run_ticks
+        run_ends = notes.run_ends
+        for i, note_ticks in enumerate(ticks):
+            if len(run_ticks) == 0 or note_ticks != run_ticks[-1]:
+                if len(run_ticks) > 0:
+                    run_ends.append(i)
+                run_ticks.append(note_ticks)
+        if len(run_ticks) > 0:
+            run_ends.append(len(notes.pitches))
+        return notes
+
+    # Add a whole line of notes that all have the same duration
+    def extend_line(self, line, duration):
+        self._add_run(beats_to_ticks(duration), len(line))
+        self.pitches.extend([_store_pitch(pitch) for pitch in line])
+
+    # A line with a duration in ticks for each note (see Rhythm.py)
+    def extend_ticks(self, line, durations):
+        for pitch, ticks in zip(line, durations):
+            self.append_ticks(pitch, ticks)
+
+    def ticks_at(self, index):
+        if index < 0:
+            index += len(self.pitches)
+        if index < 0 or index >= len(self.pitches):
+            raise IndexError('note index out of range')
+        return self.run_ticks[bisect_right(self.run_ends, index)]
+
+    # Durations of every note in ticks, expanded from the runs
+    def ticks(self):
+        result = array('i')
+        start = 0
+        for ticks, end in zip(self.run_ticks, self.run_ends):
+            result.extend(array('i', [ticks]) * (end - start))
+            start = end
+        return result
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return _load_pitch(self.pitches[index]), ticks_to_beats(self.ticks_at(index))
+
+        start, stop, step = index.indices(len(self.pitches))
+        result = NoteSequence()
+        if step != 1:
+            for i in range(start, stop, step):
+                result.append_ticks(self.pitches[i], self.ticks_at(i))
+            return result
+
+        # Copy the pitches in one go and clip the runs that overlap the slice
+        result.pitches = self.pitches[start:stop]
+        result_length = len(result.pitches)
+        run = bisect_right(self.run_ends, start)
+        while run < len(self.run_ends) and start < stop:
+            end = min(self.run_ends[run], stop)
+            result.run_ticks.append(self.run_ticks[run])
+            result.run_ends.append(result_length - (stop - end))
+            start = end
+            run += 1
+        return result
+
+    def __iter__(self):
+        start = 0
+        for ticks, end in zip(self.run_ticks, self.run_ends):
+            duration = ticks_to_beats(ticks)
+            for i in range(start, end):
+                yield _load_pitch(self.pitches[i]), duration
+            start = end
+
+    # The two lists Phrase.addNoteList expects
+    def to_note_list(self):
+        pitches = [_load_pitch(pitch) for pitch in self.pitches]
+        durations = []
+        start = 0
+        for ticks, end in zip(self.run_ticks, self.run_ends):
+            durations.extend([ticks_to_beats(ticks)] * (end - start))
+            start = end
+        return pitches, durations
+
+    '''
+    New NoteSequence with every run of the same pitch merged into one note, like
+    Mod.tiePitches but in a single pass over the arrays. A note is never tied across a
+    REST, and RESTs in a row become one longer REST as they do with Mod.tiePitches.
+    With bar_ticks (e.g. beats_to_ticks(4.0)) notes are not tied over a bar line either
+    '''
+    def tied(self, bar_ticks=None):
+        if numpy_for(len(self.pitches), TIE_VECTORIZE_MIN_NOTES) is not None:
+            return self._tied_arrays(bar_ticks)
+
+        tied_pitches = []
+        tied_ticks = []
+        previous = None
+        position = 0 # Where the note starts
+        for pitch, ticks in zip(self.pitches.tolist(), self.ticks().tolist()):
+            if pitch == previous and (bar_ticks is None or position % bar_ticks != 0):
+                tied_ticks[-1] += ticks
+            else:
+                tied_pitches.append(pitch)
+                tied_ticks.append(ticks)
+                previous = pitch
+            position += ticks
+        return NoteSequence.from_ticks(tied_pitches, tied_ticks)
+
+    # tied() without a per-note loop: a new note starts wherever the pitch changes
+    def _tied_arrays(self, bar_ticks):
+        numpy = import_numpy()
+        pitches = numpy.frombuffer(self.pitches, dtype=numpy.int8)
+        ticks = numpy.frombuffer(self.ticks(), dtype=numpy.int32).astype(numpy.int64)
+        starts = numpy.ones(len(pitches), dtype=bool)
+        starts[1:] = pitches[1:] != pitches[:-1]
+        if bar_ticks is not None:
+            starts |= (numpy.cumsum(ticks) - ticks) % bar_ticks == 0
+        first = numpy.flatnonzero(starts)
+        return NoteSequence.from_ticks(pitches[first], numpy.add.reduceat(ticks, first))
+
+    # Bytes used by the note data (not counting the fixed object overhead)
+    def nbytes(self):
+        return (len(self.pitches) * self.pitches.itemsize + len(self.run_ticks) * self.run_ticks.itemsize
+                + len(self.run_ends) * self.run_ends.itemsize)
+
+#================================================================================
+# ChordSequence is a line of chords, for example the piano comping:
+#   comping = ChordSequence()
+#   comping.append([B4, DS5, FS5, AS5], HN)
+#   comping[0]                            # ([B4, DS5, FS5, AS5], 2.0)
+#   chords, durations = comping.to_note_list()
+#================================================================================
+class ChordSequence(object):
+    __slots__ = ('pitches', 'chord_ends', 'durations')
+
+    def __init__(self, chords=(), durations=()):
+        self.pitches = array('b')    # Every chord's pitches, one after the other
+        self.chord_ends = array('i') # Index into pitches one past the end of each chord
+        self.durations = array('i')  # Ticks
+        for chord, duration in zip(chords, durations):
+            self.append(chord, duration)
+
+    def __len__(self):
+        return len(self.durations)
+
+    def append_ticks(self, chord, ticks):
+        self.pitches.extend([_store_pitch(pitch) for pitch in chord])
+        self.chord_ends.append(len(self.pitches))
+        self.durations.append(ticks)
+
+    def append(self, chord, duration):
+        self.append_ticks(chord, beats_to_ticks(duration))
+
+    def chord_at(self, index):
+        start = 0
+        if index > 0:
+            start = self.chord_ends[index - 1]
+        return [_load_pitch(pitch) for pitch in self.pitches[start:self.chord_ends[index]]]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            result = ChordSequence()
+            for i in range(*index.indices(len(self.durations))):
+                result.append_ticks(self.chord_at(i), self.durations[i])
+            return result
+        if index < 0:
+            index += len(self.durations)
+        return self.chord_at(index), ticks_to_beats(self.durations[index])
+
+    def to_note_list(self):
+        chords = [self.chord_at(i) for i in range(len(self.durations))]
+        durations = [ticks_to_beats(ticks) for ticks in self.durations]
+        return chords, durations
+
+    def nbytes(self):
+        return (len(self.pitches) * self.pitches.itemsize + len(self.chord_ends) * self.chord_ends.itemsize
+                + len(self.durations) * self.durations.itemsize)
@@ -0,0 +1,229 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Playback.py
+# Real-time playback that starts sounding before the solo is finished generating.
+#
+# LookaheadScheduler pulls notes from SoloGenerator.iter_solo() and iter_comping() only a
+# few beats ahead of the playhead, queues their MIDI messages by time and sends each one
+# to a sink when its time comes, on a background thread. The time to the first note is
+# the time to generate one lookahead window, whatever the length of the solo.
+#   scheduler = LookaheadScheduler(SoloGenerator(9), 286.0, JythonMusicSink())
+#   scheduler.start()
+#   ...
+#   scheduler.stop()
+#
+# Clocks and sinks are plain objects, so the scheduler can be run against FakeClock and
+# NullMidiSink without real time passing or any MIDI device
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import heapq
+import threading
+import time
+try:
+    from music import REST, BRIGHT_ACOUSTIC, TENOR_SAX
+except ImportError: # Plain Python, no JythonMusic (see MusicConstants.py)
+    from MusicConstants import REST, BRIGHT_ACOUSTIC, TENOR_SAX
+from NoteSequence import beats_to_ticks, ticks_to_beats
+from MidiWriter import NOTE_ON, NOTE_OFF, PROGRAM_CHANGE, PIANO_CHANNEL, SAX_CHANNEL, DEFAULT_VELOCITY
+
+DEFAULT_LOOKAHEAD_BEATS = 4.0 # About one or two chords of Giant Steps
+
+# Messages at the same time go out note offs first, so a repeated pitch is re-struck
+OFF_FIRST = 0
+ON_AFTER = 1
+
+#================================================================================
+# CLOCKS
+# now() is in seconds. sleep_until() returns early if interrupt (a threading.Event)
+# is set, which is how stop() wakes the scheduler up
+#================================================================================
+class SystemClock(object):
+    def now(self):
+        return time.time()
+
+    def sleep_until(self, target, interrupt=None):
+        delay = target - self.now()
+        if delay <= 0:
+            return
+        if interrupt is not None:
+            interrupt.wait(delay)
+        else:
+            time.sleep(delay)
+
+# Time only moves when the scheduler sleeps (or when advance() is called), by exactly
+# the amount asked for plus latency, which can be used to simulate late wake ups
+class FakeClock(object):
+    def __init__(self, start=0.0, latency=0.0):
+        self.time = start
+        self.latency = latency
+
+    def now(self):
+        return self.time
+
+    def advance(self, seconds):
+        self.time += seconds
+
+    def sleep_until(self, target, interrupt=None):
+        if target > self.time:
+            self.time = target + self.latency
+
+#================================================================================
+# SINKS
+# send(message) takes a MIDI message as a (status, data1, data2) tuple
+#================================================================================
+class NullMidiSink(object):
+    def __init__(self, keep=False):
+        self.count = 0
+        self.messages = [] if keep else None
+
+    def send(self, message):
+        self.count += 1
+        if self.messages is not None:
+            self.messages.append(message)
+
+# Plays through JythonMusic's Play.noteOn/noteOff
+class JythonMusicSink(object):
+    def __init__(self):
+        from music import Play
+        self.play = Play
+
+    def send(self, message):
+        status, data1, data2 = message
+        kind = status & 0xF0
+        channel = status & 0x0F
+        if kind == NOTE_ON and data2 > 0:
+            self.play.noteOn(data1, data2, channel)
+        elif kind in (NOTE_ON, NOTE_OFF):
+            self.play.noteOff(data1, channel)
+        elif kind == PROGRAM_CHANGE:
+            self.play.setInstrument(data1, channel)
+
+#================================================================================
+# SCHEDULER
+#================================================================================
+class LookaheadScheduler(object):
+    def __init__(self, generator, bpm, sink, clock=None, lookahead_beats=DEFAULT_LOOKAHEAD_BEATS,
+                 accompaniment=True, velocity=DEFAULT_VELOCITY):
+        self.generator = generator
+        self.seconds_per_beat = 60.0 / bpm
+        self.sink = sink
+        self.clock = clock if clock is not None else SystemClock()
+        self.lookahead_beats = lookahead_beats
+        self.accompaniment = accompaniment
+        self.velocity = velocity
+
+        self.queue = [] # (beat, OFF_FIRST/ON_AFTER, sequence number, message)
+        self.sequence = 0
+        self.sounding = set() # (channel, pitch) pairs with a note on sent
+        self.stopping = threading.Event()
+        self.thread = None
+
+        # Where generation has got to in each part, in ticks so that triplets and the
+        # like add up exactly (see Rhythm.py)
+        self.solo = generator.iter_solo()
+        self.solo_tick = 0
+        self.comping = generator.iter_comping() if accompaniment else None
+        self.comping_tick = 0
+
+        # Stats. Jitter is how late each message went out compared to its scheduled time
+        self.start_time = None
+        self.first_note_latency = None
+        self.messages_sent = 0
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+
+    def _push(self, beat, order, message):
+        heapq.heappush(self.queue, (beat, order, self.sequence, message))
+        self.sequence += 1
+
+    def _note(self, channel, pitch, start_tick, end_tick):
+        self._push(ticks_to_beats(start_tick), ON_AFTER, (NOTE_ON | channel, pitch, self.velocity))
+        self._push(ticks_to_beats(end_tick), OFF_FIRST, (NOTE_ON | channel, pitch, 0))
+
+    # Generate until both parts reach horizon (in beats) or run out
+    def _fill(self, horizon):
+        horizon_tick = beats_to_ticks(horizon)
+        while self.solo is not None and self.solo_tick < horizon_tick:
+            try:
+                pitch, duration = next(self.solo)
+            except StopIteration:
+                self.solo = None
+                break
+            end_tick = self.solo_tick + beats_to_ticks(duration)
+            if pitch != REST:
+                self._note(SAX_CHANNEL, pitch, self.solo_tick, end_tick)
+            self.solo_tick = end_tick
+
+        while self.comping is not None and self.comping_tick < horizon_tick:
+            try:
+                pitches, duration = next(self.comping)
+            except StopIteration:
+                self.comping = None
+                break
+            end_tick = self.comping_tick + beats_to_ticks(duration)
+            for pitch in pitches:
+                if pitch != REST:
+                    self._note(PIANO_CHANNEL, pitch, self.comping_tick, end_tick)
+            self.comping_tick = end_tick
+
+    def _send(self, message):
+        status, pitch, velocity = message
+        key = (status & 0x0F, pitch)
+        if status & 0xF0 == NOTE_ON:
+            if velocity > 0:
+                self.sounding.add(key)
+            else:
+                self.sounding.discard(key)
+        self.sink.send(message)
+        self.messages_sent += 1
+
+    '''
+    Play until the solo ends or stop() is called. Blocks, start() runs it on a thread
+    '''
+    def run(self):
+        clock = self.clock
+        self.start_time = clock.now()
+        self.sink.send((PROGRAM_CHANGE | PIANO_CHANNEL, BRIGHT_ACOUSTIC, 0))
+        self.sink.send((PROGRAM_CHANGE | SAX_CHANNEL, TENOR_SAX, 0))
+
+        while not self.stopping.is_set():
+            playhead = (clock.now() - self.start_time) / self.seconds_per_beat
+            self._fill(playhead + self.lookahead_beats)
+            if not self.queue:
+                break
+            # Long notes can put a note off past the lookahead, so make sure nothing still
+            # to be generated comes before the next message
+            self._fill(self.queue[0][0])
+
+            beat, order, sequence, message = heapq.heappop(self.queue)
+            target = self.start_time + beat * self.seconds_per_beat
+            clock.sleep_until(target, self.stopping)
+            if self.stopping.is_set():
+                break
+
+            sent_at = clock.now()
+            self._send(message)
+            jitter = max(0.0, sent_at - target)
+            self.jitter_total += jitter
+            self.jitter_max = max(self.jitter_max, jitter)
+            if self.first_note_latency is None and message[2] > 0:
+                self.first_note_latency = sent_at - self.start_time
+
+        # Don't leave anything hanging when stopped early
+        for channel, pitch in sorted(self.sounding):
+            self.sink.send((NOTE_ON | channel, pitch, 0))
+        self.sounding = set()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self, wait=True):
+        self.stopping.set()
+        if wait and self.thread is not None:
+            self.thread.join()
+
+    def jitter_mean(self):
+        if self.messages_sent == 0:
+            return 0.0
+        return self.jitter_total / self.messages_sent
@@ -0,0 +1,121 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Profiling.py
+# Opt-in timers and counters for each stage of generating and playing a solo.
+#   profiler = Profiler(callback=print_report)
+#   solo = generate_solo_notes(chords, rhythms, degrees, directions, profiler=profiler)
+#   with profile_stage(profiler, 'View.notation', notes=len(solo)):
+#       View.notation(phrase)
+#   profiler.emit()
+#
+# Everything that takes a profiler takes None to mean "off", and then only pays for an
+# "is None" check per stage (and per chord in the arpeggiation pass).
+# emit() hands the report (a dict, see report()) to the callback, or logs it as one line
+# of JSON on the 'giantsteps.profile' logger
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import json
+import logging
+from timeit import default_timer as timer
+
+try:
+    import tracemalloc
+except ImportError: # Jython
+    tracemalloc = None
+
+LOGGER = logging.getLogger('giantsteps.profile')
+
+class StageTimer(object):
+    __slots__ = ('profiler', 'name', 'notes', 'start_time', 'start_memory')
+
+    def __init__(self, profiler, name, notes):
+        self.profiler = profiler
+        self.name = name
+        self.notes = notes
+
+    def __enter__(self):
+        self.start_memory = self.profiler._traced_memory()
+        self.start_time = timer()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = timer() - self.start_time
+        allocated = self.profiler._traced_memory() - self.start_memory
+        self.profiler.add_stage(self.name, elapsed, self.notes, allocated)
+        return False
+
+class NullStage(object):
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass # Nothing is recorded
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_STAGE = NullStage()
+
+def profile_stage(profiler, name, notes=0):
+    if profiler is None:
+        return NULL_STAGE
+    return profiler.stage(name, notes)
+
+#================================================================================
+# Profiler collects, per stage: calls, total seconds, notes and bytes allocated (only
+# with trace_memory on CPython), plus named counters and, for every starting degree,
+# how many lines took each create_line() branch
+#================================================================================
+class Profiler(object):
+    def __init__(self, callback=None, trace_memory=False, logger=LOGGER):
+        self.callback = callback
+        self.logger = logger
+        self.trace_memory = trace_memory and tracemalloc is not None
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.stages = {}
+        self.stage_order = []
+        self.counters = {}
+        self.branches = {}
+
+    def _traced_memory(self):
+        if self.trace_memory:
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+    def stage(self, name, notes=0):
+        return StageTimer(self, name, notes)
+
+    def add_stage(self, name, seconds, notes=0, allocated=0):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = {'calls': 0, 'seconds': 0.0, 'notes': 0, 'allocated_bytes': 0}
+            self.stages[name] = stage
+            self.stage_order.append(name)
+        stage['calls'] += 1
+        stage['seconds'] += seconds
+        stage['notes'] += notes
+        stage['allocated_bytes'] += allocated
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_branch(self, degree, branch):
+        by_branch = self.branches.setdefault(degree, {})
+        by_branch[branch] = by_branch.get(branch, 0) + 1
+
+    def report(self):
+        return {
+            'stages': [dict(name=name, **self.stages[name]) for name in self.stage_order],
+            'counters': dict(self.counters),
+            'branches': dict(('degree_{}'.format(degree), dict(branches))
+                             for degree, branches in sorted(self.branches.items())),
+        }
+
+    def emit(self):
+        report = self.report()
+        if self.callback is not None:
+            self.callback(report)
+        elif self.logger is not None:
+            self.logger.info(json.dumps(report, sort_keys=True))
+        return report
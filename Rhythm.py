@@ -0,0 +1,110 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Rhythm.py
+# Solo rhythms in integer ticks (TICKS_PER_BEAT to the quarter note) instead of every
+# note being an EN. A RhythmTemplate is a cycle of cells, each a few note durations in
+# ticks, laid over each chord's span. Cells can mix subdivisions, and the template can
+# anticipate the changes, starting each chord's line an eighth early:
+#   SoloGenerator(3, rhythm='bebop').solo()
+#   SoloGenerator(3, rhythm=RhythmTemplate([TRIPLET_CELL, EIGHTH_CELL], anticipation=EIGHTH_TICKS))
+#   RHYTHM_TEMPLATES['triplets'].durations(beats_to_ticks(HN))  # (160, 160, 160, 160, 160, 160)
+#
+# Everything is integer arithmetic on ticks: spans are whole numbers of ticks, a cell
+# that doesn't fit is cut short to the tick, and every chord's durations add up to its
+# span exactly, so bar lines, ties and MIDI export never see a rounding error however
+# long the solo is. Durations are worked out once per template and span and kept.
+#
+# A chord's line is still chosen for its eighth notes; fit_line() stretches or
+# shortens it to however many notes the template gives the chord
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from NoteSequence import *
+
+QUARTER_TICKS = TICKS_PER_BEAT
+EIGHTH_TICKS = TICKS_PER_BEAT // 2
+TRIPLET_TICKS = TICKS_PER_BEAT // 3
+SIXTEENTH_TICKS = TICKS_PER_BEAT // 4
+
+#---CELLS----------------------------- (one beat each)
+QUARTER_CELL = (QUARTER_TICKS,)
+EIGHTH_CELL = (EIGHTH_TICKS, EIGHTH_TICKS)
+TRIPLET_CELL = (TRIPLET_TICKS, TRIPLET_TICKS, TRIPLET_TICKS)
+SIXTEENTH_CELL = (SIXTEENTH_TICKS,) * 4
+SWING_CELL = (2 * TRIPLET_TICKS, TRIPLET_TICKS)
+EIGHTH_TWO_SIXTEENTHS_CELL = (EIGHTH_TICKS, SIXTEENTH_TICKS, SIXTEENTH_TICKS)
+
+# Number of EN notes a chord of rhythm beats gets, worked out in ticks
+def eighth_notes(rhythm):
+    return beats_to_ticks(rhythm) // EIGHTH_TICKS
+
+class RhythmTemplate(object):
+    def __init__(self, cells, anticipation=0):
+        cells = [tuple(int(ticks) for ticks in cell) for cell in cells]
+        if not cells or not all(cells) or any(ticks <= 0 for cell in cells for ticks in cell):
+            raise ValueError('a rhythm template needs cells of positive durations: {}'.format(cells))
+        self.cells = tuple(cells)
+        self.anticipation = int(anticipation)
+        self.cache = {} # span ticks -> durations
+
+    '''
+    Ticks of every note over a span of ticks: the cells in turn from the start of the
+    span, the last note cut short where the span ends
+    '''
+    def durations(self, span):
+        durations = self.cache.get(span)
+        if durations is None:
+            result = []
+            position = 0
+            cell = 0
+            while position < span:
+                for ticks in self.cells[cell % len(self.cells)]:
+                    ticks = min(ticks, span - position)
+                    result.append(ticks)
+                    position += ticks
+                    if position == span:
+                        break
+                cell += 1
+            durations = self.cache.setdefault(span, tuple(result))
+        return durations
+
+    '''
+    Span in ticks of a chord of rhythm beats. With anticipation a chord starts that many
+    ticks early (unless it is the first) and gives them up to the next one (unless it is
+    the last), so the spans still add up to the form
+    '''
+    def span(self, rhythm, first=False, last=False):
+        span = beats_to_ticks(rhythm)
+        if not first:
+            span += self.anticipation
+        if not last:
+            span -= self.anticipation
+        return span
+
+    def __repr__(self):
+        return 'RhythmTemplate({}, anticipation={})'.format([list(cell) for cell in self.cells], self.anticipation)
+
+RHYTHM_TEMPLATES = {
+    'eighths': RhythmTemplate([EIGHTH_CELL]),
+    'swing': RhythmTemplate([SWING_CELL]),
+    'triplets': RhythmTemplate([TRIPLET_CELL]),
+    'sixteenths': RhythmTemplate([SIXTEENTH_CELL]),
+    'bebop': RhythmTemplate([EIGHTH_CELL, EIGHTH_CELL, TRIPLET_CELL, EIGHTH_CELL]),
+    'runs': RhythmTemplate([EIGHTH_CELL, SIXTEENTH_CELL, EIGHTH_TWO_SIXTEENTHS_CELL, EIGHTH_CELL]),
+    'anticipated': RhythmTemplate([EIGHTH_CELL], anticipation=EIGHTH_TICKS),
+}
+
+# The RhythmTemplate for a template or the name of one, None for plain eighth notes
+def rhythm_template(rhythm):
+    if rhythm is None or isinstance(rhythm, RhythmTemplate):
+        return rhythm
+    template = RHYTHM_TEMPLATES.get(rhythm)
+    if template is None:
+        raise ValueError('unknown rhythm {!r}, expected one of {}'.format(rhythm, ', '.join(sorted(RHYTHM_TEMPLATES))))
+    return template
+
+'''
+line stretched or shortened to count notes. A longer line carries on from its start
+again, like use_rests=False repeats lines
+'''
+def fit_line(line, count):
+    if len(line) == count:
+        return line
+    return [line[i % len(line)] for i in range(count)]
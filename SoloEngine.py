@@ -0,0 +1,823 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# SoloEngine.py
+# Headless solo generation. Nothing in here touches the GUI, so it can be imported
+# and run from scripts and batch jobs as well as from GiantStepsv1.py
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import random
+from array import array
+from Intervals import *
+from NoteSequence import *
+from Rhythm import *
+from LickIndex import LickIndex
+from Profiling import profile_stage
+
+LOWEST_NOTE = BF4
+HIGHEST_NOTE = C6
+
+#----CONFIG CONSTANTS---------------------
+BEATS_PER_MEASURE = 4.0
+NUM_REPEATS_OF_FORM = 4
+MINOR_PENTATONIC_SCALE = [0, 2, 3, 7, 9]
+MAJOR_PENTATONIC_LINE = [0, 2, 4, 5, 7, 9, 11, 14]
+MINOR_PENTATONIC_LINE = [0, 2, 3, 5, 7, 9, 11, 14]
+
+#---MUSICAL CONSTANTS-----------------------------
+# See https://jythonmusic.me/api/midi-constants/scale/
+
+# Scale used over each chord quality
+CHORD_SCALES = {
+    tuple(MAJOR_SEVENTH): MAJOR_SCALE,
+    tuple(MINOR_SEVENTH): AEOLIAN_SCALE,
+    tuple(DOMINANT_SEVENTH): MIXOLYDIAN_SCALE,
+}
+
+# Inherit the Chord class and add a scale associated with each chord
+class JazzChord(Chord):
+    def __init__(self,root,quality,inversion=0):
+        Chord.__init__(self,root,quality,inversion=0)
+        self.quality = quality
+        assert(not any(note < 0 for note in self.pitches))
+        if tuple(quality) in CHORD_SCALES:
+            self.scale = CHORD_SCALES[tuple(quality)]
+
+    def dropOctave(self):
+        self.pitches = [x - 12 for x in self.pitches]
+    def raiseOctave(self):
+        self.pitches = [x + 12 for x in self.pitches]
+
+#================================================================================
+# FormChord is an immutable, interned chord for building forms. There is only ever
+# one FormChord for each (root, quality, inversion): form_chord() hands back the
+# existing one, so every chorus reuses the same objects and they can be shared
+# between threads. invert() and dropOctave() return other FormChords instead of
+# changing this one:
+#   chord = form_chord(B4, MAJOR_SEVENTH)  # pitches (B4, DS5, FS5, AS5)
+#   chord.invert(1)                        # pitches (DS5, FS5, AS5, B5)
+#   form_chord(B4, MAJOR_SEVENTH) is chord # True
+#================================================================================
+class FormChord(object):
+    __slots__ = ('root', 'quality', 'inversion', 'pitches', 'semitones', 'scale')
+
+    def __init__(self, root, quality, inversion=0):
+        chord = Chord(root, list(quality), inversion)
+        set_slot = object.__setattr__
+        set_slot(self, 'root', root)
+        set_slot(self, 'quality', tuple(quality))
+        set_slot(self, 'inversion', inversion)
+        set_slot(self, 'pitches', tuple(chord.pitches))
+        set_slot(self, 'semitones', tuple(chord.semitones))
+        set_slot(self, 'scale', CHORD_SCALES.get(tuple(quality)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FormChord is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('FormChord is immutable')
+
+    def invert(self, inversion=0):
+        total = self.inversion + inversion
+        octaves = total // len(self.quality)
+        return form_chord(self.root + OCTAVE * octaves, self.quality, total % len(self.quality))
+
+    def dropOctave(self):
+        return form_chord(self.root - OCTAVE, self.quality, self.inversion)
+
+    def raiseOctave(self):
+        return form_chord(self.root + OCTAVE, self.quality, self.inversion)
+
+    def __repr__(self):
+        return 'form_chord({}, {}, {})'.format(self.root, list(self.quality), self.inversion)
+
+internedChords = {}
+
+def form_chord(root, quality, inversion=0):
+    key = (root, tuple(quality), inversion % len(quality))
+    chord = internedChords.get(key)
+    if chord is None:
+        # setdefault so two threads interning the same chord still end up with one object
+        chord = internedChords.setdefault(key, FormChord(*key))
+    return chord
+
+# I.e. 5th above root of chord, root, root, 2nd above root, etc...
+# Taken from Coltrane's first chorus
+DEFAULT_DOWN_BEAT_SCALE_DEGREES = [1, 1, 1, 2, 1, 5, 3, 3, 3, 1, 7, 7, 4, 5, 5, 5,
+                        4, 5, 2, 1, 1, 1, 6, 1, 6, 3]
+
+ # TODO: Some statistical analysis on all of his choruses to pick with randomness the starting pitches
+DEFAULT_LINE_DIRECTIONS = [1, 1, 0, 0, 1, 0, 1, 1, 1, 1, 1, 0, 0, 0, 1, 0, 1, 0, 0, 1, 1, 0, 0, 1, 1, 0]
+
+#--------FORM----------------------
+# The chords are interned FormChords, so this returns the same objects every time
+def generate_chorus_changes():
+    return [
+    form_chord(B4, MAJOR_SEVENTH, 0),
+    form_chord(D4, DOMINANT_SEVENTH, 0),
+    form_chord(G4, MAJOR_SEVENTH, 0),
+    form_chord(BF4, DOMINANT_SEVENTH, 0),
+    form_chord(EF4, MAJOR_SEVENTH, 0),
+    form_chord(A4, MINOR_SEVENTH, 0),
+    form_chord(D4, DOMINANT_SEVENTH, 0),
+    form_chord(G4, MAJOR_SEVENTH, 0),
+    form_chord(BF4, DOMINANT_SEVENTH, 0),
+    form_chord(EF4, MAJOR_SEVENTH, 0),
+    form_chord(FS4, DOMINANT_SEVENTH, 0),
+    form_chord(B4, MAJOR_SEVENTH, 0),
+    form_chord(F4, MINOR_SEVENTH, 0),
+    form_chord(BF4, DOMINANT_SEVENTH, 0),
+    form_chord(EF4, MAJOR_SEVENTH, 0),
+    form_chord(A4, MINOR_SEVENTH, 0),
+    form_chord(D4, DOMINANT_SEVENTH, 0),
+    form_chord(G4, MAJOR_SEVENTH, 0),
+    form_chord(CS4, MINOR_SEVENTH, 0),
+    form_chord(FS4, DOMINANT_SEVENTH, 0),
+    form_chord(B4, MAJOR_SEVENTH, 0),
+    form_chord(F4, MINOR_SEVENTH, 0),
+    form_chord(BF4, DOMINANT_SEVENTH, 0),
+    form_chord(EF4, MAJOR_SEVENTH, 0),
+    form_chord(CS4, MINOR_SEVENTH, 0),
+    form_chord(FS4, DOMINANT_SEVENTH, 0)
+    ]
+
+def generate_chorus_chord_rhythms():
+    return [HN, HN, HN, HN, WN, HN, HN, HN, HN, HN, HN, WN, HN, HN, WN,
+            HN, HN, WN, HN, HN, WN, HN, HN, WN, HN, HN]
+
+'''
+Expand the form for a number of choruses. Returns fresh lists every time
+(chords, rhythms, degrees, directions) so callers can never share state
+'''
+def generate_form(num_choruses):
+    chords = []
+    rhythms = []
+    for i in range(num_choruses):
+        chords.extend(generate_chorus_changes())
+        rhythms.extend(generate_chorus_chord_rhythms())
+    degrees = DEFAULT_DOWN_BEAT_SCALE_DEGREES * num_choruses
+    directions = DEFAULT_LINE_DIRECTIONS * num_choruses
+    return chords, rhythms, degrees, directions
+
+# MUSIC --------------------------------------------------------------
+
+'''
+Algorithm
+
+Given a starting pitch and an ending pitch, return a list of 4 pitches connecting
+the two in some sort of musical way within the chord. Does not include the ending pitch
+
+Direction of 0 means descend
+sp is starting pitch, or starting scale degree
+use_rests pads short lines with RESTs instead of repeating them. Either way the line
+comes out num_notes long, cut short if the lick is longer (a chord of 1 or 3 beats)
+fold=False leaves the line where it is instead of moving it into range (see line_shift())
+'''
+def create_line(start, end, jazz_chord, direction=1, num_notes=4, sp=0, use_rests=True, fold=True):
+    if start < 0 or start == REST: # Return a silent line
+        return [REST] * num_notes
+
+    line = jazz_chord.pitches
+    assert not any(note < 0 for note in line), 'num_notes {} at chord {}'.format(num_notes, jazz_chord.pitches)
+
+    # If line starts on the root, arpeggiate a pentatonic scale lick. (Major) PENTATONIC_SCALE = [0, 2, 4, 7, 9]
+    if sp == 1:
+        line = []
+        if jazz_chord.scale is MAJOR_SCALE or jazz_chord.scale is MIXOLYDIAN_SCALE:
+            pentatonic = JazzChord(start, PENTATONIC_SCALE[:num_notes], 0)
+        else:
+            pentatonic = JazzChord(start, MINOR_PENTATONIC_SCALE[:num_notes], 0)
+
+        if num_notes > 4:
+            if direction == 1:
+                pentatonic = JazzChord(start, MAJOR_PENTATONIC_LINE[:num_notes], 0)
+            else:
+                pentatonic = JazzChord(start, MAJOR_PENTATONIC_LINE[:4], 0) # Rests will be added at the end of the function
+
+        if direction == 0:
+            pentatonic.invert(1)
+            pentatonic.dropOctave()
+            line = pentatonic.pitches
+            line.reverse()
+        else:
+            line = pentatonic.pitches
+
+    # If line starts on the 3rd, arpeggiate the appropriate inversion
+    elif sp == 3:
+        if direction == 0:
+            jazz_chord.invert(2)
+            jazz_chord.dropOctave()
+            line = jazz_chord.pitches
+            line.reverse()
+        else:
+            jazz_chord.invert(1)
+            line = jazz_chord.pitches
+
+    # If line starts on the 5th, arpeggiate the appropriate inversion
+    elif sp == 5:
+        line = []
+        if num_notes == 8:
+            # Hardcoding a line like in bar 12. Ignoring direction.
+            for i in range(4):
+                line.append(jazz_chord.pitches[0] + jazz_chord.scale[4 - i])
+            for i in range(3):
+                line.append(jazz_chord.pitches[0] + jazz_chord.scale[i])
+            line.append(jazz_chord.pitches[0] + jazz_chord.scale[4])
+        else:
+            if direction == 0:
+                jazz_chord.invert(3)
+                jazz_chord.dropOctave()
+                line = jazz_chord.pitches
+                line.reverse()
+            else:
+                jazz_chord.invert(2)
+                line = jazz_chord.pitches
+
+    # If line starts on the 7th, arpeggiate the appropriate inversion
+    elif sp == 7:
+        if direction == 0:
+            line = jazz_chord.pitches
+        else:
+            jazz_chord.invert(3)
+            line = jazz_chord.pitches
+
+    # If line starts on the 4th. TODO: Improve. I'm not in love with this
+    elif sp == 4:
+        line = []
+        for i in range(4): # Downward chromatic lick starting on the 4th
+            line.append(jazz_chord.pitches[0] + P4_ - i)
+
+    # If line starts on the 2nd
+    elif sp == 2:
+        line = []
+
+        # Descending line
+        line.append(jazz_chord.pitches[0] + jazz_chord.scale[1])
+        line.append(jazz_chord.pitches[0] + jazz_chord.scale[6] - 12)
+        line.append(jazz_chord.pitches[0] + jazz_chord.scale[5] - 12)
+        line.append(jazz_chord.pitches[0] + jazz_chord.scale[4] - 12)
+
+    # If line starts on the 6th
+    elif sp == 6:
+        line = []
+
+        # Descending
+        line.append(jazz_chord.pitches[0] + jazz_chord.scale[5] - 12)
+        line.append(jazz_chord.pitches[0] + jazz_chord.scale[4] - 12)
+        line.append(jazz_chord.pitches[0] + jazz_chord.scale[2] - 12)
+        line.append(jazz_chord.pitches[0])
+    else: # Invalid starting tone should not happen
+        assert(False)
+
+    if use_rests:
+        for i in range(num_notes - len(line)):
+            line.append(REST) # !WARNING: THIS ALSO APPENDS TO THE CHORD if one is used!
+        if len(line) > num_notes:
+            line = line[:num_notes]
+    else:
+        line = fit_line(line, num_notes) # Repeated, same as line * (num_notes // len(line)) for 4 and 8
+
+    if fold:
+        shift = line_shift(line)
+        if shift != 0:
+            line = [x + shift for x in line]
+
+    return line
+
+'''
+Octaves (in semitones) create_line() moves a line by to keep it in range: up an octave
+if any note is below low, then down one if any note is still above high.
+Note that a REST counts as below low, so lines padded with RESTs always go up first
+'''
+def line_shift(line, low=LOWEST_NOTE, high=HIGHEST_NOTE):
+    shift = 0
+    if any(note < low for note in line):
+        shift += 12
+    if any(note + shift > high for note in line):
+        shift -= 12
+    return shift
+
+'''
+Name of the branch create_line() takes for these arguments, for profiling
+'''
+def create_line_branch(jazz_chord, sp, direction=1, num_notes=4):
+    way = 'up' if direction == 1 else 'down'
+    if sp <= 0:
+        return 'rest'
+    elif sp == 1:
+        if num_notes > 4:
+            return 'major_pentatonic_line_' + way
+        if jazz_chord.scale is MAJOR_SCALE or jazz_chord.scale is MIXOLYDIAN_SCALE:
+            return 'major_pentatonic_' + way
+        return 'minor_pentatonic_' + way
+    elif sp == 3:
+        return 'third_arpeggio_' + way
+    elif sp == 5:
+        if num_notes == 8:
+            return 'fifth_bar_12_line'
+        return 'fifth_arpeggio_' + way
+    elif sp == 7:
+        return 'seventh_arpeggio_' + way
+    elif sp == 4:
+        return 'fourth_chromatic'
+    elif sp == 2:
+        return 'second_descending'
+    elif sp == 6:
+        return 'sixth_descending'
+    return 'invalid'
+
+#================================================================================
+# LINE TABLE
+# A line only depends on the chord (root and quality), the starting degree, the
+# direction, the number of notes and the rest mode. Each one is built once with
+# create_line() on a fresh chord and kept as an immutable tuple, so generating a
+# solo is one dictionary lookup per chord and the chords are never mutated
+#================================================================================
+lineTable = {}
+lineShifts = {} # How far each line in lineTable was moved into range, see line_shift()
+
+def _line_key(jazz_chord, sp, direction, num_notes, use_rests):
+    return (jazz_chord.root, tuple(jazz_chord.quality), sp, direction, num_notes, use_rests)
+
+def lookup_line(jazz_chord, sp, direction=1, num_notes=4, use_rests=True):
+    key = _line_key(jazz_chord, sp, direction, num_notes, use_rests)
+    line = lineTable.get(key)
+    if line is None:
+        start = REST
+        if sp > 0:
+            start = jazz_chord.root + jazz_chord.scale[sp - 1]
+        fresh_chord = JazzChord(jazz_chord.root, jazz_chord.quality)
+        line = create_line(start, 0, fresh_chord, direction, num_notes, sp, use_rests, fold=False)
+        shift = 0
+        if start != REST: # Silent lines are never moved
+            shift = line_shift(line)
+        lineShifts[key] = shift
+        line = tuple(x + shift for x in line) # Same as create_line() with fold=True
+        lineTable[key] = line
+    return line
+
+# Same as lookup_line() but also returns how far the line was moved into range: (line, shift)
+def lookup_line_shift(jazz_chord, sp, direction=1, num_notes=4, use_rests=True):
+    line = lookup_line(jazz_chord, sp, direction, num_notes, use_rests)
+    return line, lineShifts[_line_key(jazz_chord, sp, direction, num_notes, use_rests)]
+
+'''
+Fill the line table up front for every root between C4 and B4 (where the form's
+chords live). Lines for other roots are still added lazily by lookup_line()
+'''
+def build_line_table(roots=range(C4, C5), qualities=(MAJOR_SEVENTH, MINOR_SEVENTH, DOMINANT_SEVENTH),
+                     line_lengths=(4, 8)):
+    for root in roots:
+        for quality in qualities:
+            chord = JazzChord(root, quality)
+            for sp in range(8):
+                for direction in (0, 1):
+                    for num_notes in line_lengths:
+                        for use_rests in (True, False):
+                            lookup_line(chord, sp, direction, num_notes, use_rests)
+    return len(lineTable)
+
+#================================================================================
+# SMOOTHING
+# smooth_octaves() and normalize_rests() work on plain lists (Jython) or on
+# NumPy int arrays (CPython batch jobs), where they run without a per-note loop.
+#
+# Why the octave pass vectorizes: at note i the leap compared is
+#   current[i] - current[i+1] = original[i] - original[i+1] - 12 * shifted[i-4]
+# because both notes share the shifts made at i-3..i-1. So whether note i shifts
+# depends only on whether note i-4 did: shifted[i] = big_leap[i] or (leap[i] and shifted[i-4]).
+# Along each of the four chains (i mod 4) that recurrence is true when the last big
+# leap comes after the last note that is not a leap, which is two running maximums
+# Jython has no NumPy, so the list versions are always used there
+#================================================================================
+SMOOTHING_WINDOW = 4 # Number of pitches dropped after a leap up
+VECTORIZE_MIN_NOTES = 2048 # Below this converting to an array costs more than it saves
+
+def smooth_octaves(pitches):
+    if is_array(pitches):
+        return _smooth_octaves_array(pitches)
+
+    # Plain list. Modified in place
+    for i, pitch in enumerate(pitches):
+        if i >= len(pitches) - SMOOTHING_WINDOW:
+            break
+
+        if pitch < 0:
+            continue
+
+        distance = pitch - pitches[i + 1]
+
+        # Next pitch is below an octave away, so raise it up
+        # next_four = soloLinePitches[i + 1: i+ 4]
+        # if distance >= 12:
+        #     soloLinePitches[i + 1] += 12
+        #     soloLinePitches[i + 2] += 12
+        #     soloLinePitches[i + 3] += 12
+        #     soloLinePitches[i + 4] += 12
+
+        # Next pitch is above an octave up
+        if distance <= -12 :
+            pitches[i + 1] -= 12
+            pitches[i + 2] -= 12
+            pitches[i + 3] -= 12
+            pitches[i + 4] -= 12
+    return pitches
+
+def _smooth_octaves_array(pitches):
+    numpy = import_numpy()
+    original = numpy.asarray(pitches, dtype=numpy.int64) # int64 so REST - 48 can't wrap around
+    num_notes = len(original)
+    num_checked = num_notes - SMOOTHING_WINDOW # Notes that are compared with the next one
+    if num_checked <= 0:
+        return original.copy()
+
+    # A note can be dropped at most 4 times, so as long as every real pitch is at least
+    # 48 it stays non-negative and "pitch < 0" means the same thing before and after shifting
+    playing = original[:num_checked] >= 0
+    if original[original >= 0].min(initial=OCTAVE * SMOOTHING_WINDOW) < OCTAVE * SMOOTHING_WINDOW:
+        return numpy.array(smooth_octaves(original.tolist()), dtype=numpy.int64)
+
+    distance = original[:num_checked] - original[1:num_checked + 1]
+    big_leap = playing & (distance <= -12) # Shifts no matter what happened 4 notes earlier
+    leap = playing & (distance <= 0)       # Shifts only if the note 4 earlier did
+
+    # One row per step along the chains, one column per chain
+    rows = -(-num_checked // SMOOTHING_WINDOW)
+    padding = rows * SMOOTHING_WINDOW - num_checked
+    big_leap = numpy.append(big_leap, numpy.zeros(padding, dtype=bool)).reshape(rows, SMOOTHING_WINDOW)
+    leap = numpy.append(leap, numpy.zeros(padding, dtype=bool)).reshape(rows, SMOOTHING_WINDOW)
+    steps = numpy.arange(rows)[:, None]
+    last_big_leap = numpy.maximum.accumulate(numpy.where(big_leap, steps, -1), axis=0)
+    last_break = numpy.maximum.accumulate(numpy.where(leap, -1, steps), axis=0)
+    shifted = (last_big_leap > last_break).reshape(-1)[:num_checked]
+
+    # Each note drops an octave for every shift made in the 4 notes before it
+    shift_counts = numpy.concatenate(([0], numpy.cumsum(shifted)))
+    notes = numpy.arange(num_notes)
+    drops = (shift_counts[numpy.minimum(notes, num_checked)]
+             - shift_counts[numpy.clip(notes - SMOOTHING_WINDOW, 0, num_checked)])
+    return original - OCTAVE * drops
+
+# For some reason, Jython needs me to redefine the RESTs as RESTs right here or else it
+# Throws an error. No idea why but this fixes it...
+# rest is the value stored for a REST, REST_PITCH for the arrays in NoteSequence
+def normalize_rests(pitches, rest=REST):
+    if is_array(pitches):
+        return import_numpy().where(pitches < 0, rest, pitches)
+
+    # Plain list or array. Modified in place
+    for i, pitch in enumerate(pitches):
+        if pitch < 0:
+            pitches[i] = rest
+    return pitches
+
+#================================================================================
+# SOLOIST
+#================================================================================
+
+'''
+Line for chords[i]. With target_lines it's searched for to lead into the next chord's
+downbeat (see LineSearch.py), otherwise it's create_line()'s. next_chord and next_sp are
+the chord and degree after this one, None and 0 at the end of the solo
+'''
+def solo_line(chord, sp, direction, line_length, use_rests=True, target_lines=False, next_chord=None, next_sp=0):
+    if target_lines:
+        from LineSearch import lookup_target_line # LineSearch imports this module
+        return lookup_target_line(chord, sp, direction, line_length, next_chord, next_sp)
+    return lookup_line(chord, sp, direction, line_length, use_rests)
+
+'''
+Same as solo_line() but plays as few of the licks in licks (a LickIndex) again as it
+can. If solo_line()'s line repeats a recent lick, the same degree going the other way
+and the line of the other kind (searched or created) are tried too, and the one that
+repeats fewest is played, the first of them on a tie. The line is added to licks.
+Returns (line, direction, target_lines) of the line played
+'''
+def fresh_solo_line(licks, chord, sp, direction, line_length, use_rests=True, target_lines=False, next_chord=None,
+                    next_sp=0):
+    line = solo_line(chord, sp, direction, line_length, use_rests, target_lines, next_chord, next_sp)
+    played = (direction, target_lines)
+    fewest = licks.count_repeats(line)
+    if fewest > 0 and sp > 0:
+        for other_direction, other_target in ((1 - direction, target_lines), (direction, not target_lines),
+                                              (1 - direction, not target_lines)):
+            candidate = solo_line(chord, sp, other_direction, line_length, use_rests, other_target, next_chord, next_sp)
+            repeats = licks.count_repeats(candidate)
+            if repeats < fewest:
+                line, fewest = candidate, repeats
+                played = (other_direction, other_target)
+                if fewest == 0:
+                    break
+    licks.extend(line)
+    return line, played[0], played[1]
+
+'''
+Generate a solo over the given changes. Everything the solo depends on is passed in:
+chords and rhythms describe the form, degrees and directions pick the line for each
+chord. rhythm is a RhythmTemplate or the name of one (see Rhythm.py), None for eighth
+notes. With licks (a LickIndex) each line is chosen to repeat as little as it can, see
+fresh_solo_line(). Returns the solo as a NoteSequence
+'''
+def generate_solo_notes(chords, rhythms, degrees, directions, use_rests=True, profiler=None, target_lines=False,
+                        rhythm=None, licks=None):
+    notes = NoteSequence()
+    template = rhythm_template(rhythm)
+
+    # -----------Basic first pass. Arpeggiate-------------
+    with profile_stage(profiler, 'arpeggiate') as stage:
+        table_size = len(lineTable)
+        for i, chord in enumerate(chords):
+            line_length = eighth_notes(rhythms[i])
+
+            # Look up the line for this chord. Built the first time it is needed
+            next_chord, next_sp = None, 0
+            if i + 1 < len(chords):
+                next_chord, next_sp = chords[i + 1], degrees[i + 1]
+            direction, target = directions[i], target_lines # Of the line played
+            if licks is None:
+                line = solo_line(chord, degrees[i], direction, line_length, use_rests, target, next_chord, next_sp)
+            else:
+                line, direction, target = fresh_solo_line(licks, chord, degrees[i], direction, line_length, use_rests,
+                                                          target, next_chord, next_sp)
+            assert len(line) == line_length, 'Length of line is not {}. The line is {} at chord {}'.format(line_length, line, i)
+
+            # Add this line to the solo
+            if template is None:
+                notes.extend_line(line, EN)
+            else:
+                durations = template.durations(template.span(rhythms[i], i == 0, i == len(chords) - 1))
+                notes.extend_ticks(fit_line(line, len(durations)), durations)
+
+            if profiler is not None:
+                branch = 'target_search' if target and degrees[i] > 0 else create_line_branch(
+                    chord, degrees[i], direction, line_length)
+                profiler.count_branch(degrees[i], branch)
+        stage.notes = len(notes)
+
+    if profiler is not None:
+        profiler.count('chords', len(chords))
+        profiler.count('notes', len(notes))
+        profiler.count('lines_created', len(lineTable) - table_size)
+        profiler.count('note_bytes', notes.nbytes())
+        if licks is not None:
+            profiler.count('licks', licks.licks)
+            profiler.count('lick_repeats', licks.repeats)
+
+    # -----------Second pass. Smooth out octaves-------------
+    # ---------Complete solo------------------------
+    numpy = numpy_for(len(notes), VECTORIZE_MIN_NOTES)
+    if numpy is not None:
+        pitches = numpy.frombuffer(notes.pitches, dtype=numpy.int8).astype(numpy.int64)
+        with profile_stage(profiler, 'smooth_octaves', len(notes)):
+            pitches = smooth_octaves(pitches)
+        with profile_stage(profiler, 'normalize_rests', len(notes)):
+            pitches = normalize_rests(pitches, REST_PITCH)
+        notes.pitches = array('b', pitches.astype(numpy.int8).tobytes())
+    else:
+        with profile_stage(profiler, 'smooth_octaves', len(notes)):
+            smooth_octaves(notes.pitches)
+        with profile_stage(profiler, 'normalize_rests', len(notes)):
+            normalize_rests(notes.pitches, REST_PITCH)
+
+    return notes
+
+'''
+Same as generate_solo_notes() but returns (pitches, rhythms) as two new lists, ready
+for Phrase.addNoteList
+'''
+def generate_solo(chords, rhythms, degrees, directions, use_rests=True, profiler=None, target_lines=False,
+                  rhythm=None, licks=None):
+    return generate_solo_notes(chords, rhythms, degrees, directions, use_rests, profiler, target_lines,
+                               rhythm, licks).to_note_list()
+
+#================================================================================
+# STREAMING
+# iter_solo() plays the form chorus after chorus and yields notes as soon as they
+# are final, so memory stays the same no matter how many choruses are played
+# (num_choruses=None never stops, for practice loops). The octave smoothing only
+# ever looks 4 notes ahead, so OctaveSmoother holds back just those notes
+#================================================================================
+
+# Streaming version of smooth_octaves() + normalize_rests(). push() takes the next
+# pitch and returns the pitch that is now final, or None while it is still filling up
+class OctaveSmoother(object):
+    def __init__(self, rest=REST):
+        self.rest = rest
+        self.pending = [] # Notes that a later leap can still move
+
+    def _settle(self, pitch):
+        if pitch < 0:
+            return self.rest
+        return pitch
+
+    def push(self, pitch):
+        pending = self.pending
+        pending.append(pitch)
+        if len(pending) <= SMOOTHING_WINDOW:
+            return None
+
+        # pending[0] has 4 notes after it, so it is not one of the last 4 of the solo
+        # and can be compared with the next pitch like in smooth_octaves()
+        first = pending[0]
+        if first >= 0 and first - pending[1] <= -12:
+            for i in range(1, SMOOTHING_WINDOW + 1):
+                pending[i] -= 12
+        return self._settle(pending.pop(0))
+
+    # The last 4 notes of a solo are never compared, they just come out as they are
+    def flush(self):
+        settled = [self._settle(pitch) for pitch in self.pending]
+        self.pending = []
+        return settled
+
+'''
+Yield the solo one note at a time as (pitch, duration). chords, rhythms, degrees and
+directions describe a single chorus, which is repeated num_choruses times
+'''
+def iter_solo(chords, rhythms, degrees, directions, use_rests=True, num_choruses=1, target_lines=False, rhythm=None):
+    return iter_solo_tables(chords, rhythms, repeat_tables(degrees, directions, num_choruses), use_rests,
+                            target_lines, rhythm)
+
+def repeat_tables(degrees, directions, num_choruses=1):
+    chorus = 0
+    while num_choruses is None or chorus < num_choruses:
+        yield degrees, directions
+        chorus += 1
+
+'''
+Same as iter_solo() but the degrees and directions of each chorus come from tables, an
+iterator of (degrees, directions) with one entry per chorus. The solo ends with tables.
+The next chorus's tables are taken one chorus early, so with target_lines the last line
+of a chorus can lead into the first downbeat of the next (and a rhythm can anticipate it).
+licks is a LickIndex to avoid repeating licks with, like generate_solo_notes()
+'''
+def iter_solo_tables(chords, rhythms, tables, use_rests=True, target_lines=False, rhythm=None, licks=None):
+    template = rhythm_template(rhythm)
+    smoother = OctaveSmoother()
+    durations = [] # Ticks of the notes the smoother is holding back, in order
+    tables = iter(tables)
+    current = next(tables, None)
+    first = True
+    while current is not None:
+        degrees, directions = current
+        following = next(tables, None)
+        for i, chord in enumerate(chords):
+            line_length = eighth_notes(rhythms[i])
+            next_chord, next_sp = None, 0
+            if i + 1 < len(chords):
+                next_chord, next_sp = chords[i + 1], degrees[i + 1]
+            elif following is not None:
+                next_chord, next_sp = chords[0], following[0][0]
+            if licks is None:
+                line = solo_line(chord, degrees[i], directions[i], line_length, use_rests, target_lines,
+                                 next_chord, next_sp)
+            else:
+                line = fresh_solo_line(licks, chord, degrees[i], directions[i], line_length, use_rests,
+                                       target_lines, next_chord, next_sp)[0]
+            # A line of the wrong length would put the solo out of step with the comping
+            assert len(line) == line_length, 'Length of line is not {}. The line is {} at chord {}'.format(line_length, line, i)
+            if template is None:
+                for pitch in line:
+                    settled = smoother.push(pitch)
+                    if settled is not None:
+                        yield settled, EN
+            else:
+                chord_durations = template.durations(template.span(rhythms[i], first, next_chord is None))
+                durations.extend(chord_durations)
+                for pitch in fit_line(line, len(chord_durations)):
+                    settled = smoother.push(pitch)
+                    if settled is not None:
+                        yield settled, ticks_to_beats(durations.pop(0))
+            first = False
+        current = following
+
+    for settled in smoother.flush():
+        if template is None:
+            yield settled, EN
+        else:
+            yield settled, ticks_to_beats(durations.pop(0))
+
+'''
+Same as iter_solo() but yields a NoteSequence per chorus
+'''
+def iter_solo_choruses(chords, rhythms, degrees, directions, use_rests=True, num_choruses=1):
+    notes_per_chorus = sum(eighth_notes(rhythm) for rhythm in rhythms)
+    chorus = NoteSequence()
+    for pitch, duration in iter_solo(chords, rhythms, degrees, directions, use_rests, num_choruses):
+        chorus.append(pitch, duration)
+        if len(chorus) == notes_per_chorus:
+            yield chorus
+            chorus = NoteSequence()
+    if len(chorus) > 0:
+        yield chorus
+
+#================================================================================
+# SESSION
+# SoloGenerator holds everything one generation needs. Make a new one per request:
+# nothing is shared between generators except the (read only) line table, so they
+# can run side by side on different threads and every call costs the same
+#   generator = SoloGenerator(num_choruses=3, use_rests=True)
+#   solo, comping = generator.generate()
+#
+# Anything random in a generation must draw from generator.random, which is seeded
+# from seed, so the same seed always gives the same solo on any machine or process.
+# With a model (see DownbeatModel.py) the degrees and directions are drawn from it
+# chord by chord instead of repeating the same tables every chorus.
+# voice_leading=True comps with the voicings from Comping.voice_lead_cycle() instead of
+# every chord in root position, target_lines=True solos with LineSearch's lines,
+# rhythm plays the lines to a RhythmTemplate (see Rhythm.py) instead of in eighth notes,
+# and avoid_repeats=True swaps lines that would repeat a recent lick (see LickIndex.py).
+# generator.licks is the LickIndex of the last solo made, for its repetition stats
+#================================================================================
+class SoloGenerator(object):
+    def __init__(self, num_choruses=1, use_rests=True, chords=None, rhythms=None, degrees=None, directions=None,
+                 seed=None, model=None, profiler=None, voice_leading=False, target_lines=False, rhythm=None,
+                 avoid_repeats=False):
+        self.num_choruses = num_choruses
+        self.use_rests = use_rests
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.model = model
+        self.profiler = profiler # See Profiling.py. None turns profiling off
+        self.voice_leading = voice_leading
+        self.target_lines = target_lines
+        self.rhythm = rhythm_template(rhythm)
+        self.avoid_repeats = avoid_repeats
+        self.licks = None
+
+        # One chorus of the form. Defaults to Giant Steps and Coltrane's first chorus
+        self.chords = chords if chords is not None else generate_chorus_changes()
+        self.rhythms = rhythms if rhythms is not None else generate_chorus_chord_rhythms()
+        self.degrees = list(degrees if degrees is not None else DEFAULT_DOWN_BEAT_SCALE_DEGREES)
+        self.directions = list(directions if directions is not None else DEFAULT_LINE_DIRECTIONS)
+
+    # (degrees, directions) for each chorus in turn
+    def chorus_tables(self):
+        if self.model is None:
+            for tables in repeat_tables(self.degrees, self.directions, self.num_choruses):
+                yield tables
+            return
+
+        previous = (None, None)
+        chorus = 0
+        while self.num_choruses is None or chorus < self.num_choruses:
+            degrees, directions = self.model.sample(self.chords, self.random, previous)
+            previous = (degrees[-1], directions[-1])
+            yield degrees, directions
+            chorus += 1
+
+    def solo(self):
+        n = self.num_choruses
+        degrees = []
+        directions = []
+        for chorus_degrees, chorus_directions in self.chorus_tables():
+            degrees.extend(chorus_degrees)
+            directions.extend(chorus_directions)
+        return generate_solo_notes(self.chords * n, self.rhythms * n, degrees, directions, self.use_rests,
+                                   self.profiler, self.target_lines, self.rhythm, self.new_licks())
+
+    def iter_solo(self):
+        return iter_solo_tables(self.chords, self.rhythms, self.chorus_tables(), self.use_rests, self.target_lines,
+                                self.rhythm, self.new_licks())
+
+    # A fresh LickIndex for the next solo if avoiding repeats, otherwise None
+    def new_licks(self):
+        self.licks = LickIndex() if self.avoid_repeats else None
+        return self.licks
+
+    # Pitches the piano plays for each chord of a chorus
+    def voicings(self):
+        if self.voice_leading:
+            from Comping import voice_lead_cycle # Comping imports this module
+            return voice_lead_cycle(self.chords)
+        return [chord.pitches for chord in self.chords]
+
+    # (pitches, duration) of every chord in turn, forever if num_choruses is None
+    def iter_comping(self):
+        voicings = self.voicings()
+        chorus = 0
+        while self.num_choruses is None or chorus < self.num_choruses:
+            for pitches, rhythm in zip(voicings, self.rhythms):
+                yield pitches, rhythm
+            chorus += 1
+
+    def comping(self):
+        comping = ChordSequence()
+        with profile_stage(self.profiler, 'comping') as stage:
+            for pitches, rhythm in self.iter_comping():
+                comping.append(pitches, rhythm)
+            stage.notes = len(comping.pitches)
+        return comping
+
+    def generate(self):
+        return self.solo(), self.comping()
+
+    '''
+    Everything that decides the notes, to cache them by (see GenerationCache.py). The
+    seed only matters with a model, and None means the notes can't be cached: a model
+    with no seed gives different notes every time
+    '''
+    def cache_key(self):
+        if self.model is not None and self.seed is None:
+            return None
+        seed = self.seed if self.model is not None else None
+        return (tuple(self.chords), tuple(self.rhythms), tuple(self.degrees), tuple(self.directions),
+                self.num_choruses, self.use_rests, self.model, seed, self.voice_leading, self.target_lines,
+                self.rhythm, self.avoid_repeats)
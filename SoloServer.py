@@ -0,0 +1,328 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# SoloServer.py
+# A local HTTP/JSON server for the practice app frontends. Takes the GUI's options and
+# answers with a MIDI file or the note arrays:
+#   python SoloServer.py --port 8765 --workers 2
+#   POST /solo  {"choruses": 9, "bpm": 286, "rests": true, "accompaniment": true, "format": "midi"}
+#               -> audio/midi, or with "format": "notes" a JSON object of the arrays
+#   GET /stats  -> requests, latency p50/p99, throughput, coalesced requests, batches
+#
+# The event loop never generates anything itself. Requests for the same options that
+# arrive while one is being generated wait for that one (coalescing), recent answers
+# are kept in a GenerationCache, and the rest are queued and handed to a process pool
+# in batches: up to batch_size requests, or whatever arrived within batch_window
+# seconds of the first, per round trip to a worker.
+# benchmarks/bench_server.py is a load generator for it.
+# Python 3 only (asyncio)
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from SoloEngine import *
+from MidiWriter import midi_bytes
+from GenerationCache import GenerationCache
+from Batch import MIN_CHORUSES, MAX_CHORUSES
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_BPM = 286.0
+BPM_RANGE = (20.0, 600.0)  # Tempos a request can ask for
+FORMATS = ('midi', 'notes')
+BATCH_SIZE = 8
+BATCH_WINDOW = 0.002       # Seconds to wait for more requests to join a batch
+CACHE_BYTES = 32 * 1024 * 1024
+LATENCY_SAMPLES = 10000    # Latest request latencies kept for the percentiles
+MAX_BODY_BYTES = 64 * 1024
+
+# Everything that decides an answer, so equal requests can share one
+SoloRequest = namedtuple('SoloRequest', 'num_choruses bpm use_rests accompaniment format')
+
+class RequestError(ValueError):
+    pass
+
+# A true/false option. Only JSON booleans: bool() would make the string "false" true
+def _flag(options, name, default):
+    value = options.get(name, default)
+    if not isinstance(value, bool):
+        raise RequestError('{} must be true or false'.format(name))
+    return value
+
+def parse_request(options):
+    if not isinstance(options, dict):
+        raise RequestError('expected a JSON object of options')
+    # JSON numbers only: int() would round 2.7 down and take "3" and true
+    num_choruses = options.get('choruses', 1)
+    if isinstance(num_choruses, bool) or not isinstance(num_choruses, int):
+        raise RequestError('choruses must be a whole number')
+    bpm = options.get('bpm', DEFAULT_BPM)
+    if isinstance(bpm, bool) or not isinstance(bpm, (int, float)):
+        raise RequestError('bpm must be a number')
+    bpm = float(bpm)
+    if not MIN_CHORUSES <= num_choruses <= MAX_CHORUSES:
+        raise RequestError('choruses must be {} to {}'.format(MIN_CHORUSES, MAX_CHORUSES))
+    if not BPM_RANGE[0] <= bpm <= BPM_RANGE[1]: # Also rules out NaN and Infinity, which json.loads() accepts
+        raise RequestError('bpm must be {:g} to {:g}'.format(*BPM_RANGE))
+    output_format = options.get('format', 'midi')
+    if output_format not in FORMATS:
+        raise RequestError('format must be one of {}'.format(', '.join(FORMATS)))
+    return SoloRequest(num_choruses, bpm, _flag(options, 'rests', True), _flag(options, 'accompaniment', True),
+                       output_format)
+
+#================================================================================
+# WORKERS
+# Run in the pool's processes. Each keeps its own cache of notes, so requests that only
+# differ in BPM, accompaniment or format don't generate the solo again
+#================================================================================
+workerCache = GenerationCache()
+
+def notes_json(solo, comping, request):
+    result = {'ticks_per_beat': TICKS_PER_BEAT, 'bpm': request.bpm, 'rest': REST_PITCH,
+              'pitches': solo.pitches.tolist(), 'ticks': solo.ticks().tolist()}
+    if comping is not None:
+        result['comping'] = {'pitches': comping.pitches.tolist(), 'chord_ends': comping.chord_ends.tolist(),
+                             'ticks': comping.durations.tolist()}
+    return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+def render_request(request):
+    solo, comping = workerCache.generate(SoloGenerator(request.num_choruses, request.use_rests))
+    if not request.accompaniment:
+        comping = None
+    if request.format == 'notes':
+        return notes_json(solo, comping, request)
+    return midi_bytes(solo, comping, request.bpm)
+
+'''
+The answers to a batch of requests, in order: (True, data), or (False, message) for a
+request that failed, so it doesn't fail the others in its batch
+'''
+def render_requests(requests):
+    answers = []
+    for request in requests:
+        try:
+            answers.append((True, render_request(request)))
+        except Exception as error:
+            answers.append((False, '{}: {}'.format(type(error).__name__, error)))
+    return answers
+
+#================================================================================
+# STATS
+#================================================================================
+# Nearest rank percentile of sorted values, q from 0 to 100
+def percentile(values, q):
+    if not values:
+        return 0.0
+    rank = int(round(q / 100.0 * (len(values) - 1)))
+    return values[rank]
+
+def latency_stats(latencies):
+    ordered = sorted(latencies)
+    return {'p50_ms': percentile(ordered, 50) * 1000, 'p99_ms': percentile(ordered, 99) * 1000,
+            'max_ms': (ordered[-1] if ordered else 0.0) * 1000}
+
+#================================================================================
+# SERVER
+#================================================================================
+CONTENT_TYPES = {'midi': 'audio/midi', 'notes': 'application/json'}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+class SoloServer(object):
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, batch_size=BATCH_SIZE,
+                 batch_window=BATCH_WINDOW, cache_bytes=CACHE_BYTES, executor=None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.cache = GenerationCache(max_bytes=cache_bytes)
+        self.executor = executor # None starts a ProcessPoolExecutor of workers processes
+        self.pending = {}        # SoloRequest -> future of its answer, while it is being made
+        self.tasks = set()       # Batches running, so they aren't garbage collected
+        self.connections = {}    # Writer of every open connection -> the task handling it
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.completed = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.errors = 0
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.started_at = self.loop.time()
+        self.queue = asyncio.Queue()
+        if self.executor is None:
+            # Spawned, not forked: a forked worker would hold on to the client sockets open at
+            # the time, and a closed connection wouldn't be closed until that worker exited
+            self.executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'))
+            # Start the workers (and their imports) now rather than on the first requests
+            workers = self.workers or multiprocessing.cpu_count()
+            await asyncio.gather(*[self.loop.run_in_executor(self.executor, render_requests, [])
+                                   for i in range(workers)])
+        self.batcher = asyncio.ensure_future(self.run_batches())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1] # The real one if port was 0
+        return self
+
+    async def close(self):
+        self.server.close()
+        # Closing the connections ends their handlers, which are waiting for another request
+        for writer in list(self.connections):
+            writer.close()
+        if self.connections:
+            await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        if self.tasks:
+            await asyncio.wait(list(self.tasks))
+        self.executor.shutdown()
+
+    '''
+    The answer to request: from the cache, from an identical request already being
+    made, or queued for the next batch
+    '''
+    async def solo(self, request):
+        cached = self.cache.get(request)
+        if cached is not None:
+            return cached
+        future = self.pending.get(request)
+        if future is None:
+            future = self.loop.create_future()
+            self.pending[request] = future
+            self.queue.put_nowait(request)
+        else:
+            self.coalesced += 1
+        # shield so a client that goes away doesn't cancel the answer for everyone else
+        return await asyncio.shield(future)
+
+    async def run_batches(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = self.loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    timeout = deadline - self.loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            task = asyncio.ensure_future(self.run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run_batch(self, batch):
+        self.batches += 1
+        try:
+            answers = await self.loop.run_in_executor(self.executor, render_requests, batch)
+        except Exception as error:
+            for request in batch:
+                self.pending.pop(request).set_exception(error)
+            return
+        for request, (ok, data) in zip(batch, answers):
+            future = self.pending.pop(request)
+            if ok:
+                self.cache.put(request, data, len(data))
+                future.set_result(data)
+            else:
+                future.set_exception(RuntimeError(data))
+
+    def stats(self):
+        elapsed = self.loop.time() - self.started_at
+        stats = {'requests': self.completed, 'errors': self.errors, 'coalesced': self.coalesced,
+                 'cache_hits': self.cache.hits, 'batches': self.batches,
+                 'requests_per_second': self.completed / elapsed if elapsed > 0 else 0.0}
+        stats.update(latency_stats(self.latencies))
+        return stats
+
+    # (status, content type, body) for one HTTP request
+    async def respond(self, method, path, body):
+        if path == '/stats':
+            return 200, 'application/json', json.dumps(self.stats()).encode('utf-8')
+        if path != '/solo':
+            return 404, 'application/json', b'{"error":"not found"}'
+        if method != 'POST':
+            return 405, 'application/json', b'{"error":"POST the options as JSON"}'
+
+        start_time = self.loop.time()
+        try:
+            request = parse_request(json.loads(body.decode('utf-8') or '{}'))
+        except (RequestError, ValueError) as error:
+            self.errors += 1
+            return 400, 'application/json', json.dumps({'error': str(error)}).encode('utf-8')
+        try:
+            data = await self.solo(request)
+        except Exception as error:
+            self.errors += 1
+            return 500, 'application/json', json.dumps({'error': str(error)}).encode('utf-8')
+        self.latencies.append(self.loop.time() - start_time)
+        self.completed += 1
+        return 200, CONTENT_TYPES[request.format], data
+
+    # One connection, any number of requests on it (HTTP/1.1 keep-alive)
+    async def handle(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0) or 0)
+                if len(parts) != 3:
+                    status, content_type, payload = 400, 'application/json', b'{"error":"bad request line"}'
+                elif length > MAX_BODY_BYTES:
+                    status, content_type, payload = 413, 'application/json', b'{"error":"request too large"}'
+                else:
+                    body = await reader.readexactly(length)
+                    status, content_type, payload = await self.respond(parts[0], parts[1].split('?')[0], body)
+
+                keep_alive = (len(parts) == 3 and parts[2] == 'HTTP/1.1' and status != 413
+                              and headers.get('connection', '').lower() != 'close')
+                head = 'HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n'.format(
+                    status, REASONS[status], content_type, len(payload), 'keep-alive' if keep_alive else 'close')
+                writer.write(head.encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            del self.connections[writer]
+            writer.close()
+
+async def serve(host, port, workers):
+    server = await SoloServer(host, port, workers).start()
+    sys.stderr.write('serving on http://{}:{}\n'.format(host, server.port))
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve generated solos over HTTP/JSON')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help='generating processes (default: every core)')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
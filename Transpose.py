@@ -0,0 +1,194 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# Transpose.py
+# The same solo in all 12 keys (or any of them) from a single generation.
+#
+# Every line is looked up once, in the original key, with the octave create_line()
+# moved it by taken back off. The unmoved lines are then transposed to every key at
+# once as one (keys x notes) array, and moved into range line by line exactly like
+# create_line() does, for all keys together. Only the octave smoothing is run per key.
+# So a row comes out the same as generating over the transposed changes:
+#   solos = solo_in_keys(SoloGenerator(3))                # 12 NoteSequences, key 0 first
+#   solos = solo_in_keys(generator, keys=[0, 5, 10], pitch_range=INSTRUMENT_RANGES['tenor_sax'])
+#
+# Keys are semitones above the original key (0-11). Each is played in the nearest
+# direction, 6 semitones up at most and 5 down.
+# With a pitch_range, lines are instead moved by as many octaves as it takes to fit the
+# range, RESTs aside, and the top of the range wins if a line is wider than it. Notes the
+# octave smoothing then drops under the range are put back up by octaves
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from array import array
+from SoloEngine import *
+
+numpy = import_numpy() # Every key is folded at once with NumPy, so it is wanted straight away
+
+ALL_KEYS = tuple(range(12))
+
+# (lowest, highest) sounding pitch to keep lines in, instead of create_line()'s range
+INSTRUMENT_RANGES = {
+    'tenor_sax': (AF2, E5),
+    'alto_sax': (DF3, AF5),
+    'trumpet': (E3, BF5),
+}
+
+# Semitones to move the original key by to get to key
+def key_offset(key):
+    key %= OCTAVE
+    if key > OCTAVE // 2:
+        return key - OCTAVE
+    return key
+
+'''
+The solo's lines before they were moved into range. Returns (pitches, line_lengths, notes):
+pitches has REST as REST_PITCH, notes is the template NoteSequence with the durations
+'''
+def unfolded_lines(chords, rhythms, degrees, directions, use_rests=True):
+    pitches = array('b')
+    line_lengths = []
+    notes = NoteSequence()
+    for i, chord in enumerate(chords):
+        line_length = eighth_notes(rhythms[i])
+        line, shift = lookup_line_shift(chord, degrees[i], directions[i], line_length, use_rests)
+        pitches.extend([REST_PITCH if pitch < 0 else pitch - shift for pitch in line])
+        line_lengths.append(len(line))
+        notes.extend_line(line, EN)
+    return pitches, line_lengths, notes
+
+'''
+Transpose unfolded lines to every key offset and move each line into range, the way
+line_shift() does or into pitch_range (lowest, highest) if given. Returns a
+(len(offsets) x notes) int16 array with RESTs as REST_PITCH
+'''
+def fold_keys(pitches, line_lengths, offsets, pitch_range=None):
+    original = numpy.asarray(pitches, dtype=numpy.int16)
+    rests = original < 0
+    keyed = original[None, :] + numpy.asarray(offsets, dtype=numpy.int16)[:, None]
+
+    lengths = numpy.asarray(line_lengths, dtype=numpy.int64)
+    starts = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))
+    playing = lengths > 0
+    starts = starts[playing]
+    lengths = lengths[playing]
+
+    if pitch_range is None:
+        # A REST counts as below the range, like in create_line()
+        low, high = LOWEST_NOTE, HIGHEST_NOTE
+        lowest = numpy.minimum.reduceat(numpy.where(rests, low - 1, keyed), starts, axis=1)
+        highest = numpy.maximum.reduceat(numpy.where(rests, low - 1, keyed), starts, axis=1)
+        shift = numpy.where(lowest < low, OCTAVE, 0)
+        shift -= numpy.where(highest + shift > high, OCTAVE, 0)
+    else:
+        low, high = pitch_range
+        lowest = numpy.minimum.reduceat(numpy.where(rests, high, keyed), starts, axis=1)
+        highest = numpy.maximum.reduceat(numpy.where(rests, low, keyed), starts, axis=1)
+        shift = OCTAVE * numpy.maximum(0, -((lowest - low) // OCTAVE))          # Octaves up to reach low
+        shift -= OCTAVE * numpy.maximum(0, -((high - highest - shift) // OCTAVE)) # Then down to get under high
+
+    # Lines that are nothing but RESTs were never moved
+    silent = numpy.logical_and.reduceat(rests, starts)
+    shift[:, silent] = 0
+    return numpy.where(rests, REST_PITCH, keyed + numpy.repeat(shift, lengths, axis=1))
+
+# Octaves to move a line by to fit it into pitch_range, see fold_keys()
+def range_shift(line, pitch_range):
+    low, high = pitch_range
+    notes = [pitch for pitch in line if pitch != REST]
+    shift = OCTAVE * max(0, -((min(notes) - low) // OCTAVE))
+    return shift - OCTAVE * max(0, -((high - max(notes) - shift) // OCTAVE))
+
+# Plain list version of fold_keys() for Jython, one list of pitches per offset
+def _fold_keys_lists(pitches, line_lengths, offsets, pitch_range):
+    rows = []
+    for offset in offsets:
+        row = []
+        start = 0
+        for length in line_lengths:
+            line = [pitch + offset if pitch >= 0 else REST for pitch in pitches[start:start + length]]
+            shift = 0
+            if any(pitch != REST for pitch in line):
+                if pitch_range is None:
+                    shift = line_shift(line)
+                else:
+                    shift = range_shift(line, pitch_range)
+            row.extend([pitch + shift if pitch != REST else REST_PITCH for pitch in line])
+            start += length
+        rows.append(row)
+    return rows
+
+'''
+Raise every note under low by as many octaves as it takes to reach it. For notes the
+octave smoothing dropped out of a pitch_range. RESTs (negative) are left alone
+'''
+def raise_into_range(pitches, low):
+    if is_array(pitches):
+        below = (pitches >= 0) & (pitches < low)
+        return numpy.where(below, pitches + OCTAVE * (-((pitches - low) // OCTAVE)), pitches)
+
+    # Plain list. Modified in place
+    for i, pitch in enumerate(pitches):
+        if 0 <= pitch < low:
+            pitches[i] = pitch + OCTAVE * (-((pitch - low) // OCTAVE))
+    return pitches
+
+def _keyed_notes(template, pitches):
+    notes = NoteSequence()
+    if is_array(pitches):
+        notes.pitches = array('b', pitches.astype(numpy.int8).tobytes())
+    else:
+        notes.pitches = array('b', pitches)
+    notes.run_ticks = array('i', template.run_ticks)
+    notes.run_ends = array('i', template.run_ends)
+    return notes
+
+'''
+Same as generate_solo_notes() but in several keys at once. pitch_range is (lowest,
+highest) for the lines, see INSTRUMENT_RANGES. Returns one NoteSequence per key
+'''
+def generate_solo_keys(chords, rhythms, degrees, directions, use_rests=True, keys=ALL_KEYS, pitch_range=None):
+    offsets = [key_offset(key) for key in keys]
+    pitches, line_lengths, template = unfolded_lines(chords, rhythms, degrees, directions, use_rests)
+
+    solos = []
+    if numpy is None:
+        for row in _fold_keys_lists(pitches, line_lengths, offsets, pitch_range):
+            row = normalize_rests(smooth_octaves(row), REST_PITCH)
+            if pitch_range is not None:
+                row = raise_into_range(row, pitch_range[0])
+            solos.append(_keyed_notes(template, row))
+        return solos
+
+    vectorize = len(pitches) >= VECTORIZE_MIN_NOTES
+    for row in fold_keys(pitches, line_lengths, offsets, pitch_range):
+        if vectorize:
+            row = normalize_rests(smooth_octaves(row.astype(numpy.int64)), REST_PITCH)
+        else:
+            row = normalize_rests(smooth_octaves(row.tolist()), REST_PITCH)
+        if pitch_range is not None:
+            row = raise_into_range(row, pitch_range[0])
+        solos.append(_keyed_notes(template, row))
+    return solos
+
+# The solo of generator in several keys, see generate_solo_keys(). Eighth note solos of the table lines only
+def solo_in_keys(generator, keys=ALL_KEYS, pitch_range=None):
+    if generator.rhythm is not None:
+        raise ValueError('solo_in_keys() plays eighth notes, not {}'.format(generator.rhythm))
+    if generator.target_lines:
+        raise ValueError('solo_in_keys() plays the table lines, not the lines searched with target_lines')
+    if generator.avoid_repeats:
+        raise ValueError('solo_in_keys() plays the table lines, it cannot avoid repeats')
+    n = generator.num_choruses
+    degrees = []
+    directions = []
+    for chorus_degrees, chorus_directions in generator.chorus_tables():
+        degrees.extend(chorus_degrees)
+        directions.extend(chorus_directions)
+    return generate_solo_keys(generator.chords * n, generator.rhythms * n, degrees, directions,
+                              generator.use_rests, keys, pitch_range)
+
+# ChordSequence comping moved to key
+def transpose_comping(comping, key):
+    offset = key_offset(key)
+    result = ChordSequence()
+    result.pitches = array('b', [pitch + offset if pitch >= 0 else pitch for pitch in comping.pitches])
+    result.chord_ends = array('i', comping.chord_ends)
+    result.durations = array('i', comping.durations)
+    return result
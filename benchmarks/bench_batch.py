@@ -0,0 +1,39 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# bench_batch.py
+# Batch throughput from 1 worker up to every core, and a check that every worker
+# count produces exactly the same files
+# Run from the repository root: python benchmarks/bench_batch.py
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import hashlib
+from timeit import default_timer as timer
+
+import bench_setup
+from Batch import *
+
+NUM_JOBS = 2000
+
+def batch_digest(jobs, workers):
+    digest = hashlib.sha256()
+    for job, data in run_batch(jobs, workers):
+        digest.update(data)
+    return digest.hexdigest()
+
+if __name__ == '__main__':
+    jobs = make_jobs(NUM_JOBS, base_seed=1)
+    cores = 1
+    if multiprocessing is not None:
+        cores = multiprocessing.cpu_count()
+
+    worker_counts = sorted(set([1, 2, 4, cores]))
+    reference = None
+    single_rate = None
+    for workers in worker_counts:
+        if workers > cores:
+            continue
+        start_time = timer()
+        digest = batch_digest(jobs, workers)
+        rate = NUM_JOBS / (timer() - start_time)
+        if reference is None:
+            reference, single_rate = digest, rate
+        assert digest == reference, 'Output changed with {} workers'.format(workers)
+        print('{:3d} workers: {:8.0f} solos/s ({:.1f}x)'.format(workers, rate, rate / single_rate))
@@ -0,0 +1,40 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# bench_chords.py
+# Objects, allocations and time for building the changes of many choruses with a new
+# JazzChord per chord (the old way) versus the interned FormChords
+# Run from the repository root: python benchmarks/bench_chords.py
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from timeit import default_timer as timer
+
+import bench_setup
+from SoloEngine import *
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+NUM_CHORUSES = 1000
+
+def jazz_chord_changes():
+    return [JazzChord(chord.root, list(chord.quality)) for chord in generate_chorus_changes()]
+
+def measure(make_chorus):
+    if tracemalloc is not None:
+        tracemalloc.start()
+    start_time = timer()
+    chords = []
+    for i in range(NUM_CHORUSES):
+        chords.extend(make_chorus())
+    elapsed = timer() - start_time
+    allocated = 0
+    if tracemalloc is not None:
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    return elapsed, len(set(id(chord) for chord in chords)), allocated
+
+if __name__ == '__main__':
+    for name, make_chorus in (('JazzChord', jazz_chord_changes), ('FormChord', generate_chorus_changes)):
+        elapsed, objects, allocated = measure(make_chorus)
+        print('{:10s} {:8.2f} ms {:7d} chord objects {:10d} bytes held'.format(
+            name, elapsed * 1000, objects, allocated))
@@ -0,0 +1,45 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# bench_line_table.py
+# Compares building every line with create_line() against the precomputed line table
+# Run from the repository root: python benchmarks/bench_line_table.py
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from timeit import default_timer as timer
+
+import bench_setup
+from SoloEngine import *
+
+NUM_CHORUSES = 100
+
+def time_create_line(chords, rhythms, degrees, directions):
+    start_time = timer()
+    for i in range(len(chords)):
+        # create_line() mutates the chord, so every call needs a fresh one like the old generate_solo()
+        chord = JazzChord(chords[i].root, chords[i].quality)
+        sp = degrees[i]
+        start = REST
+        if sp > 0:
+            start = chord.pitches[0] + chord.scale[sp - 1]
+        create_line(start, 0, chord, directions[i], int(rhythms[i] / EN), sp)
+    return timer() - start_time
+
+def time_lookup_line(chords, rhythms, degrees, directions):
+    start_time = timer()
+    for i in range(len(chords)):
+        lookup_line(chords[i], degrees[i], directions[i], int(rhythms[i] / EN))
+    return timer() - start_time
+
+if __name__ == '__main__':
+    chords, rhythms, degrees, directions = generate_form(NUM_CHORUSES)
+
+    build_start = timer()
+    entries = build_line_table()
+    build_time = timer() - build_start
+
+    create_time = time_create_line(chords, rhythms, degrees, directions)
+    lookup_time = time_lookup_line(chords, rhythms, degrees, directions)
+
+    print('Line table: {} entries built in {:.2f} ms'.format(entries, build_time * 1000))
+    print('{} chords'.format(len(chords)))
+    print('create_line: {:.2f} ms'.format(create_time * 1000))
+    print('lookup_line: {:.2f} ms'.format(lookup_time * 1000))
+    print('Speedup: {:.1f}x'.format(create_time / lookup_time))
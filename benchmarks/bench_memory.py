@@ -0,0 +1,46 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# bench_memory.py
+# Memory per note of the solo as two Python lists versus a NoteSequence
+# Run from the repository root: python benchmarks/bench_memory.py
+# Uses tracemalloc when it is available (CPython), sys.getsizeof otherwise (Jython)
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import sys
+
+import bench_setup
+from SoloEngine import *
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+NUM_CHORUSES = 1000
+
+def measure(build):
+    if tracemalloc is None:
+        result = build()
+        if isinstance(result, NoteSequence):
+            return result, result.nbytes()
+        pitches, durations = result
+        return result, sys.getsizeof(pitches) + sys.getsizeof(durations)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+if __name__ == '__main__':
+    chords, rhythms, degrees, directions = generate_form(NUM_CHORUSES)
+    notes = generate_solo_notes(chords, rhythms, degrees, directions)
+    pitches, durations = notes.to_note_list()
+    num_notes = len(notes)
+
+    lists, list_bytes = measure(lambda: (list(pitches), [float(d) for d in durations]))
+    sequence, sequence_bytes = measure(lambda: NoteSequence(pitches, durations))
+
+    print('{} notes ({} choruses)'.format(num_notes, NUM_CHORUSES))
+    print('Lists:        {:8.2f} bytes/note'.format(float(list_bytes) / num_notes))
+    print('NoteSequence: {:8.2f} bytes/note'.format(float(sequence_bytes) / num_notes))
+    print('Reduction:    {:8.1f}x'.format(float(list_bytes) / sequence_bytes))
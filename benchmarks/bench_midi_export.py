@@ -0,0 +1,30 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# bench_midi_export.py
+# How many MIDI files per second MidiWriter can build, checked against read_midi()
+# Run from the repository root: python benchmarks/bench_midi_export.py
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+from timeit import default_timer as timer
+
+import bench_setup
+from SoloEngine import *
+from MidiWriter import *
+
+NUM_FILES = 500
+NUM_CHORUSES = 3
+BPM = 286.0
+
+if __name__ == '__main__':
+    solo, comping = SoloGenerator(NUM_CHORUSES).generate()
+
+    # Round trip once so the timing is of a file that reads back correctly
+    midi_format, division, tracks = read_midi(midi_bytes(solo, comping, BPM))
+    sax_notes = [note for note in note_events(tracks) if note[2] == SAX_CHANNEL]
+    assert len(sax_notes) == len([pitch for pitch in solo.pitches if pitch >= 0])
+
+    start_time = timer()
+    for i in range(NUM_FILES):
+        midi_bytes(solo, comping, BPM)
+    elapsed = timer() - start_time
+
+    print('{} files of {} choruses in {:.2f} s'.format(NUM_FILES, NUM_CHORUSES, elapsed))
+    print('{:.0f} files/s'.format(NUM_FILES / elapsed))
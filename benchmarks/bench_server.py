@@ -0,0 +1,94 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# bench_server.py
+# Load generator for SoloServer.py. Starts a server in this process on a free port,
+# then sends it requests from many concurrent clients, each over its own keep-alive
+# connection, and reports latency (p50/p99) and throughput as JSON, from the clients'
+# side and the server's /stats.
+# Requests are drawn from the GUI's options, so some are identical and get coalesced
+# or served from the cache; --cache-mb 0 and --distinct make every one generate.
+# Run from the repository root:
+#   python benchmarks/bench_server.py --requests 2000 --concurrency 64 --workers 2
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+import bench_setup
+from SoloServer import *
+from Batch import BATCH_BPMS
+
+# Options for each request, as the frontend would send them
+def make_requests(count, seed=0, distinct=False):
+    options = random.Random(seed)
+    requests = []
+    for index in range(count):
+        # Every BPM different makes every answer different
+        bpm = BPM_RANGE[0] + (BPM_RANGE[1] - BPM_RANGE[0]) * index / count if distinct else options.choice(BATCH_BPMS)
+        requests.append({'choruses': options.randint(MIN_CHORUSES, MAX_CHORUSES), 'bpm': bpm,
+                         'rests': options.random() < 0.5, 'accompaniment': options.random() < 0.5,
+                         'format': options.choice(FORMATS)})
+    return requests
+
+async def post(reader, writer, host, path, options):
+    body = json.dumps(options).encode('utf-8')
+    writer.write('POST {} HTTP/1.1\r\nHost: {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n'.format(
+        path, host, len(body)).encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def client(host, port, requests, latencies, loop):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for options in requests:
+            start_time = loop.time()
+            status = await post(reader, writer, host, '/solo', options)
+            if status != 200:
+                raise RuntimeError('request failed with {}: {}'.format(status, options))
+            latencies.append(loop.time() - start_time)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def run(args):
+    loop = asyncio.get_running_loop()
+    server = await SoloServer('127.0.0.1', 0, args.workers, cache_bytes=args.cache_mb * 1024 * 1024).start()
+    requests = make_requests(args.requests, args.seed, args.distinct)
+    latencies = []
+    try:
+        start_time = loop.time()
+        await asyncio.gather(*[client('127.0.0.1', server.port, requests[i::args.concurrency], latencies, loop)
+                               for i in range(args.concurrency)])
+        elapsed = loop.time() - start_time
+        report = {'requests': len(latencies), 'concurrency': args.concurrency, 'workers': args.workers,
+                  'seconds': elapsed, 'requests_per_second': len(latencies) / elapsed,
+                  'client': latency_stats(latencies), 'server': server.stats()}
+    finally:
+        await server.close()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test SoloServer.py')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=None, help='server processes (default: every core)')
+    parser.add_argument('--cache-mb', type=int, default=CACHE_BYTES // (1024 * 1024), help='server cache size')
+    parser.add_argument('--distinct', action='store_true', help='make every request different')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2, sort_keys=True))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
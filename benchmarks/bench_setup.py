@@ -0,0 +1,19 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# bench_setup.py
+# Imported first by every benchmark. Puts the repository on sys.path, and the stand-in
+# music/gui modules in stubs/ as well when JythonMusic isn't available
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+STUBS_DIR = os.path.join(BENCH_DIR, 'stubs')
+
+sys.path.insert(0, REPO_DIR)
+try:
+    import music
+    USING_STUBS = False
+except ImportError:
+    sys.path.insert(0, STUBS_DIR)
+    USING_STUBS = True
@@ -0,0 +1,241 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# run_benchmarks.py
+# Times every stage of generating a solo and reports the results as JSON.
+# Run from the repository root:
+#   python benchmarks/run_benchmarks.py                       # print JSON
+#   python benchmarks/run_benchmarks.py --output results.json
+#   python benchmarks/run_benchmarks.py --check               # exit 1 if a stage is over its threshold
+#   python benchmarks/run_benchmarks.py --quick               # skip the 10k chorus solo
+# Thresholds (seconds, best of the repeats) are in thresholds.json next to this file.
+# Works with JythonMusic's music/gui or, when they're missing, the stand-ins in stubs/
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+import bench_setup
+from SoloEngine import *
+
+numpy = import_numpy()
+
+THRESHOLDS_FILE = os.path.join(bench_setup.BENCH_DIR, 'thresholds.json')
+SOLO_CHORUSES = (1, 9, 100, 10000)
+REPEATS = 5
+
+# Best time of repeats calls of run(), in seconds. setup() is called before every run
+# and not timed; its result is passed to run()
+def best_time(run, setup=None, repeats=REPEATS):
+    best = None
+    for i in range(repeats):
+        argument = setup() if setup is not None else None
+        start_time = timer()
+        run(argument)
+        elapsed = timer() - start_time
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def result(seconds, items, unit):
+    return {'seconds': seconds, 'items': items, 'unit': unit,
+            'us_per_item': seconds * 1e6 / max(items, 1)}
+
+#---STAGES-----------------------------
+def bench_create_line(results):
+    # create_line() mutates its chord, so every call gets a fresh one (like the old generate_solo)
+    chords = generate_chorus_changes()
+    calls = 1000
+    for degree in range(8):
+        def run(argument):
+            for chord in chords * (calls // len(chords)):
+                fresh_chord = JazzChord(chord.root, chord.quality)
+                start = REST
+                if degree > 0:
+                    start = fresh_chord.root + fresh_chord.scale[degree - 1]
+                create_line(start, 0, fresh_chord, 1, 4, degree)
+        results['create_line/degree_{}'.format(degree)] = result(best_time(run), calls // len(chords) * len(chords), 'lines')
+
+def bench_lookup_line(results):
+    chords = generate_chorus_changes()
+    build_line_table()
+    def run(argument):
+        for i in range(100):
+            for chord in chords:
+                lookup_line(chord, 1, 1, 4, True)
+    results['lookup_line'] = result(best_time(run), 100 * len(chords), 'lines')
+
+def bench_generate_solo(results, choruses):
+    for num_choruses in choruses:
+        chords, rhythms, degrees, directions = generate_form(num_choruses)
+        repeats = REPEATS if num_choruses <= 100 else 1
+        seconds = best_time(lambda argument: generate_solo(chords, rhythms, degrees, directions), repeats=repeats)
+        notes = sum(int(rhythm / EN) for rhythm in rhythms)
+        results['generate_solo/{}_choruses'.format(num_choruses)] = result(seconds, notes, 'notes')
+
+# Lines swapped to avoid repeating licks, with how often the solo still repeats one
+def bench_avoid_repeats(results, choruses=(9, 1000)):
+    for num_choruses in choruses:
+        generators = []
+        def run(argument):
+            generator = SoloGenerator(num_choruses, avoid_repeats=True)
+            generator.solo()
+            generators.append(generator)
+        seconds = best_time(run, repeats=REPEATS if num_choruses <= 100 else 1)
+        stats = generators[-1].licks.stats()
+        stage = result(seconds, generators[-1].licks.position, 'notes')
+        stage['repeat_ratio'] = stats['repeat_ratio']
+        results['avoid_repeats/{}_choruses'.format(num_choruses)] = stage
+
+def bench_smoothing(results):
+    pitches, durations = generate_solo(*generate_form(100))
+    results['smooth_octaves/100_choruses'] = result(
+        best_time(lambda notes: normalize_rests(smooth_octaves(notes)), lambda: list(pitches)), len(pitches), 'notes')
+    if numpy is not None:
+        results['smooth_octaves_numpy/100_choruses'] = result(
+            best_time(lambda notes: normalize_rests(smooth_octaves(notes)),
+                      lambda: numpy.array(pitches, dtype=numpy.int64)), len(pitches), 'notes')
+
+def bench_tie(results):
+    pitches, durations = generate_solo(*generate_form(9))
+    def setup():
+        phrase = Phrase()
+        phrase.addNoteList(pitches, durations)
+        return phrase
+    results['tiePitches/9_choruses'] = result(best_time(Mod.tiePitches, setup), len(pitches), 'notes')
+
+    # What onGenerate does instead: tie on the arrays, then build the Phrase once
+    solo = SoloGenerator(9).solo()
+    def run(argument):
+        phrase = Phrase()
+        phrase.addNoteList(*solo.tied().to_note_list())
+    results['tied/9_choruses'] = result(best_time(run), len(solo), 'notes')
+
+def bench_comping(results):
+    generator = SoloGenerator(9)
+    def run(argument):
+        phrase = Phrase()
+        phrase.addNoteList(*generator.comping().to_note_list())
+    results['comping/9_choruses'] = result(best_time(run), 9 * len(generator.chords), 'chords')
+
+def bench_on_generate(results):
+    start_time = timer()
+    import GiantStepsv1
+    results['import_gui'] = result(timer() - start_time, 1, 'imports')
+
+    GiantStepsv1.numChoruses = 9
+    # Every click generates: the notes of the previous repeat are dropped first
+    results['onGenerate/9_choruses'] = result(best_time(lambda argument: GiantStepsv1.onGenerate(),
+                                                        GiantStepsv1.generationCache.clear), 1, 'clicks')
+    # Clicking again with the same options, the notes come from the cache
+    results['onGenerate_cached/9_choruses'] = result(best_time(lambda argument: GiantStepsv1.onGenerate()), 1, 'clicks')
+
+# 9 choruses rendered to a WAV file, about two minutes of audio
+def bench_render_wav(results):
+    if numpy is None:
+        return
+    from AudioRenderer import render_wav
+    solo, comping = SoloGenerator(9).generate()
+    solo = solo.tied()
+    handle, output = tempfile.mkstemp(suffix='.wav')
+    os.close(handle)
+    try:
+        samples = [0]
+        def run(argument):
+            samples[0] = render_wav(output, solo, comping, 286.0)
+        seconds = best_time(run, repeats=3)
+        results['render_wav/9_choruses'] = result(seconds, samples[0], 'samples')
+    finally:
+        os.remove(output)
+
+# Import to first output of GiantStepsCli.py, in a fresh interpreter each time so nothing
+# is imported already. Run as a user would, without the stubs: with no JythonMusic it
+# falls back to MusicConstants.py
+def bench_cli(results):
+    env = dict(os.environ)
+    handle, output = tempfile.mkstemp(suffix='.mid')
+    os.close(handle)
+    command = [sys.executable, os.path.join(bench_setup.REPO_DIR, 'GiantStepsCli.py'), '--timing', '-o', output]
+    best = None
+    try:
+        for i in range(REPEATS):
+            process = subprocess.Popen(command, env=env, stderr=subprocess.PIPE)
+            errors = process.communicate()[1].decode('utf-8')
+            match = re.search(r'first output after ([0-9.]+) ms', errors)
+            if process.returncode != 0 or match is None:
+                raise RuntimeError('GiantStepsCli.py failed: ' + errors)
+            seconds = float(match.group(1)) / 1000
+            if best is None or seconds < best:
+                best = seconds
+    finally:
+        os.remove(output)
+    results['cli/first_output'] = result(best, 1, 'runs')
+
+def run_all(quick=False):
+    results = {}
+    bench_create_line(results)
+    bench_lookup_line(results)
+    bench_generate_solo(results, SOLO_CHORUSES[:-1] if quick else SOLO_CHORUSES)
+    bench_avoid_repeats(results)
+    bench_smoothing(results)
+    bench_tie(results)
+    bench_comping(results)
+    bench_cli(results)
+    bench_render_wav(results)
+
+    # onGenerate prints a line per click, keep the JSON output clean
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        bench_on_generate(results)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return results
+
+# Names of the stages slower than their threshold
+def check_thresholds(results, thresholds):
+    failures = []
+    for stage, limit in sorted(thresholds.items()):
+        if stage in results and results[stage]['seconds'] > limit:
+            failures.append('{}: {:.4f} s > {:.4f} s'.format(stage, results[stage]['seconds'], limit))
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time every stage of solo generation')
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--check', action='store_true', help='fail if a stage is slower than its threshold')
+    parser.add_argument('--thresholds', default=THRESHOLDS_FILE, help='JSON file of {stage: max seconds}')
+    parser.add_argument('--quick', action='store_true', help='skip the 10k chorus solo')
+    args = parser.parse_args(argv)
+
+    report = {'using_stubs': bench_setup.USING_STUBS, 'python': sys.version.split()[0],
+              'results': run_all(args.quick)}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        f = open(args.output, 'w')
+        try:
+            f.write(text)
+        finally:
+            f.close()
+    else:
+        print(text)
+
+    if args.check:
+        f = open(args.thresholds)
+        try:
+            thresholds = json.load(f)
+        finally:
+            f.close()
+        failures = check_thresholds(report['results'], thresholds)
+        for failure in failures:
+            sys.stderr.write('REGRESSION ' + failure + '\n')
+        if failures:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# gui.py (stand-in)
+# Widgets that do nothing, so GiantStepsv1.py can be imported and onGenerate() timed
+# without a display. Only used by the benchmarks when JythonMusic's gui is missing
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+HORIZONTAL = 0
+VERTICAL = 1
+
+class Widget(object):
+    def __init__(self, *args):
+        self.args = args
+        self.checked = False
+        self.text = args[0] if args and isinstance(args[0], str) else ''
+
+    def add(self, *args):
+        pass
+
+    def check(self):
+        self.checked = True
+
+    def uncheck(self):
+        self.checked = False
+
+    def isChecked(self):
+        return self.checked
+
+    def getText(self):
+        return self.text
+
+    def setText(self, text):
+        self.text = text
+
+class Display(Widget):
+    pass
+
+class Icon(Widget):
+    pass
+
+class Checkbox(Widget):
+    pass
+
+class Button(Widget):
+    pass
+
+class Slider(Widget):
+    pass
+
+class Label(Widget):
+    pass
+
+class TextField(Widget):
+    pass
@@ -0,0 +1,105 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# music.py (stand-in)
+# Just enough of JythonMusic's music module to run and time the solo creator outside of
+# JythonMusic. Only put on sys.path by the benchmarks, and only when the real one is missing.
+# The constants come from MusicConstants.py in the repository
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+from MusicConstants import * # The constants are shared with plain Python runs
+
+#---CLASSES-----------------------------
+class Note(object):
+    def __init__(self, pitch, duration):
+        self.pitch = pitch
+        self.duration = duration
+
+    def getPitch(self):
+        return self.pitch
+
+    def getDuration(self):
+        return self.duration
+
+class Phrase(object):
+    def __init__(self):
+        self.notes = []
+
+    def addNote(self, pitch, duration):
+        self.notes.append(Note(pitch, duration))
+
+    # Chords (lists of pitches) are kept as one Note with a list of pitches
+    def addNoteList(self, pitches, durations):
+        for pitch, duration in zip(pitches, durations):
+            self.notes.append(Note(pitch, duration))
+
+    def getNoteList(self):
+        return self.notes
+
+    def size(self):
+        return len(self.notes)
+
+    def empty(self):
+        self.notes = []
+
+class Part(object):
+    def __init__(self, instrument=PIANO, channel=0):
+        self.instrument = instrument
+        self.channel = channel
+        self.phrases = []
+
+    def addPhrase(self, phrase):
+        self.phrases.append(phrase)
+
+    def empty(self):
+        self.phrases = []
+
+class Score(object):
+    def __init__(self, title='', tempo=60.0):
+        self.title = title
+        self.tempo = tempo
+        self.parts = []
+
+    def addPart(self, part):
+        self.parts.append(part)
+
+    def empty(self):
+        self.parts = []
+
+class Mod(object):
+    # Same algorithm as jMusic: walk the phrase and fold each note into the one before
+    # it while they have the same pitch (two RESTs in a row count as the same pitch)
+    @staticmethod
+    def tiePitches(phrase):
+        notes = phrase.notes
+        i = 0
+        while i < len(notes) - 1:
+            if notes[i].pitch == notes[i + 1].pitch:
+                notes[i].duration += notes[i + 1].duration
+                notes.pop(i + 1)
+            else:
+                i += 1
+
+class View(object):
+    @staticmethod
+    def pianoRoll(*args):
+        pass
+
+    @staticmethod
+    def notation(*args):
+        pass
+
+class Play(object):
+    @staticmethod
+    def midi(score):
+        pass
+
+    @staticmethod
+    def noteOn(pitch, velocity=100, channel=0):
+        pass
+
+    @staticmethod
+    def noteOff(pitch, channel=0):
+        pass
+
+    @staticmethod
+    def setInstrument(instrument, channel=0):
+        pass
@@ -0,0 +1,22 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_batch.py
+# run_batch() gives every job its own result in job order, the same with a process pool
+# as in this process, whether jobs is a list or an iterator
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import unittest
+
+import tests_setup
+from Batch import *
+
+class RunBatchTest(unittest.TestCase):
+    def test_workers_and_iterators(self):
+        jobs = make_jobs(7, base_seed=3, choruses=[1, 2])
+        expected = [(job, generate_job(job)[1]) for job in jobs]
+        self.assertEqual(list(run_batch(jobs, workers=1)), expected)
+        if multiprocessing is not None:
+            self.assertEqual(list(run_batch(jobs, workers=2, chunksize=2)), expected)
+            self.assertEqual(list(run_batch(iter(jobs), workers=2, chunksize=2)), expected)
+            self.assertEqual(list(run_batch((job for job in jobs), workers=2, chunksize=3)), expected)
+
+if __name__ == '__main__':
+    unittest.main()
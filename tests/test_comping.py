@@ -0,0 +1,62 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_comping.py
+# Voice leading from several threads at once, as the GUI's scheduler thread and
+# onGenerate() do, gives the same voicings as from one
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import threading
+import unittest
+
+import tests_setup
+from Comping import *
+
+THREADS = 8
+
+class ThreadedVoiceLeadingTest(unittest.TestCase):
+    def run_threads(self, work):
+        results = []
+        errors = []
+        start = threading.Event()
+        def run():
+            start.wait()
+            try:
+                results.append(work())
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=run) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_fresh_tables(self):
+        chords = generate_chorus_changes()
+        for attempt in range(20):
+            pitch_range = (F3 - 1 - attempt, G5) # A range no table has yet
+            work = lambda: (voice_lead(chords, pitch_range), voice_lead_cycle(chords, pitch_range))
+            results = self.run_threads(work)
+
+            # Every voicing is registered once, and the cost table is square
+            table = voicing_table(pitch_range)
+            self.assertEqual(len(table.voicings), len(set(table.voicings)))
+            self.assertEqual(len(table.cost), len(table.voicings))
+            self.assertTrue(all(len(row) == len(table.voicings) for row in table.cost))
+
+            # Same as working it out again on one thread
+            del voicingTables[pitch_range]
+            del cycleCache[(pitch_range, tuple(chords))]
+            expected = work()
+            for result in results:
+                self.assertEqual(result, expected)
+
+    def test_generators_side_by_side(self):
+        expected = SoloGenerator(1, voice_leading=True).voicings()
+        cycleCache.clear()
+        voicingTables.clear()
+        for voicings in self.run_threads(lambda: SoloGenerator(1, voice_leading=True).voicings()):
+            self.assertEqual(voicings, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_corpus.py
+# Solos appended to a Corpus read back by index, and a writer that died part way (a
+# .gsi or .gsc file cut short) leaves exactly the complete solos behind
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+
+import tests_setup
+from SoloEngine import *
+from Corpus import *
+
+def truncate(path, size):
+    f = open(path, 'r+b')
+    try:
+        f.truncate(size)
+    finally:
+        f.close()
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'solos')
+        self.solos = []
+        writer = CorpusWriter(self.path)
+        try:
+            for k, (num_choruses, use_rests) in enumerate([(1, True), (3, False), (2, True), (1, False)]):
+                solo = SoloGenerator(num_choruses, use_rests, rhythm='bebop' if k == 2 else None).solo()
+                metadata = dict(seed=100 + k, tune='Tune {}'.format(k), num_choruses=num_choruses,
+                                bpm=160.0 + k, use_rests=use_rests, accompaniment=k % 2 == 0)
+                self.assertEqual(writer.append_notes(solo, **metadata), k)
+                self.solos.append((solo, metadata))
+        finally:
+            writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # The corpus at path holds exactly the first count solos that were appended
+    def check_solos(self, count):
+        corpus = Corpus(self.path)
+        self.assertEqual(len(corpus), count)
+        for k in range(count):
+            solo, metadata = self.solos[k]
+            entry = corpus.entry(k)
+            self.assertEqual(entry.index, k)
+            self.assertEqual(entry.num_notes, len(solo))
+            for name, value in metadata.items():
+                self.assertEqual(getattr(entry, name), value, name)
+            pitches, ticks = corpus.arrays(k)
+            self.assertEqual(list(pitches), list(solo.pitches))
+            self.assertEqual(list(ticks), list(solo.ticks()))
+            self.assertEqual(corpus[k].to_note_list(), solo.to_note_list())
+        self.assertRaises(IndexError, corpus.entry, count)
+        if count:
+            self.assertEqual(corpus.entry(-1).index, count - 1)
+
+    def test_entries(self):
+        self.check_solos(len(self.solos))
+
+    def test_torn_index_record(self):
+        index_path = self.path + INDEX_EXTENSION
+        for cut in (1, RECORD.size // 2, RECORD.size - 1):
+            truncate(index_path, FILE_HEADER.size + 3 * RECORD.size + RECORD.size - cut)
+            CorpusWriter(self.path).close()
+            self.assertEqual(os.path.getsize(index_path), FILE_HEADER.size + 3 * RECORD.size)
+            self.check_solos(3)
+
+    def test_short_data_file(self):
+        data_path = self.path + DATA_EXTENSION
+        last = Corpus(self.path).entry(3)
+        # Cut into the last solo's notes: its record stays in the index but must be dropped
+        truncate(data_path, last.offset + 3)
+        CorpusWriter(self.path).close()
+        self.assertEqual(os.path.getsize(data_path), last.offset)
+        self.check_solos(3)
+
+        # Cut further back, into the second solo: two more records go
+        truncate(data_path, Corpus(self.path).entry(1).offset + 1)
+        CorpusWriter(self.path).close()
+        self.check_solos(1)
+
+    def test_notes_without_a_record(self):
+        data_path = self.path + DATA_EXTENSION
+        size = os.path.getsize(data_path)
+        f = open(data_path, 'ab')
+        try:
+            f.write(b'\x01' * 40) # Notes written before the writer died, no record yet
+        finally:
+            f.close()
+        writer = CorpusWriter(self.path)
+        self.assertEqual(os.path.getsize(data_path), size)
+
+        # Appending after a recovery carries on from the complete solos
+        solo = SoloGenerator(1).solo()
+        self.assertEqual(writer.append_notes(solo, seed=7), 4)
+        writer.close()
+        self.solos.append((solo, {'seed': 7}))
+        self.check_solos(5)
+
+    def test_long_tune_names(self):
+        writer = CorpusWriter(self.path)
+        try:
+            for tune in ('a' + u'é' * 20, u'é' * 16, u'♫' * 11, 'x' * 40):
+                writer.append([C4], [TICKS_PER_BEAT], tune=tune)
+        finally:
+            writer.close()
+        corpus = Corpus(self.path)
+        for k, expected in zip(range(4, 8), ('a' + u'é' * 15, u'é' * 16, u'♫' * 10, 'x' * 32)):
+            self.assertEqual(corpus.entry(k).tune, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_generation_cache.py
+# GenerationCache drops the least recently used solos past its entry and byte limits,
+# and generators that would play different notes never share a cache_key()
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import unittest
+
+import tests_setup
+from SoloEngine import *
+from GenerationCache import *
+from DownbeatModel import coltrane_model
+
+class GenerationCacheTest(unittest.TestCase):
+    def test_least_recently_used(self):
+        cache = GenerationCache(max_entries=3)
+        for key in 'abc':
+            cache.put(key, key.upper(), 10)
+        self.assertEqual(cache.get('a'), 'A') # a is now the most recently used
+        cache.put('d', 'D', 10)
+        self.assertEqual(list(cache.entries), ['c', 'a', 'd'])
+        self.assertNotIn('b', cache)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.nbytes, 30)
+
+    def test_byte_cap(self):
+        cache = GenerationCache(max_bytes=100)
+        cache.put('a', 'A', 40)
+        cache.put('b', 'B', 40)
+        cache.get('a')
+        cache.put('c', 'C', 40) # Over 100, so b (least recently used) goes
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertEqual(cache.nbytes, 80)
+
+        cache.put('a', 'A', 10) # Replacing an entry takes its old bytes back off
+        self.assertEqual(cache.nbytes, 50)
+        cache.put('huge', 'H', 101) # Bigger than the whole cache: not kept, nothing dropped
+        self.assertEqual(list(cache.entries), ['c', 'a'])
+        self.assertEqual(cache.nbytes, 50)
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+    def test_generate(self):
+        cache = GenerationCache()
+        solo, comping = cache.generate(SoloGenerator(2))
+        self.assertIs(cache.generate(SoloGenerator(2))[0], solo)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.nbytes, solo.nbytes() + comping.nbytes())
+        self.assertEqual(solo.to_note_list(), SoloGenerator(2).solo().tied().to_note_list())
+
+    def test_cache_keys(self):
+        model = coltrane_model()
+        generators = [
+            SoloGenerator(3),
+            SoloGenerator(4),
+            SoloGenerator(3, use_rests=False),
+            SoloGenerator(3, rhythm='swing'),
+            SoloGenerator(3, rhythm='bebop'),
+            SoloGenerator(3, voice_leading=True),
+            SoloGenerator(3, target_lines=True),
+            SoloGenerator(3, avoid_repeats=True),
+            SoloGenerator(3, model=model, seed=1),
+            SoloGenerator(3, model=model, seed=2),
+            SoloGenerator(3, model=model, seed=1, use_rests=False),
+        ]
+        keys = [generator.cache_key() for generator in generators]
+        self.assertEqual(len(set(keys)), len(keys))
+
+        # The same options give the same key. The seed only matters with a model
+        self.assertEqual(SoloGenerator(3, rhythm='swing').cache_key(), keys[3])
+        self.assertEqual(SoloGenerator(3, seed=5).cache_key(), keys[0])
+        self.assertIsNone(SoloGenerator(3, model=model).cache_key())
+
+if __name__ == '__main__':
+    unittest.main()
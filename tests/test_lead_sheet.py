@@ -0,0 +1,69 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_lead_sheet.py
+# Lead sheets with chords the Giant Steps form never has: 1, 3 and 6 beats, and 3/4
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import unittest
+
+import tests_setup
+from LeadSheet import *
+
+ODD_LENGTHS = '''
+title: Odd lengths
+degrees: 1 3 5 7 2 4 6 0 1 5
+directions: 1 0 1 0 1 0 1 0 0 1
+| Ebmaj7:3 F#7:1 | Am7:1 D7:3 | Gmaj7:1.5 Bb7:2.5 | Bmaj7:2 Fm7:2 |
+| C#m7:3 F#7:1 |
+'''
+
+WALTZ = '''
+meter: 3
+| Bmaj7 | D7 | Gmaj7 Bb7:2 | Ebmaj7 |
+'''
+
+class OddChordLengthTest(unittest.TestCase):
+    def check_tune(self, text, **options):
+        tune = load_lead_sheet(text, cache_dir=None)
+        for use_rests in (True, False):
+            for target_lines in (False, True):
+                generator = tune.generator(3, use_rests=use_rests, target_lines=target_lines, **options)
+                solo, comping = generator.generate()
+                self.assertEqual(sum(solo.ticks()), sum(comping.durations))
+                self.assertEqual(len(solo), 3 * sum(eighth_notes(rhythm) for rhythm in tune.rhythms()))
+
+                # Streaming plays the same notes, in step with the comping
+                streamed = list(tune.generator(3, use_rests=use_rests, target_lines=target_lines,
+                                               **options).iter_solo())
+                self.assertEqual([pitch for pitch, duration in streamed], solo.to_note_list()[0])
+                self.assertEqual(sum(beats_to_ticks(duration) for pitch, duration in streamed),
+                                 sum(comping.durations))
+
+    def test_one_and_three_beat_chords(self):
+        self.check_tune(ODD_LENGTHS)
+
+    def test_three_four(self):
+        self.check_tune(WALTZ)
+
+    def test_avoid_repeats(self):
+        self.check_tune(ODD_LENGTHS, avoid_repeats=True)
+
+    def test_lines_fit_their_chord(self):
+        chord = form_chord(C4, DOMINANT_SEVENTH)
+        for num_notes in range(1, 9):
+            for sp in range(8):
+                for direction in (0, 1):
+                    for use_rests in (True, False):
+                        line = lookup_line(chord, sp, direction, num_notes, use_rests)
+                        self.assertEqual(len(line), num_notes, (num_notes, sp, direction, use_rests))
+
+    def test_chords_shorter_than_an_eighth(self):
+        self.assertRaises(LeadSheetError, parse_lead_sheet, '| Cmaj7:3.75 G7:0.25 |')
+        self.assertRaises(LeadSheetError, parse_lead_sheet, '| Cmaj7:2.25 G7:1.75 |')
+
+    def test_bad_meter(self):
+        for meter in ('', '0', '3 4', 'three'):
+            with self.assertRaises(LeadSheetError) as raised:
+                parse_lead_sheet('title: Blues\nmeter: {}\n| Cmaj7 |'.format(meter))
+            self.assertIn('line 2', str(raised.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_lick_index.py
+# LickIndex finds repeated licks in any key, avoid_repeats=True makes solos repeat fewer
+# of them, and the profiler counts the branch of the line each chord actually played
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import unittest
+
+import tests_setup
+from SoloEngine import *
+from LickIndex import *
+from Profiling import Profiler
+
+class LickIndexTest(unittest.TestCase):
+    def test_repeats_in_any_key(self):
+        licks = LickIndex(length=2)
+        self.assertEqual(licks.extend([60, 62, 64]), 0)
+        self.assertEqual(licks.extend([REST, 65, 67, 69]), 1) # Same shape a fourth up
+        self.assertEqual(licks.count_repeats([50, 52, 54, 55]), 1)
+        self.assertEqual(licks.stats()['licks'], 2)
+        self.assertEqual(licks.stats()['repeats'], 1)
+
+    def test_rest_ends_lick(self):
+        licks = LickIndex(length=2)
+        licks.extend([60, 62, 64])
+        self.assertEqual(licks.extend([70, 72, REST, 74]), 0)
+
+    def test_recent(self):
+        licks = LickIndex(length=2, recent=4)
+        licks.extend([60, 62, 64])
+        licks.extend([REST] * 3)
+        self.assertEqual(licks.count_repeats([60, 62, 64]), 0)
+
+class AvoidRepeatsTest(unittest.TestCase):
+    def test_fewer_repeats(self):
+        for use_rests in (True, False):
+            for rhythm in (None, 'bebop'):
+                plain = SoloGenerator(9, use_rests, rhythm=rhythm).solo()
+                fresh = SoloGenerator(9, use_rests, rhythm=rhythm, avoid_repeats=True).solo()
+                self.assertEqual(len(fresh), len(plain))
+                self.assertLess(repetition_stats(fresh.pitches)['repeat_ratio'],
+                                repetition_stats(plain.pitches)['repeat_ratio'], (use_rests, rhythm))
+
+    def test_stream_matches_batch(self):
+        generator = SoloGenerator(3, avoid_repeats=True)
+        self.assertEqual(list(generator.iter_solo()), list(zip(*generator.solo().to_note_list())))
+
+    '''
+    Replays the lines chosen with a LickIndex of its own, rebuilds the solo from them and
+    counts their branches: the solo has to come out the same, and so do the counts
+    '''
+    def test_branch_played(self):
+        generator = SoloGenerator(3, avoid_repeats=True)
+        profiler = Profiler(logger=None)
+        chords = generator.chords * 3
+        degrees = generator.degrees * 3
+        directions = generator.directions * 3
+        solo = generate_solo_notes(chords, generator.rhythms * 3, degrees, directions, profiler=profiler,
+                                   licks=LickIndex())
+
+        licks = LickIndex()
+        pitches = []
+        branches = {}
+        swapped = 0
+        for i, chord in enumerate(chords):
+            next_chord, next_sp = (chords[i + 1], degrees[i + 1]) if i + 1 < len(chords) else (None, 0)
+            line_length = eighth_notes(generator.rhythms[i % len(generator.rhythms)])
+            line, direction, target = fresh_solo_line(licks, chord, degrees[i], directions[i], line_length,
+                                                      True, False, next_chord, next_sp)
+            self.assertEqual(line, solo_line(chord, degrees[i], direction, line_length, True, target,
+                                             next_chord, next_sp))
+            if (direction, target) != (directions[i], False):
+                swapped += 1
+            pitches.extend(line)
+            branch = 'target_search' if target and degrees[i] > 0 else create_line_branch(
+                chord, degrees[i], direction, line_length)
+            by_branch = branches.setdefault(degrees[i], {})
+            by_branch[branch] = by_branch.get(branch, 0) + 1
+
+        self.assertGreater(swapped, 0)
+        self.assertEqual(normalize_rests(smooth_octaves(pitches), REST_PITCH), list(solo.pitches))
+        self.assertEqual(profiler.branches, branches)
+
+if __name__ == '__main__':
+    unittest.main()
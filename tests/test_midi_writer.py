@@ -0,0 +1,74 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_midi_writer.py
+# MIDI files written by MidiWriter read back with its reference parser, read_midi(),
+# give the notes of the NoteSequence and ChordSequence that were written
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import struct
+import unittest
+
+import tests_setup
+from SoloEngine import *
+from MidiWriter import *
+
+# (start, ticks, channel, pitch) of every note of a solo, RESTs left out
+def solo_events(solo):
+    events = []
+    start = 0
+    for pitch, ticks in zip(solo.pitches, solo.ticks()):
+        if pitch >= 0:
+            events.append((start, ticks, SAX_CHANNEL, pitch))
+        start += ticks
+    return events
+
+def comping_events(comping):
+    events = []
+    start = 0
+    chord_start = 0
+    for end, ticks in zip(comping.chord_ends, comping.durations):
+        for pitch in comping.pitches[chord_start:end]:
+            if pitch >= 0:
+                events.append((start, ticks, PIANO_CHANNEL, pitch))
+        start += ticks
+        chord_start = end
+    return events
+
+class MidiRoundTripTest(unittest.TestCase):
+    def check_round_trip(self, solo, comping, bpm=286.0):
+        midi_format, division, tracks = read_midi(midi_bytes(solo, comping, bpm))
+        self.assertEqual(midi_format, 1)
+        self.assertEqual(division, TICKS_PER_BEAT)
+        self.assertEqual(len(tracks), 2)
+
+        expected = solo_events(solo) + (comping_events(comping) if comping is not None else [])
+        self.assertEqual(note_events(tracks), sorted(expected))
+
+        tempos = [data for tick, status, data in tracks[0] if status == META and data[0] == META_TEMPO]
+        self.assertEqual(len(tempos), 1)
+        microseconds = struct.unpack('>I', b'\x00' + tempos[0][1])[0]
+        self.assertEqual(microseconds, int(round(60000000.0 / bpm)))
+
+        programs = [(status & 0x0F, data[0]) for track in tracks for tick, status, data in track
+                    if status & 0xF0 == PROGRAM_CHANGE]
+        self.assertIn((SAX_CHANNEL, TENOR_SAX), programs)
+        if comping is not None:
+            self.assertIn((PIANO_CHANNEL, BRIGHT_ACOUSTIC), programs)
+
+    def test_choruses(self):
+        for num_choruses in (1, 3, 9):
+            for use_rests in (True, False):
+                solo, comping = SoloGenerator(num_choruses, use_rests).generate()
+                self.check_round_trip(solo, comping)
+                self.check_round_trip(solo, None)
+                self.check_round_trip(solo.tied(), comping) # Tied notes are longer than a run
+
+    def test_rhythm_template(self):
+        solo, comping = SoloGenerator(3, rhythm='bebop').generate()
+        self.check_round_trip(solo, comping, bpm=120.0)
+
+    def test_tempo_range(self):
+        self.check_round_trip(*SoloGenerator(1).generate(), bpm=MIN_BPM)
+        for bpm in (2.0, 0.0, -120.0, float('nan'), float('inf')):
+            self.assertRaises(ValueError, midi_bytes, SoloGenerator(1).solo(), None, bpm)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_note_sequence.py
+# NoteSequence.tied() against Mod.tiePitches (JythonMusic's, or the stand-in's), on the
+# list path and on the NumPy path, with RESTs in a row and with bar lines
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import random
+import unittest
+
+import tests_setup
+from music import Mod, Phrase, REST
+from SoloEngine import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BAR_TICKS = beats_to_ticks(4.0)
+
+# pitches and durations tied with Mod.tiePitches, as two lists
+def tie_pitches(pitches, durations):
+    phrase = Phrase()
+    phrase.addNoteList(list(pitches), list(durations))
+    Mod.tiePitches(phrase)
+    notes = phrase.getNoteList()
+    return [note.getPitch() for note in notes], [note.getDuration() for note in notes]
+
+# (pitches, durations) with the durations in ticks. Tied triplets add up differently
+# in floating point than in ticks
+def in_ticks(note_list):
+    pitches, durations = note_list
+    return list(pitches), [beats_to_ticks(duration) for duration in durations]
+
+'''
+Mod.tiePitches bar by bar: the notes are split where one starts on a bar line and
+each part is tied on its own
+'''
+def tie_pitches_in_bars(notes, bar_ticks):
+    tied_pitches, tied_durations = [], []
+    part = ([], [])
+    position = 0
+    for pitch, ticks in zip(*notes.to_note_list()):
+        if position % bar_ticks == 0 and part[0]:
+            tied = tie_pitches(*part)
+            tied_pitches.extend(tied[0])
+            tied_durations.extend(tied[1])
+            part = ([], [])
+        part[0].append(pitch)
+        part[1].append(ticks)
+        position += beats_to_ticks(ticks)
+    tied = tie_pitches(*part)
+    return tied_pitches + tied[0], tied_durations + tied[1]
+
+# count notes from a few pitches and RESTs, so there are plenty of repeats and RESTs in a row
+def random_notes(count, seed, durations=(EN, EN, EN, QN, SN, ENT)):
+    choice = random.Random(seed).choice
+    return NoteSequence([choice((C4, C4, D4, REST, REST)) for i in range(count)],
+                        [choice(durations) for i in range(count)])
+
+class TiedTest(unittest.TestCase):
+    def check_tied(self, notes):
+        tied = notes.tied()
+        self.assertEqual(in_ticks(tied.to_note_list()), in_ticks(tie_pitches(*notes.to_note_list())))
+        self.assertEqual(sum(tied.ticks()), sum(notes.ticks()))
+
+        # EN, QN and SN notes only, so every bar line falls on the start of a note
+        bars = random_notes(len(notes), len(notes), durations=(EN, EN, QN, SN))
+        self.assertEqual(bars.tied(BAR_TICKS).to_note_list(), tie_pitches_in_bars(bars, BAR_TICKS))
+
+    def test_list_path(self):
+        for count in (0, 1, 2, 5, 100, TIE_VECTORIZE_MIN_NOTES - 1):
+            for seed in range(5):
+                self.check_tied(random_notes(count, seed))
+
+    @unittest.skipIf(numpy is None, 'needs NumPy')
+    def test_numpy_path(self):
+        for count in (TIE_VECTORIZE_MIN_NOTES, TIE_VECTORIZE_MIN_NOTES + 1, 5000):
+            self.assertIsNotNone(numpy_for(count, TIE_VECTORIZE_MIN_NOTES))
+            for seed in range(5):
+                self.check_tied(random_notes(count, seed))
+
+    def test_rests_in_a_row(self):
+        notes = NoteSequence([REST, REST, C4, C4, REST, REST, REST, D4, REST],
+                             [EN, QN, EN, EN, EN, EN, SN, HN, EN])
+        self.assertEqual(notes.tied().to_note_list(),
+                         ([REST, C4, REST, D4, REST], [1.5, 1.0, 1.25, 2.0, 0.5]))
+        self.check_tied(notes)
+
+    def test_solos(self):
+        for num_choruses in (1, 9):
+            for use_rests in (True, False):
+                solo = SoloGenerator(num_choruses, use_rests).solo()
+                self.check_tied(solo)
+                self.assertEqual(solo.tied(BAR_TICKS).to_note_list(), tie_pitches_in_bars(solo, BAR_TICKS))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_playback.py
+# LookaheadScheduler sends the notes of SoloGenerator.generate() at their times, stops
+# promptly without leaving notes hanging, and starts an endless solo straight away
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import time
+import unittest
+
+import tests_setup
+from SoloEngine import *
+from MidiWriter import *
+from Playback import *
+from test_midi_writer import solo_events, comping_events
+
+# Keeps every message with the clock's time when it was sent
+class TimedSink(object):
+    def __init__(self, clock):
+        self.clock = clock
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append((self.clock.now(), message))
+
+# Stops the scheduler from its own thread once it has sent a note on
+class FirstNoteSink(TimedSink):
+    def __init__(self, clock):
+        TimedSink.__init__(self, clock)
+        self.scheduler = None
+
+    def send(self, message):
+        TimedSink.send(self, message)
+        if message[0] & 0xF0 == NOTE_ON and message[2] > 0:
+            self.scheduler.stop(wait=False)
+
+# (tick, message) of the note on and note off of every event
+def note_messages(events, velocity):
+    messages = []
+    for start, ticks, channel, pitch in events:
+        messages.append((start, (NOTE_ON | channel, pitch, velocity)))
+        messages.append((start + ticks, (NOTE_ON | channel, pitch, 0)))
+    return messages
+
+class LookaheadSchedulerTest(unittest.TestCase):
+    def check_generate(self, generator, bpm):
+        solo, comping = generator.generate()
+        events = solo_events(solo) + comping_events(comping)
+
+        clock = FakeClock(start=100.0)
+        sink = TimedSink(clock)
+        scheduler = LookaheadScheduler(generator, bpm, sink, clock)
+        scheduler.run()
+        self.assertEqual(len(sink.sent), 2 * len(events) + 2)
+        self.assertEqual(sink.sent[0][1], (PROGRAM_CHANGE | PIANO_CHANNEL, BRIGHT_ACOUSTIC, 0))
+        self.assertEqual(sink.sent[1][1], (PROGRAM_CHANGE | SAX_CHANNEL, TENOR_SAX, 0))
+
+        seconds_per_tick = 60.0 / bpm / TICKS_PER_BEAT
+        sent = [(int(round((at - 100.0) / seconds_per_tick)), message) for at, message in sink.sent[2:]]
+        self.assertEqual(sorted(sent), sorted(note_messages(events, DEFAULT_VELOCITY)))
+        times = [at for at, message in sink.sent]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(scheduler.sounding, set())
+        self.assertEqual(scheduler.jitter_max, 0.0)
+
+    def test_messages_match_generate(self):
+        self.check_generate(SoloGenerator(2), 286.0)
+        self.check_generate(SoloGenerator(2, False, voice_leading=True), 120.0)
+        self.check_generate(SoloGenerator(1, rhythm='triplets'), 200.0)
+        self.check_generate(SoloGenerator(1, rhythm='anticipated', target_lines=True), 286.0)
+
+    def test_stop(self):
+        sink = NullMidiSink(keep=True)
+        scheduler = LookaheadScheduler(SoloGenerator(9), 60.0, sink).start()
+        time.sleep(0.05)
+        started = time.time()
+        scheduler.stop()
+        self.assertLess(time.time() - started, 1.0)
+        self.assertFalse(scheduler.thread.is_alive())
+
+        # Every note on sent has had its note off
+        sounding = set()
+        for status, pitch, velocity in sink.messages:
+            if status & 0xF0 == NOTE_ON:
+                if velocity > 0:
+                    sounding.add((status, pitch))
+                else:
+                    sounding.discard((status, pitch))
+        self.assertEqual(sounding, set())
+
+    def test_endless_first_note(self):
+        clock = FakeClock()
+        sink = FirstNoteSink(clock)
+        scheduler = LookaheadScheduler(SoloGenerator(None), 286.0, sink, clock)
+        sink.scheduler = scheduler
+        scheduler.start()
+        scheduler.thread.join(10.0)
+        self.assertFalse(scheduler.thread.is_alive())
+        self.assertEqual(scheduler.first_note_latency, 0.0)
+
+        # Only about the lookahead was generated, not a chorus
+        chorus_ticks = beats_to_ticks(sum(generate_chorus_chord_rhythms()))
+        lookahead_ticks = beats_to_ticks(DEFAULT_LOOKAHEAD_BEATS)
+        self.assertLess(scheduler.solo_tick, lookahead_ticks + TICKS_PER_BEAT * 4)
+        self.assertLess(scheduler.comping_tick, chorus_ticks)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_rhythm.py
+# Every RhythmTemplate's durations fill each chord's span to the tick, and a solo played
+# to one changes line on the comping's chord changes (an eighth early when anticipated)
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import unittest
+
+import tests_setup
+from SoloEngine import *
+from Rhythm import *
+
+# Tick every note (or chord) after the first starts on
+def boundaries(ticks):
+    starts = []
+    position = 0
+    for duration in ticks:
+        position += duration
+        starts.append(position)
+    return starts[:-1]
+
+class RhythmTemplateTest(unittest.TestCase):
+    def test_durations_fill_span(self):
+        rhythms = sorted(set(generate_chorus_chord_rhythms())) + [0.5, 1.0, 1.5, 3.0, 8.0]
+        for name, template in sorted(RHYTHM_TEMPLATES.items()):
+            for rhythm in rhythms:
+                for first, last in ((True, False), (False, False), (False, True), (True, True)):
+                    span = template.span(rhythm, first, last)
+                    durations = template.durations(span)
+                    self.assertEqual(sum(durations), span, (name, rhythm, first, last))
+                    self.assertTrue(all(ticks > 0 for ticks in durations), (name, rhythm, first, last))
+
+    def test_anticipated_spans(self):
+        template = RHYTHM_TEMPLATES['anticipated']
+        rhythms = generate_chorus_chord_rhythms()
+        spans = [template.span(rhythm, i == 0, i == len(rhythms) - 1) for i, rhythm in enumerate(rhythms)]
+        self.assertEqual(spans[0], beats_to_ticks(rhythms[0]) - EIGHTH_TICKS)
+        self.assertEqual(spans[-1], beats_to_ticks(rhythms[-1]) + EIGHTH_TICKS)
+        self.assertEqual(sum(spans), sum(beats_to_ticks(rhythm) for rhythm in rhythms))
+        self.assertEqual(len(template.durations(spans[0])), eighth_notes(rhythms[0]) - 1)
+
+    def test_solo_follows_comping(self):
+        for name, template in sorted(RHYTHM_TEMPLATES.items()):
+            for num_choruses, use_rests in ((1, True), (3, False)):
+                solo, comping = SoloGenerator(num_choruses, use_rests, rhythm=name).generate()
+                solo_ticks = list(solo.ticks())
+                comping_ticks = list(comping.durations)
+                self.assertEqual(sum(solo_ticks), sum(comping_ticks), name)
+
+                # Each chord's line starts on the chord, or anticipation ticks before it
+                note_starts = set(boundaries(solo_ticks))
+                for change in boundaries(comping_ticks):
+                    self.assertIn(change - template.anticipation, note_starts, (name, change))
+
+                # The stream plays the same ticks
+                streamed = [beats_to_ticks(duration) for pitch, duration in
+                            SoloGenerator(num_choruses, use_rests, rhythm=name).iter_solo()]
+                self.assertEqual(streamed, solo_ticks, name)
+
+if __name__ == '__main__':
+    unittest.main()
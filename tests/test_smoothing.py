@@ -0,0 +1,88 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_smoothing.py
+# smooth_octaves() on NumPy arrays (_smooth_octaves_array) and OctaveSmoother, one note
+# at a time, against the plain list loop: random lines with RESTs, leaps that cascade
+# into each other and pitches low enough that the array version falls back to the loop
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import random
+import unittest
+
+import tests_setup
+from SoloEngine import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# count pitches from low up, with steps, leaps up of an octave or more and RESTs
+def random_line(count, seed, low=48):
+    rng = random.Random(seed)
+    pitch = low + 24
+    line = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            line.append(REST)
+            continue
+        if roll < 0.3:
+            pitch += rng.randint(12, 19)
+        else:
+            pitch += rng.randint(-5, 4)
+        pitch = min(max(pitch, low), low + 60)
+        line.append(pitch)
+    return line
+
+# Leaps up an octave every note: each one is dropped by every leap in the 4 notes before
+def cascading_line(count, low=48):
+    line = []
+    for i in range(count):
+        line.append(low + (i % 5) * 12 if i % 7 else REST)
+    return line
+
+def smooth_list(line):
+    return smooth_octaves(list(line))
+
+class SmoothingTest(unittest.TestCase):
+    def check_array(self, line):
+        smoothed = smooth_octaves(numpy.array(line, dtype=numpy.int64))
+        self.assertEqual(smoothed.tolist(), smooth_list(line))
+
+    @unittest.skipIf(numpy is None, 'needs NumPy')
+    def test_array_random(self):
+        for count in (0, 1, 4, 5, 6, 9, 100, VECTORIZE_MIN_NOTES + 3):
+            for seed in range(5):
+                self.check_array(random_line(count, seed))
+
+    @unittest.skipIf(numpy is None, 'needs NumPy')
+    def test_array_cascading(self):
+        for count in (9, 12, 13, 500):
+            line = cascading_line(count)
+            drops = [before - after for before, after in zip(line, smooth_list(line))]
+            self.assertGreater(max(drops), OCTAVE) # Dropped by more than one leap
+            self.check_array(line)
+
+    # Pitches under 48 can go negative when dropped, so the array version uses the loop
+    @unittest.skipIf(numpy is None, 'needs NumPy')
+    def test_array_low_pitches(self):
+        for seed in range(5):
+            line = random_line(300, seed, low=0)
+            self.assertLess(min(pitch for pitch in line if pitch >= 0), OCTAVE * SMOOTHING_WINDOW)
+            self.check_array(line)
+        self.check_array(cascading_line(40, low=OCTAVE * SMOOTHING_WINDOW - 1))
+
+    def test_streaming(self):
+        lines = [random_line(count, seed) for count in (0, 3, 4, 5, 300) for seed in range(3)]
+        lines += [cascading_line(41), random_line(200, 7, low=0)]
+        for line in lines:
+            smoother = OctaveSmoother()
+            streamed = []
+            for pitch in line:
+                settled = smoother.push(pitch)
+                if settled is not None:
+                    streamed.append(settled)
+            streamed.extend(smoother.flush())
+            self.assertEqual(streamed, normalize_rests(smooth_list(line)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_solo_server.py
+# SoloServer's request checks, and a request that fails in a worker failing alone.
+# Python 3 only, like the server
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import tests_setup
+from SoloServer import *
+
+class ParseRequestTest(unittest.TestCase):
+    def test_defaults(self):
+        self.assertEqual(parse_request({}), SoloRequest(1, DEFAULT_BPM, True, True, 'midi'))
+
+    def test_bad_bpm(self):
+        for text in ('{"bpm": NaN}', '{"bpm": Infinity}', '{"bpm": -Infinity}', '{"bpm": 1e-9}', '{"bpm": 0}',
+                     '{"bpm": 1e9}', '{"bpm": "fast"}', '{"bpm": "120"}', '{"bpm": true}', '{"bpm": null}'):
+            self.assertRaises(RequestError, parse_request, json.loads(text))
+        self.assertEqual(parse_request({'bpm': 120}).bpm, 120.0)
+
+    def test_flags(self):
+        self.assertEqual(parse_request({'rests': False, 'accompaniment': False})[2:4], (False, False))
+        for value in ('false', 'true', 0, 1, None):
+            self.assertRaises(RequestError, parse_request, {'rests': value})
+            self.assertRaises(RequestError, parse_request, {'accompaniment': value})
+
+    def test_bad_choruses(self):
+        for value in (0, MAX_CHORUSES + 1, 'many', float('inf'), float('nan'), 2.7, 3.0, '3', True, None):
+            self.assertRaises(RequestError, parse_request, {'choruses': value})
+
+class RenderRequestsTest(unittest.TestCase):
+    def test_failure_stays_with_its_request(self):
+        good = parse_request({'choruses': 2})
+        bad = SoloRequest(2, float('nan'), True, True, 'midi') # What parse_request now turns away
+        answers = render_requests([good, bad, good])
+        self.assertEqual([ok for ok, data in answers], [True, False, True])
+        self.assertEqual(answers[0], answers[2])
+
+    def test_server(self):
+        async def run():
+            server = await SoloServer('127.0.0.1', 0, executor=ThreadPoolExecutor(2)).start()
+            try:
+                # Queued together so they are batched together
+                good = asyncio.ensure_future(server.solo(parse_request({'choruses': 2})))
+                bad = asyncio.ensure_future(server.solo(SoloRequest(2, float('nan'), True, True, 'midi')))
+                results = await asyncio.gather(good, bad, return_exceptions=True)
+                status, content_type, body = await server.respond('POST', '/solo', b'{"bpm": NaN}')
+            finally:
+                await server.close()
+            return results, status, server.batches
+        (good, bad), status, batches = asyncio.run(run())
+        self.assertTrue(good.startswith(b'MThd'))
+        self.assertIsInstance(bad, RuntimeError)
+        self.assertEqual(status, 400)
+        self.assertEqual(batches, 1)
+
+if __name__ == '__main__':
+    unittest.main()
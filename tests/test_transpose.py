@@ -0,0 +1,72 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# test_transpose.py
+# solo_in_keys() in all 12 keys gives the same solos as generating over the transposed
+# changes, on the NumPy path and the plain list one, and keeps to an instrument's range
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import unittest
+
+import tests_setup
+from SoloEngine import *
+import Transpose
+from Transpose import *
+
+def transposed_changes(chords, key):
+    offset = key_offset(key)
+    return [form_chord(chord.root + offset, chord.quality, chord.inversion) for chord in chords]
+
+class SoloInKeysTest(unittest.TestCase):
+    def check_keys(self, num_choruses, use_rests):
+        generator = SoloGenerator(num_choruses, use_rests)
+        solos = solo_in_keys(generator)
+        self.assertEqual(len(solos), len(ALL_KEYS))
+        for key, solo in zip(ALL_KEYS, solos):
+            expected = SoloGenerator(num_choruses, use_rests, chords=transposed_changes(generator.chords, key)).solo()
+            self.assertEqual(list(solo.pitches), list(expected.pitches), 'key {}'.format(key))
+            self.assertEqual(list(solo.ticks()), list(expected.ticks()), 'key {}'.format(key))
+
+    def test_all_keys(self):
+        for use_rests in (True, False):
+            self.check_keys(1, use_rests)
+            self.check_keys(3, use_rests)
+
+    # Long enough for the octave smoothing to run on arrays
+    def test_all_keys_vectorized(self):
+        num_choruses = VECTORIZE_MIN_NOTES // len(SoloGenerator(1).solo()) + 1
+        for use_rests in (True, False):
+            self.check_keys(num_choruses, use_rests)
+
+    def test_all_keys_lists(self):
+        numpy = Transpose.numpy
+        Transpose.numpy = None # As on Jython
+        try:
+            for use_rests in (True, False):
+                self.check_keys(2, use_rests)
+        finally:
+            Transpose.numpy = numpy
+
+    # The octave smoothing can drop notes under the range after the lines are fitted to it
+    def check_ranges(self, num_choruses):
+        for name, (low, high) in sorted(INSTRUMENT_RANGES.items()):
+            for use_rests in (True, False):
+                generator = SoloGenerator(num_choruses, use_rests)
+                for key, solo in zip(ALL_KEYS, solo_in_keys(generator, pitch_range=(low, high))):
+                    played = [pitch for pitch in solo.pitches if pitch >= 0]
+                    self.assertGreaterEqual(min(played), low, '{} key {}'.format(name, key))
+                    self.assertLessEqual(max(played), high, '{} key {}'.format(name, key))
+
+    def test_instrument_ranges(self):
+        self.check_ranges(2)
+        self.check_ranges(VECTORIZE_MIN_NOTES // len(SoloGenerator(1).solo()) + 1)
+        numpy = Transpose.numpy
+        Transpose.numpy = None
+        try:
+            self.check_ranges(2)
+        finally:
+            Transpose.numpy = numpy
+
+    def test_unsupported(self):
+        for options in ({'rhythm': 'swing'}, {'target_lines': True}, {'avoid_repeats': True}):
+            self.assertRaises(ValueError, solo_in_keys, SoloGenerator(1, **options))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+# tests_setup.py
+# Imported first by every test. Puts the repository on sys.path, and the stand-in
+# music/gui modules from benchmarks/stubs/ as well when JythonMusic isn't available
+# (the tests compare against the stand-in's Mod.tiePitches). Run from the repository root:
+#   python -m pytest tests
+#   python -m unittest discover tests
+# ------------------------------------------------------------------------------------------------------------------------------------------------------
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+STUBS_DIR = os.path.join(REPO_DIR, 'benchmarks', 'stubs')
+
+sys.path.insert(0, REPO_DIR)
+try:
+    import music
+    USING_STUBS = False
+except ImportError:
+    sys.path.insert(0, STUBS_DIR)
+    USING_STUBS = True